@@ -0,0 +1,320 @@
+"""Lightweight Home Assistant stand-ins for benchmarking Entity Manager.
+
+Only the surface Entity Manager touches is implemented: hass.data with the
+entity/device/area registries, the state machine, config entries, services,
+the bus and the executor. Executor jobs run inline so timings measure the work
+itself rather than thread hand-offs.
+"""
+import asyncio
+import inspect
+import os
+import random
+from types import SimpleNamespace
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Optional, Tuple
+
+import attr
+from homeassistant.core import State
+from homeassistant.helpers.area_registry import DATA_REGISTRY as AREA_DATA_REGISTRY
+from homeassistant.helpers.device_registry import DATA_REGISTRY as DEVICE_DATA_REGISTRY
+from homeassistant.helpers.entity_registry import (
+    DATA_REGISTRY as ENTITY_DATA_REGISTRY,
+    RegistryEntry,
+    RegistryEntryDisabler,
+)
+
+# (domain, weight) - roughly the mix of a large Zigbee/MQTT installation
+DOMAIN_WEIGHTS: List[Tuple[str, int]] = [
+    ("sensor", 45),
+    ("binary_sensor", 14),
+    ("switch", 7),
+    ("light", 6),
+    ("automation", 5),
+    ("button", 4),
+    ("number", 3),
+    ("select", 3),
+    ("update", 3),
+    ("device_tracker", 2),
+    ("cover", 2),
+    ("climate", 1),
+    ("media_player", 1),
+    ("script", 1),
+    ("input_boolean", 1),
+    ("camera", 1),
+    ("scene", 1),
+]
+
+# (integration, manufacturer) - the platform of an entity is its integration
+INTEGRATIONS: List[Tuple[str, Optional[str]]] = [
+    ("zha", "IKEA of Sweden"),
+    ("mqtt", "Xiaomi"),
+    ("hue", "Signify"),
+    ("esphome", "Espressif"),
+    ("shelly", "Shelly"),
+    ("tplink", "TP-Link"),
+    ("homekit_controller", "Aqara"),
+    ("template", None),
+]
+
+SENSOR_SUFFIXES = ["temperature", "humidity", "battery", "linkquality", "rssi", "power", "energy", "voltage", "current", "illuminance"]
+AREAS = ["kitchen", "living_room", "bedroom", "office", "garage", "garden", "bathroom", "hallway"]
+ENTITIES_PER_DEVICE = 4
+DISABLED_RATIO = 0.05
+STATE_ONLY_RATIO = 0.03
+CONFIGURED_RATIO = 0.1
+
+
+class FakeConfig:
+    """hass.config stand-in rooted at a temporary directory."""
+
+    def __init__(self, config_dir: str):
+        """Initialize the config."""
+        self.config_dir = config_dir
+        self.components = set()
+
+    def path(self, *parts: str) -> str:
+        """Return a path below the config directory."""
+        return os.path.join(self.config_dir, *parts)
+
+
+class FakeBus:
+    """Event bus that counts fired events and ignores listeners."""
+
+    def __init__(self):
+        """Initialize the bus."""
+        self.fired = 0
+
+    def async_fire(self, event_type: str, event_data: Optional[Dict[str, Any]] = None, *args: Any, **kwargs: Any) -> None:
+        """Count a fired event."""
+        self.fired += 1
+
+    def async_listen(self, event_type: str, listener: Callable, *args: Any, **kwargs: Any) -> Callable[[], None]:
+        """Ignore the listener and return a no-op unsubscribe."""
+        return lambda: None
+
+
+class FakeStates:
+    """State machine holding real State objects."""
+
+    def __init__(self):
+        """Initialize the state machine."""
+        self._states: Dict[str, State] = {}
+
+    def get(self, entity_id: str) -> Optional[State]:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_all(self, domain_filter: Any = None) -> List[State]:
+        """Return all states."""
+        return list(self._states.values())
+
+    def async_entity_ids(self, domain_filter: Any = None) -> List[str]:
+        """Return all entity ids with a state."""
+        return list(self._states)
+
+    def async_set(self, entity_id: str, state: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        """Set the state of an entity."""
+        self._states[entity_id] = State(entity_id, state, attributes)
+
+    def __len__(self) -> int:
+        """Return the number of states."""
+        return len(self._states)
+
+
+class FakeServices:
+    """Service registry that calls handlers inline."""
+
+    def __init__(self):
+        """Initialize the services."""
+        self._handlers: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Any]] = {}
+        self.calls = 0
+
+    def async_register(self, domain: str, service: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+        """Register a handler receiving the service data."""
+        self._handlers[(domain, service)] = handler
+
+    async def async_call(self, domain: str, service: str, service_data: Optional[Dict[str, Any]] = None, blocking: bool = False, **kwargs: Any) -> None:
+        """Call a registered handler and await it if it is a coroutine."""
+        self.calls += 1
+        result = self._handlers[(domain, service)](service_data or {})
+        if inspect.isawaitable(result):
+            await result
+
+
+class FakeEntityRegistry:
+    """Entity registry holding real RegistryEntry objects."""
+
+    def __init__(self, bus: FakeBus):
+        """Initialize the registry."""
+        self.entities: Dict[str, RegistryEntry] = {}
+        self._bus = bus
+
+    def async_get(self, entity_id: str) -> Optional[RegistryEntry]:
+        """Return the entry of an entity."""
+        return self.entities.get(entity_id)
+
+    def async_update_entity(self, entity_id: str, **changes: Any) -> RegistryEntry:
+        """Replace an entry with updated fields and fire the registry event."""
+        entry = self.entities[entity_id] = attr.evolve(self.entities[entity_id], **changes)
+        self._bus.async_fire("entity_registry_updated", {"action": "update", "entity_id": entity_id})
+        return entry
+
+    def async_remove(self, entity_id: str) -> None:
+        """Remove an entry."""
+        self.entities.pop(entity_id, None)
+
+
+class FakeDeviceRegistry:
+    """Device registry with attribute-only device entries."""
+
+    def __init__(self):
+        """Initialize the registry."""
+        self.devices: Dict[str, SimpleNamespace] = {}
+
+    def async_get(self, device_id: str) -> Optional[SimpleNamespace]:
+        """Return a device."""
+        return self.devices.get(device_id)
+
+
+class FakeAreaRegistry:
+    """Area registry with attribute-only area entries."""
+
+    def __init__(self):
+        """Initialize the registry."""
+        self.areas: Dict[str, SimpleNamespace] = {}
+
+    def async_get_area(self, area_id: str) -> Optional[SimpleNamespace]:
+        """Return an area."""
+        return self.areas.get(area_id)
+
+
+class FakeConfigEntries:
+    """Config entry lookup by id."""
+
+    def __init__(self):
+        """Initialize the config entries."""
+        self.entries: Dict[str, SimpleNamespace] = {}
+
+    def async_get_entry(self, entry_id: str) -> Optional[SimpleNamespace]:
+        """Return a config entry."""
+        return self.entries.get(entry_id)
+
+    def async_entries(self, domain: Optional[str] = None) -> List[SimpleNamespace]:
+        """Return the config entries, optionally of one integration."""
+        return [entry for entry in self.entries.values() if domain is None or entry.domain == domain]
+
+
+class FakeHass:
+    """hass stand-in exposing the registries through hass.data like the real helpers expect."""
+
+    def __init__(self, config_dir: str):
+        """Initialize hass with empty registries."""
+        self.data: Dict[str, Any] = {}
+        self.config = FakeConfig(config_dir)
+        self.bus = FakeBus()
+        self.states = FakeStates()
+        self.services = FakeServices()
+        self.config_entries = FakeConfigEntries()
+        self.entity_registry = self.data[ENTITY_DATA_REGISTRY] = FakeEntityRegistry(self.bus)
+        self.device_registry = self.data[DEVICE_DATA_REGISTRY] = FakeDeviceRegistry()
+        self.area_registry = self.data[AREA_DATA_REGISTRY] = FakeAreaRegistry()
+        self.executor_jobs = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, for the time trackers."""
+        return asyncio.get_running_loop()
+
+    async def async_add_executor_job(self, target: Callable, *args: Any) -> Any:
+        """Run an executor job inline."""
+        self.executor_jobs += 1
+        return target(*args)
+
+    def async_create_task(self, target: Coroutine[Any, Any, Any]) -> "asyncio.Task[Any]":
+        """Schedule a coroutine on the running loop."""
+        return asyncio.get_running_loop().create_task(target)
+
+    def async_run_hass_job(self, hassjob: Any, *args: Any) -> Optional["asyncio.Task[Any]"]:
+        """Run a dispatcher or tracker callback, scheduling it if it is a coroutine."""
+        result = hassjob.target(*args)
+        if asyncio.iscoroutine(result):
+            return self.async_create_task(result)
+        return None
+
+
+def _weighted_domains(rnd: random.Random, count: int) -> Iterator[str]:
+    """Yield ``count`` domains drawn from DOMAIN_WEIGHTS."""
+    domains = [domain for domain, _ in DOMAIN_WEIGHTS]
+    weights = [weight for _, weight in DOMAIN_WEIGHTS]
+    return iter(rnd.choices(domains, weights, k=count))
+
+
+def populate(hass: FakeHass, count: int, seed: int = 0) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Fill the registries and state machine with ``count`` entities.
+
+    Returns (entity config, domain config) shaped like the JSON files
+    Entity Manager persists, with about CONFIGURED_RATIO of the entities and
+    a few domains carrying their own settings.
+    """
+    rnd = random.Random(seed)
+
+    for area_id in AREAS:
+        hass.area_registry.areas[area_id] = SimpleNamespace(id=area_id, name=area_id.replace("_", " ").title())
+    config_entries = []
+    for integration, manufacturer in INTEGRATIONS:
+        entry = SimpleNamespace(entry_id=f"entry_{integration}", domain=integration)
+        hass.config_entries.entries[entry.entry_id] = entry
+        config_entries.append((entry, manufacturer))
+
+    entity_config: Dict[str, Any] = {}
+    device_id = None
+    config_entry, manufacturer = config_entries[0]
+    for index, domain in enumerate(_weighted_domains(rnd, count)):
+        if index % ENTITIES_PER_DEVICE == 0:
+            config_entry, manufacturer = rnd.choice(config_entries)
+            device_id = None
+            if manufacturer is not None:
+                device_id = f"device_{index // ENTITIES_PER_DEVICE}"
+                hass.device_registry.devices[device_id] = SimpleNamespace(
+                    id=device_id,
+                    name=f"{manufacturer} device {index // ENTITIES_PER_DEVICE}",
+                    name_by_user=None,
+                    manufacturer=manufacturer,
+                    model=f"model_{rnd.randrange(20)}",
+                    area_id=rnd.choice(AREAS),
+                )
+        suffix = rnd.choice(SENSOR_SUFFIXES) if domain == "sensor" else "state"
+        entity_id = f"{domain}.{config_entry.domain}_{index}_{suffix}"
+        friendly_name = f"{config_entry.domain.title()} {index} {suffix.replace('_', ' ')}"
+
+        if rnd.random() < STATE_ONLY_RATIO:
+            hass.states.async_set(entity_id, "on", {"friendly_name": friendly_name})
+            continue
+
+        disabled = rnd.random() < DISABLED_RATIO
+        hass.entity_registry.entities[entity_id] = RegistryEntry(
+            entity_id=entity_id,
+            unique_id=f"{config_entry.domain}-{index}",
+            platform=config_entry.domain,
+            config_entry_id=config_entry.entry_id,
+            device_id=device_id,
+            original_name=friendly_name,
+            original_device_class=suffix if domain == "sensor" else None,
+            disabled_by=RegistryEntryDisabler.USER if disabled else None,
+        )
+        if not disabled:
+            state = str(round(rnd.uniform(0, 100), 1)) if domain == "sensor" else rnd.choice(["on", "off", "unavailable"])
+            hass.states.async_set(entity_id, state, {"friendly_name": friendly_name})
+
+        if rnd.random() < CONFIGURED_RATIO:
+            if rnd.random() < 0.3:
+                entity_config[entity_id] = {"recorder_exclude": True}
+            else:
+                entity_config[entity_id] = {"recorder_days": rnd.choice([1, 3, 7, 30, 90])}
+
+    domain_config = {
+        "automation": {"recorder_exclude": True},
+        "update": {"recorder_exclude": True},
+        "sensor": {"recorder_days": 14},
+        "binary_sensor": {"recorder_days": 7},
+    }
+    return entity_config, domain_config
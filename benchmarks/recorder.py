@@ -0,0 +1,273 @@
+"""Benchmark Entity Manager recorder operations on a generated history database.
+
+Run from the repository root (Home Assistant must be importable):
+
+    python -m benchmarks.recorder                          # compare against recorder_baseline.json
+    python -m benchmarks.recorder --rows 100000 --entities 1000
+    python -m benchmarks.recorder --save benchmarks/recorder_baseline.json
+
+A recorder SQLite database is generated per row count (see recorder_db.py)
+and served by a stand-in recorder. Its recorder.purge_entities deletes rows
+the way Home Assistant does: batches of state ids older than the cutoff,
+references from newer states cleared first, then unused attributes. Purges
+run against a fresh copy of the generated database on every repeat. Reads
+run on a pool of database workers the size of Home Assistant's, so
+partitioned queries run concurrently as they do in production.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from custom_components.entity_manager import EntityManager
+from custom_components.entity_manager.const import DOMAIN
+
+from .fake_hass import FakeHass, populate
+from .recorder_db import DEFAULT_DAYS, DEFAULT_SKEW, generate_recorder_db
+from .run import POLICIES, Operation, _exit_code, _host, _measure, _print_results
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "recorder_baseline.json")
+DEFAULT_ROWS = [1000000]
+DEFAULT_ENTITIES = 5000
+DEFAULT_THRESHOLD = 0.25
+RECORDER_KEEP_DAYS = 10
+ORPHAN_RATIO = 0.05
+# Home Assistant's SQLITE_MAX_BIND_VARS
+PURGE_BATCH_SIZE = 998
+REPORT_LIMIT = 100
+# Home Assistant's MAX_DB_EXECUTOR_WORKERS
+DB_EXECUTOR_WORKERS = 4
+
+
+class FakeRecorder:
+    """Recorder stand-in serving sessions on a SQLite file and running purges inline."""
+
+    def __init__(self, hass: FakeHass, path: str, keep_days: int = RECORDER_KEEP_DAYS):
+        """Initialize the recorder and register its purge_entities service."""
+        self.hass = hass
+        self.path = path
+        self.keep_days = keep_days
+        self.backlog = 0
+        self.purged_rows = 0
+        self._engine = None
+        self.get_session: Optional[Callable[[], Any]] = None
+        self._executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="DbWorker")
+        self.connect()
+        hass.config.components.add("recorder")
+        hass.data["recorder_instance"] = self
+        hass.services.async_register("recorder", "purge_entities", self._purge_entities)
+
+    def connect(self) -> None:
+        """Open the engine on the database file."""
+        self._engine = create_engine(f"sqlite:///{self.path}")
+        self.get_session = sessionmaker(bind=self._engine)
+
+    def close(self) -> None:
+        """Dispose of the engine so the file can be replaced."""
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    async def async_add_executor_job(self, target: Callable, *args: Any) -> Any:
+        """Run a recorder job on the database worker pool, as Home Assistant does."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, target, *args)
+
+    def shutdown(self) -> None:
+        """Close the database and stop the worker pool."""
+        self.close()
+        self._executor.shutdown()
+
+    async def async_block_till_done(self) -> None:
+        """Purges run inline, so there is nothing to wait for."""
+
+    def _purge_entities(self, service_data: Dict[str, Any]) -> None:
+        """Delete the states of the given entities older than keep_days."""
+        entity_ids = service_data.get("entity_id") or []
+        before_ts = time.time() - service_data.get("keep_days", 0) * 86400
+        with self.get_session() as session:
+            metadata_ids = [
+                row[0]
+                for row in session.execute(
+                    text("SELECT metadata_id FROM states_meta WHERE entity_id IN :entity_ids").bindparams(
+                        bindparam("entity_ids", expanding=True)
+                    ),
+                    {"entity_ids": list(entity_ids)},
+                )
+            ]
+            if metadata_ids:
+                while self._purge_batch(session, metadata_ids, before_ts):
+                    pass
+            session.commit()
+
+    def _purge_batch(self, session: Any, metadata_ids: Sequence[int], before_ts: float) -> bool:
+        """Delete one batch of states; return False when nothing was left."""
+        rows = session.execute(
+            text(
+                "SELECT state_id, attributes_id FROM states WHERE metadata_id IN :metadata_ids "
+                "AND last_updated_ts < :before_ts LIMIT :limit"
+            ).bindparams(bindparam("metadata_ids", expanding=True)),
+            {"metadata_ids": list(metadata_ids), "before_ts": before_ts, "limit": PURGE_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            return False
+
+        state_ids = [row[0] for row in rows]
+        attributes_ids = {row[1] for row in rows if row[1] is not None}
+        params = {"state_ids": state_ids}
+        session.execute(
+            text("UPDATE states SET old_state_id = NULL WHERE old_state_id IN :state_ids").bindparams(
+                bindparam("state_ids", expanding=True)
+            ),
+            params,
+        )
+        session.execute(
+            text("DELETE FROM states WHERE state_id IN :state_ids").bindparams(bindparam("state_ids", expanding=True)),
+            params,
+        )
+        used = {
+            row[0]
+            for row in session.execute(
+                text("SELECT DISTINCT attributes_id FROM states WHERE attributes_id IN :attributes_ids").bindparams(
+                    bindparam("attributes_ids", expanding=True)
+                ),
+                {"attributes_ids": list(attributes_ids)},
+            )
+        } if attributes_ids else set()
+        if unused := list(attributes_ids - used):
+            session.execute(
+                text("DELETE FROM state_attributes WHERE attributes_id IN :attributes_ids").bindparams(
+                    bindparam("attributes_ids", expanding=True)
+                ),
+                {"attributes_ids": unused},
+            )
+        self.purged_rows += len(state_ids)
+        return True
+
+
+def _operations(manager: EntityManager, recorder: FakeRecorder, pristine_path: str) -> List[Operation]:
+    """Return the recorder operations benchmarked against a generated database."""
+
+    async def _restore() -> None:
+        # Destructive operations start from the generated database every time
+        recorder.close()
+        shutil.copyfile(pristine_path, recorder.path)
+        recorder.connect()
+        manager.history_store.close()
+        if os.path.exists(manager.history_store._path):
+            os.remove(manager.history_store._path)
+
+    async def _report() -> None:
+        result = await manager.generate_recorder_report(limit=REPORT_LIMIT)
+        assert result["status"] == "success", result
+
+    async def _estimate() -> None:
+        await manager.estimate_retention_purge()
+
+    async def _purge_all() -> None:
+        result = await manager.purge_all_entities()
+        assert result["status"] == "success", result
+
+    return [
+        Operation("generate_recorder_report", _report),
+        Operation("estimate_retention_purge", _estimate),
+        Operation("purge_by_retention", manager.purge_by_retention, _restore),
+        Operation("purge_all_entities", _purge_all, _restore),
+        Operation("purge_orphaned_entities", manager.purge_orphaned_entities, _restore),
+    ]
+
+
+async def run_rows(rows: int, entities: int, days: int, skew: float, repeats: int) -> Dict[str, Any]:
+    """Benchmark every operation on a database of about ``rows`` states."""
+    with tempfile.TemporaryDirectory(prefix="entity_manager_recorder_bench_") as config_dir:
+        hass = FakeHass(config_dir)
+        entity_config, domain_config = populate(hass, entities)
+        known = sorted(set(hass.entity_registry.entities) | set(hass.states.async_entity_ids()))
+        orphans = [f"sensor.removed_{index}_power" for index in range(int(len(known) * ORPHAN_RATIO))]
+
+        pristine_path = os.path.join(config_dir, "pristine.db")
+        database = generate_recorder_db(pristine_path, known + orphans, rows, days, skew)
+        db_path = os.path.join(config_dir, "home-assistant_v2.db")
+        shutil.copyfile(pristine_path, db_path)
+
+        recorder = FakeRecorder(hass, db_path)
+        manager = hass.data[DOMAIN] = EntityManager(hass)
+        manager._config = entity_config
+        manager._domain_config = domain_config
+        await manager.set_retention_policies(POLICIES)
+
+        estimate = await manager.estimate_retention_purge()
+        results = {
+            "entities": len(known),
+            "orphans": len(orphans),
+            "rows": database["rows"],
+            "size_mb": database["size_mb"],
+            "purgeable_rows": estimate["rows"],
+            "operations": {},
+        }
+        try:
+            for operation in _operations(manager, recorder, pristine_path):
+                results["operations"][operation.name] = await _measure(operation, repeats)
+        finally:
+            recorder.shutdown()
+            manager.history_store.close()
+        return results
+
+
+def _heading(rows: str, results: Dict[str, Any]) -> str:
+    """Describe one generated database."""
+    return (
+        f"{rows} rows ({results['rows']} generated, {results['size_mb']} MB, {results['entities']} entities, "
+        f"{results['orphans']} orphaned, {results['purgeable_rows']} purgeable by retention)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the recorder benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default=",".join(map(str, DEFAULT_ROWS)), help="comma separated states row counts")
+    parser.add_argument("--entities", type=int, default=DEFAULT_ENTITIES, help="number of synthetic entities")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="history period in days")
+    parser.add_argument("--skew", type=float, default=DEFAULT_SKEW, help="Zipf exponent of the write rates")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per operation")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    results: Dict[str, Any] = {
+        "host": _host(),
+        "repeats": args.repeats,
+        "days": args.days,
+        "skew": args.skew,
+        "sizes": {},
+    }
+    for rows in (int(rows) for rows in args.rows.split(",")):
+        results["sizes"][str(rows)] = asyncio.run(run_rows(rows, args.entities, args.days, args.skew, args.repeats))
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and args.baseline != args.save:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = _print_results(results, baseline, args.threshold, _heading)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults saved to {args.save}")
+    return _exit_code(results, baseline, regressions, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
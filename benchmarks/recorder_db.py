@@ -0,0 +1,217 @@
+"""Generate a recorder SQLite database with synthetic state history.
+
+The states, states_meta and state_attributes tables are created from the
+recorder's own SQLAlchemy schema, so indexes and column types match a real
+database. Write rates follow a Zipf-like skew: a few entities (power and
+link quality sensors) produce most of the rows, like on a real system.
+
+    python -m benchmarks.recorder_db /tmp/recorder.db --entities 5000 --rows 2000000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine
+
+from homeassistant.components.recorder.db_schema import StateAttributes, States, StatesMeta
+
+DEFAULT_DAYS = 30
+DEFAULT_SKEW = 1.1
+ATTRIBUTE_VARIANTS = 2
+INSERT_BATCH_SIZE = 50000
+
+# Relative write rate per domain, multiplied by the entity's Zipf weight
+DOMAIN_WRITE_RATES: Dict[str, float] = {
+    "sensor": 4.0,
+    "binary_sensor": 1.0,
+    "light": 0.5,
+    "switch": 0.5,
+    "device_tracker": 1.0,
+    "media_player": 0.5,
+    "climate": 0.5,
+    "cover": 0.2,
+    "automation": 0.2,
+    "update": 0.02,
+    "button": 0.02,
+    "number": 0.05,
+    "select": 0.05,
+    "scene": 0.02,
+    "script": 0.1,
+}
+
+_ON_OFF = ("on", "off")
+
+
+def _row_counts(entity_ids: Sequence[str], rows: int, skew: float, rnd: random.Random) -> List[int]:
+    """Split ``rows`` over the entities by Zipf rank and domain write rate."""
+    ranks = list(range(len(entity_ids)))
+    rnd.shuffle(ranks)
+    weights = [
+        DOMAIN_WRITE_RATES.get(entity_id.split(".", 1)[0], 0.1) / math.pow(rank + 1, skew)
+        for entity_id, rank in zip(entity_ids, ranks)
+    ]
+    total = sum(weights)
+    return [max(1, round(rows * weight / total)) for weight in weights]
+
+
+def _state_value(domain: str, rnd: random.Random) -> str:
+    """Return a plausible state for an entity of ``domain``."""
+    if domain == "sensor":
+        return str(round(rnd.uniform(0, 100), 1))
+    return rnd.choice(_ON_OFF)
+
+
+def _state_rows(
+    entity_ids: Sequence[str],
+    counts: Sequence[int],
+    start_ts: float,
+    end_ts: float,
+    attribute_ids: Dict[str, List[int]],
+    rnd: random.Random,
+) -> Iterator[Tuple[Any, ...]]:
+    """Yield states rows, evenly spread over the period with jitter per entity."""
+    state_id = 0
+    span = end_ts - start_ts
+    for metadata_id, (entity_id, count) in enumerate(zip(entity_ids, counts), start=1):
+        domain = entity_id.split(".", 1)[0]
+        step = span / count
+        variants = attribute_ids[entity_id]
+        old_state_id = None
+        for index in range(count):
+            state_id += 1
+            ts = start_ts + step * (index + rnd.random())
+            yield (
+                state_id,
+                _state_value(domain, rnd),
+                ts,
+                ts,
+                old_state_id,
+                variants[0] if rnd.random() < 0.9 else rnd.choice(variants),
+                0,
+                metadata_id,
+            )
+            old_state_id = state_id
+
+
+def _batched(rows: Iterator[Tuple[Any, ...]], size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    """Group an iterator into lists of ``size``."""
+    batch: List[Tuple[Any, ...]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_recorder_db(
+    path: str,
+    entity_ids: Sequence[str],
+    rows: int,
+    days: int = DEFAULT_DAYS,
+    skew: float = DEFAULT_SKEW,
+    seed: int = 0,
+    end_ts: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Create ``path`` with about ``rows`` states of ``entity_ids`` over ``days``.
+
+    Returns a summary with the row counts, the heaviest writers, the file
+    size and the generation time.
+    """
+    started = time.perf_counter()
+    rnd = random.Random(seed)
+    end_ts = time.time() if end_ts is None else end_ts
+    start_ts = end_ts - days * 86400
+    entity_ids = list(entity_ids)
+
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    StatesMeta.metadata.create_all(engine, tables=[StatesMeta.__table__, StateAttributes.__table__, States.__table__])
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        # Building the states indexes once after the bulk insert is much faster
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'states' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+
+        conn.executemany(
+            "INSERT INTO states_meta (metadata_id, entity_id) VALUES (?, ?)",
+            enumerate(entity_ids, start=1),
+        )
+
+        attribute_rows = []
+        attribute_ids: Dict[str, List[int]] = {}
+        for entity_id in entity_ids:
+            attribute_ids[entity_id] = []
+            for variant in range(ATTRIBUTE_VARIANTS):
+                shared_attrs = json.dumps({
+                    "friendly_name": entity_id.split(".", 1)[1].replace("_", " ").title(),
+                    "variant": variant,
+                }, separators=(",", ":"))
+                attribute_rows.append((len(attribute_rows) + 1, zlib.crc32(shared_attrs.encode()), shared_attrs))
+                attribute_ids[entity_id].append(len(attribute_rows))
+        conn.executemany("INSERT INTO state_attributes (attributes_id, hash, shared_attrs) VALUES (?, ?, ?)", attribute_rows)
+
+        counts = _row_counts(entity_ids, rows, skew, rnd)
+        for batch in _batched(_state_rows(entity_ids, counts, start_ts, end_ts, attribute_ids, rnd), INSERT_BATCH_SIZE):
+            conn.executemany(
+                "INSERT INTO states (state_id, state, last_changed_ts, last_updated_ts, old_state_id, "
+                "attributes_id, origin_idx, metadata_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    heaviest = sorted(zip(entity_ids, counts), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "entities": len(entity_ids),
+        "rows": sum(counts),
+        "attributes": len(attribute_rows),
+        "days": days,
+        "skew": skew,
+        "top_writers": [{"entity_id": entity_id, "rows": count} for entity_id, count in heaviest],
+        "size_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Generate a database from the command line."""
+    from .fake_hass import FakeHass, populate
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="database file to create (overwritten)")
+    parser.add_argument("--entities", type=int, default=5000, help="number of synthetic entities")
+    parser.add_argument("--rows", type=int, default=1000000, help="approximate number of states rows")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="history period in days")
+    parser.add_argument("--skew", type=float, default=DEFAULT_SKEW, help="Zipf exponent of the write rates")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    hass = FakeHass(os.path.dirname(os.path.abspath(args.path)))
+    populate(hass, args.entities, args.seed)
+    entity_ids = sorted(set(hass.entity_registry.entities) | set(hass.states.async_entity_ids()))
+    print(json.dumps(generate_recorder_db(args.path, entity_ids, args.rows, args.days, args.skew, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark Entity Manager hot paths on synthetic registries.
+
+Run from the repository root (Home Assistant must be importable):
+
+    python -m benchmarks.run                      # compare against baseline.json
+    python -m benchmarks.run --sizes 1000,10000   # smaller run
+    python -m benchmarks.run --save benchmarks/baseline.json
+
+For every registry size and operation the median latency, the peak memory
+allocated while the operation runs and the number of files opened for
+writing are reported. With a baseline, operations slower than the
+threshold are flagged. The exit code is then 1 only if the baseline was
+recorded on the same host (see _host): timings from another machine or
+Python are reported for reference but do not fail the run.
+"""
+import argparse
+import asyncio
+import builtins
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from custom_components.entity_manager import EntityManager
+from custom_components.entity_manager.api import EntityManagerGetDomainsView
+from custom_components.entity_manager.const import DOMAIN
+from custom_components.entity_manager.growth import DatabaseGrowthTracker
+from custom_components.entity_manager.maintenance import MaintenanceScheduler
+from custom_components.entity_manager.stats import EntityStatsTracker
+
+from .fake_hass import FakeHass, populate
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = [1000, 10000, 50000]
+DEFAULT_THRESHOLD = 0.25
+BULK_UPDATE_SIZE = 100
+
+POLICIES = [
+    {"match": "glob", "value": "sensor.*_linkquality", "recorder_days": 2},
+    {"match": "integration", "value": "template", "recorder_exclude": True},
+    {"match": "area", "value": "garden", "recorder_days": 30},
+]
+
+
+@dataclass
+class Operation:
+    """A benchmarked operation with an optional untimed preparation step."""
+
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    prepare: Optional[Callable[[], Awaitable[Any]]] = None
+
+
+class WriteCounter:
+    """Count files opened for writing while active."""
+
+    def __init__(self):
+        """Initialize the counter."""
+        self.count = 0
+
+    @contextmanager
+    def active(self) -> Iterator["WriteCounter"]:
+        """Patch builtins.open for the duration of the block."""
+        original_open = builtins.open
+
+        def _counting_open(file: Any, mode: str = "r", *args: Any, **kwargs: Any) -> Any:
+            if any(flag in mode for flag in "wax+"):
+                self.count += 1
+            return original_open(file, mode, *args, **kwargs)
+
+        self.count = 0
+        builtins.open = _counting_open
+        try:
+            yield self
+        finally:
+            builtins.open = original_open
+
+
+async def _measure(operation: Operation, repeats: int) -> Dict[str, Any]:
+    """Time ``operation`` ``repeats`` times, then trace its allocations once."""
+    timings: List[float] = []
+    writes = WriteCounter()
+    for _ in range(repeats):
+        if operation.prepare is not None:
+            await operation.prepare()
+        gc.collect()
+        with writes.active():
+            start = time.perf_counter()
+            await operation.run()
+            timings.append(time.perf_counter() - start)
+
+    if operation.prepare is not None:
+        await operation.prepare()
+    gc.collect()
+    tracemalloc.start()
+    await operation.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "file_writes": writes.count,
+    }
+
+
+def _operations(manager: EntityManager, hass: FakeHass) -> List[Operation]:
+    """Return the operations benchmarked against a populated manager."""
+    entity_ids = sorted(hass.entity_registry.entities)[:BULK_UPDATE_SIZE]
+    toggled_entity = next(entity_id for entity_id in sorted(hass.entity_registry.entities) if entity_id.startswith("switch."))
+    request = SimpleNamespace(app={"hass": hass}, query={})
+    domains_view = EntityManagerGetDomainsView()
+    toggle = {"recorder_days": 3, "exclude": False}
+
+    async def _snapshot() -> None:
+        manager.get_entity_snapshot()
+
+    async def _all_entities() -> None:
+        await manager.get_all_entities()
+
+    async def _entities_json() -> None:
+        manager.get_entities_json()
+
+    async def _domains_view() -> None:
+        response = await domains_view.get(request)
+        assert response.status == 200, response.text
+
+    async def _prepare_bulk_update() -> None:
+        toggle["recorder_days"] = 10 - toggle["recorder_days"]
+
+    async def _bulk_update() -> None:
+        await manager.bulk_update(entity_ids, recorder_days=toggle["recorder_days"])
+
+    async def _prepare_exclude_domain() -> None:
+        manager._domain_config.pop("button", None)
+
+    async def _exclude_domain() -> None:
+        await manager.exclude_domain("button", True)
+
+    async def _prepare_recorder_config() -> None:
+        # Change one exclusion so every run writes recorder.yaml
+        toggle["exclude"] = not toggle["exclude"]
+        manager._config.setdefault(toggled_entity, {})["recorder_exclude"] = toggle["exclude"]
+
+    async def _update_recorder_config() -> None:
+        await manager.update_recorder_config(backup_config=True)
+
+    async def _update_recorder_config_unchanged() -> None:
+        await manager.update_recorder_config(backup_config=True)
+
+    return [
+        Operation("get_entity_snapshot", _snapshot),
+        Operation("get_all_entities", _all_entities),
+        Operation("entities_json", _entities_json),
+        Operation("domains_view", _domains_view),
+        Operation(f"bulk_update_{BULK_UPDATE_SIZE}", _bulk_update, _prepare_bulk_update),
+        Operation("exclude_domain", _exclude_domain, _prepare_exclude_domain),
+        Operation("update_recorder_config", _update_recorder_config, _prepare_recorder_config),
+        Operation("update_recorder_config_unchanged", _update_recorder_config_unchanged),
+        Operation("save_config", manager.save_config),
+        Operation("load_config", manager.load_config),
+    ]
+
+
+async def run_size(size: int, repeats: int) -> Dict[str, Any]:
+    """Benchmark every operation on a registry of ``size`` entities."""
+    with tempfile.TemporaryDirectory(prefix="entity_manager_bench_") as config_dir:
+        hass = FakeHass(config_dir)
+        entity_config, domain_config = populate(hass, size)
+        # Trackers as async_setup_entry creates them, with the default options
+        manager = hass.data[DOMAIN] = EntityManager(hass)
+        manager.scheduler = MaintenanceScheduler(hass, manager, {})
+        manager.growth = DatabaseGrowthTracker(hass, manager, {})
+        manager.stats = EntityStatsTracker(hass, manager)
+        manager._config = entity_config
+        manager._domain_config = domain_config
+        await manager.set_retention_policies(POLICIES)
+        await manager.save_config()
+        await manager.save_domain_config()
+        await manager.async_ensure_started()
+
+        results = {
+            "entities": len(hass.entity_registry.entities),
+            "states": len(hass.states),
+            "operations": {},
+        }
+        for operation in _operations(manager, hass):
+            results["operations"][operation.name] = await _measure(operation, repeats)
+        return results
+
+
+def _host() -> Dict[str, Any]:
+    """Describe the machine and Python the results are recorded on."""
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def _exit_code(results: Dict[str, Any], baseline: Optional[Dict[str, Any]], regressions: List[str], threshold: float) -> int:
+    """Report the regressions; they fail the run only against a baseline from this host."""
+    if not regressions:
+        return 0
+    print(f"\nSlower than baseline by more than {threshold:.0%}: {', '.join(regressions)}")
+    if baseline.get("host") != results["host"]:
+        print("The baseline was recorded on another host, so this is not treated as a failure.")
+        return 0
+    return 1
+
+
+def _heading(size: str, results: Dict[str, Any]) -> str:
+    """Describe one registry size."""
+    return f"{size} entities ({results['entities']} registry, {results['states']} states)"
+
+
+def _print_results(
+    results: Dict[str, Any],
+    baseline: Optional[Dict[str, Any]],
+    threshold: float,
+    heading: Callable[[str, Dict[str, Any]], str] = _heading,
+) -> List[str]:
+    """Print a table per size and return the regressed operations."""
+    regressions = []
+    for size, size_results in results["sizes"].items():
+        print(f"\n{heading(size, size_results)}")
+        print(f"  {'operation':<34}{'median ms':>12}{'min ms':>12}{'peak KB':>12}{'writes':>8}{'vs base':>10}")
+        base_ops = ((baseline or {}).get("sizes", {}).get(size) or {}).get("operations", {})
+        for name, result in size_results["operations"].items():
+            change = ""
+            if (base := base_ops.get(name)) and base["median_ms"] > 0:
+                ratio = result["median_ms"] / base["median_ms"] - 1
+                change = f"{ratio:+.0%}"
+                if ratio > threshold:
+                    change += " !"
+                    regressions.append(f"{size}/{name}")
+            print(
+                f"  {name:<34}{result['median_ms']:>12.2f}{result['min_ms']:>12.2f}"
+                f"{result['peak_alloc_kb']:>12.1f}{result['file_writes']:>8}{change:>10}"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated registry sizes")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per operation")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results: Dict[str, Any] = {
+        "host": _host(),
+        "repeats": args.repeats,
+        "sizes": {},
+    }
+    for size in sizes:
+        results["sizes"][str(size)] = asyncio.run(run_size(size, args.repeats))
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and args.baseline != args.save:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = _print_results(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults saved to {args.save}")
+    return _exit_code(results, baseline, regressions, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
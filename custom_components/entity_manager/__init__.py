@@ -1,26 +1,42 @@
 """Entity Manager integration for Home Assistant."""
+import asyncio
 import logging
 import os
-import json
-import yaml
-import shutil
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import copy
+import heapq
+from functools import partial
+from itertools import chain
+from operator import attrgetter, itemgetter
 
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry, EntityRegistry
-from homeassistant.helpers.device_registry import async_get as async_get_device_registry, DeviceRegistry
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
+from homeassistant.helpers.entity_registry import (
+    EVENT_ENTITY_REGISTRY_UPDATED,
+    async_get as async_get_entity_registry,
+    EntityRegistry,
+    RegistryEntry,
+)
+from homeassistant.helpers.device_registry import (
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    async_get as async_get_device_registry,
+    DeviceRegistry,
+)
 from homeassistant.exceptions import HomeAssistantError
-import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
     DOMAIN, 
     CONFIG_FILE, 
     DOMAIN_CONFIG_FILE,
+    POLICY_CONFIG_FILE,
     DEFAULT_RECORDER_DAYS,
     DEFAULT_DOMAIN_RECORDER_DAYS,
     SERVICE_UPDATE_ENTITY_STATE,
@@ -41,6 +57,10 @@ from .const import (
     SERVICE_BULK_EXCLUDE_DOMAINS,
     SERVICE_UPDATE_DOMAIN_RECORDER_DAYS,
     SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS,
+    SERVICE_DOWNSAMPLE_HISTORY,
+    SERVICE_RUN_MAINTENANCE,
+    SERVICE_IMPORT_RECORDER_CONFIG,
+    SERVICE_SET_RETENTION_POLICIES,
     ATTR_ENTITY_ID,
     ATTR_ENTITY_IDS,
     ATTR_ENABLED,
@@ -53,6 +73,21 @@ from .const import (
     ATTR_DOMAIN,
     ATTR_DOMAINS,
     ATTR_DOMAIN_RECORDER_DAYS,
+    ATTR_MAX_RECORDER_DAYS,
+    ATTR_FORCE,
+    ATTR_OVERWRITE,
+    ATTR_DRY_RUN,
+    ATTR_POLICIES,
+    SERVICE_BATCH,
+    ATTR_OPERATIONS,
+    ATTR_ACTION,
+    UPDATE_ENTITY_STATE_SCHEMA,
+    UPDATE_RECORDER_DAYS_SCHEMA,
+    BULK_UPDATE_SCHEMA,
+    DELETE_ENTITY_SCHEMA,
+    BULK_DELETE_SCHEMA,
+    PURGE_RECORDER_SCHEMA,
+    BATCH_SCHEMA,
     UPDATE_RECORDER_EXCLUDE_SCHEMA,
     BULK_UPDATE_RECORDER_EXCLUDE_SCHEMA,
     UPDATE_RECORDER_CONFIG_SCHEMA,
@@ -64,12 +99,47 @@ from .const import (
     BULK_EXCLUDE_DOMAINS_SCHEMA,
     UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
     BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
+    DOWNSAMPLE_HISTORY_SCHEMA,
+    RUN_MAINTENANCE_SCHEMA,
+    IMPORT_RECORDER_CONFIG_SCHEMA,
+    SET_RETENTION_POLICIES_SCHEMA,
     RECORDER_CONFIG_PATH,
     RECORDER_YAML_PATH,
     RECORDER_CONFIG_BACKUP_PATH,
     RECORDER_YAML_BACKUP_PATH,
+    HISTORY_STORE_FILE,
+    DEFAULT_DOWNSAMPLE_MAX_DAYS,
+    DOWNSAMPLE_BATCH_SIZE,
+    DOWNSAMPLE_CHUNK_SIZE,
+    DOWNSAMPLE_NIGHTLY_HOUR,
+    DOWNSAMPLE_NIGHTLY_MINUTE,
+    CONF_MAX_RECORDER_BACKLOG,
+    CONF_DEBUG_MODE,
+    DEFAULT_MAX_RECORDER_BACKLOG,
+    RECORDER_BACKLOG_POLL_INTERVAL,
+    RECORDER_BACKLOG_MAX_POLL_INTERVAL,
+    RECORDER_BACKLOG_TIMEOUT,
+    PURGE_CHUNK_SIZE,
+    RECORDER_QUERY_PARTITIONS,
+    RECORDER_QUERY_MIN_PARTITION_IDS,
+    RECORDER_RESERVED_WORKERS,
+    SIGNAL_CONFIG_UPDATED,
+    DEFAULT_SEARCH_LIMIT,
 )
 from .api import setup_api
+from .frontend import async_remove_panel, async_setup_frontend, async_setup_panel
+from .websocket import async_setup_websocket
+from .history_store import HistoryStore, SECONDS_PER_HOUR, accumulate_hourly
+from .maintenance import MaintenanceScheduler
+from .growth import DatabaseGrowthTracker
+from .stats import EntityStatsTracker
+from .policies import PolicyMatcher
+from .search import EntitySearchIndex
+from .lookups import RegistryLookupCache
+from .snapshot import EntityRow, SerializedSnapshot
+from .metrics import metrics, timed
+from .serialization import JSONDecodeError, read_json_file, write_json_file
+from .batch import REMOVE, ConfigBatch, validate_operations
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -79,60 +149,46 @@ try:
 except ImportError:
     HAS_REGISTRY_ENTRY_DISABLER = False
 
-UPDATE_ENTITY_STATE_SCHEMA = vol.Schema({
-    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
-    vol.Required(ATTR_ENABLED): cv.boolean,
-})
-
-UPDATE_RECORDER_DAYS_SCHEMA = vol.Schema({
-    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
-    vol.Required(ATTR_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
-})
-
-BULK_UPDATE_SCHEMA = vol.Schema({
-    vol.Required(ATTR_ENTITY_IDS): cv.entity_ids,
-    vol.Optional(ATTR_ENABLED): cv.boolean,
-    vol.Optional(ATTR_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
-})
-
-DELETE_ENTITY_SCHEMA = vol.Schema({
-    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
-})
-
-BULK_DELETE_SCHEMA = vol.Schema({
-    vol.Required(ATTR_ENTITY_IDS): cv.entity_ids,
-})
-
-PURGE_RECORDER_SCHEMA = vol.Schema({
-    vol.Optional(ATTR_ENTITY_IDS): cv.entity_ids,
-    vol.Optional(ATTR_FORCE_PURGE, default=False): cv.boolean,
-})
-
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Entity Manager from a config entry."""
+    """Set up Entity Manager from a config entry.
+
+    Only what must exist before Home Assistant starts (services, views and
+    the sensor platform) is set up here. The config files are loaded and the
+    in-memory indexes built once Home Assistant has started, or earlier if
+    a service or view needs them first.
+    """
     _LOGGER.info("Setting up Entity Manager integration")
+    setup_start = time.monotonic()
     
     hass.data.setdefault(DOMAIN, {})
     manager = EntityManager(hass)
+    manager.scheduler = MaintenanceScheduler(hass, manager, entry.options)
+    manager.growth = DatabaseGrowthTracker(hass, manager, entry.options)
+    manager.stats = EntityStatsTracker(hass, manager)
+    manager.max_recorder_backlog = entry.options.get(CONF_MAX_RECORDER_BACKLOG, DEFAULT_MAX_RECORDER_BACKLOG)
+    metrics.enabled = entry.options.get(CONF_DEBUG_MODE, False)
     hass.data[DOMAIN] = manager
     
     try:
-        await manager.load_config()
-        _LOGGER.info("Entity Manager configuration loaded successfully")
-        
         await register_services(hass, manager)
         _LOGGER.info("Entity Manager services registered successfully")
         
+        bundle = await async_setup_frontend(hass)
         setup_api(hass)
+        async_setup_websocket(hass)
         _LOGGER.info("Entity Manager API setup completed")
         
         await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
         _LOGGER.info("Entity Manager sensor platform setup completed")
         
+        entry.async_on_unload(async_at_started(hass, manager.async_start))
+        entry.async_on_unload(async_at_started(hass, partial(async_setup_panel, bundle=bundle)))
+        
         # Add options update listener
         entry.async_on_unload(entry.add_update_listener(async_reload_entry))
         
+        manager.startup_timings["setup"] = round(time.monotonic() - setup_start, 3)
         return True
     except Exception as e:
         _LOGGER.error("Failed to setup Entity Manager: %s", e, exc_info=True)
@@ -146,58 +202,84 @@ async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
 
 async def register_services(hass: HomeAssistant, manager):
     """Register all Entity Manager services."""
+
+    def _register(service: str, handler: Callable, schema: Optional[vol.Schema] = None) -> None:
+        """Register a service whose calls wait for the configuration to be loaded."""
+
+        async def _async_handle(call: ServiceCall):
+            await manager.async_ensure_loaded()
+            return await handler(call)
+
+        hass.services.async_register(DOMAIN, service, _async_handle, schema)
+
+    @timed("service.update_entity_state")
     async def handle_update_entity_state(call: ServiceCall):
         await manager.update_entity_state(call.data[ATTR_ENTITY_ID], call.data[ATTR_ENABLED])
     
+    @timed("service.update_recorder_days")
     async def handle_update_recorder_days(call: ServiceCall):
         await manager.update_recorder_days(call.data[ATTR_ENTITY_ID], call.data[ATTR_RECORDER_DAYS])
     
+    @timed("service.bulk_update")
     async def handle_bulk_update(call: ServiceCall):
         await manager.bulk_update(call.data[ATTR_ENTITY_IDS], call.data.get(ATTR_ENABLED), call.data.get(ATTR_RECORDER_DAYS))
     
+    @timed("service.delete_entity")
     async def handle_delete_entity(call: ServiceCall):
         await manager.delete_entity(call.data[ATTR_ENTITY_ID])
     
+    @timed("service.bulk_delete")
     async def handle_bulk_delete(call: ServiceCall):
         await manager.bulk_delete(call.data[ATTR_ENTITY_IDS])
     
+    @timed("service.purge_recorder")
     async def handle_purge_recorder(call: ServiceCall):
         await manager.purge_recorder(call.data.get(ATTR_ENTITY_IDS, []), call.data.get(ATTR_FORCE_PURGE, False))
     
+    @timed("service.reload_config")
     async def handle_reload_config(call: ServiceCall):
         await manager.load_config()
 
+    @timed("service.intelligent_purge")
     async def handle_intelligent_purge(call: ServiceCall):
         await manager.intelligent_purge(call.data.get(ATTR_FORCE_PURGE, False))
 
+    @timed("service.generate_recorder_report")
     async def handle_generate_recorder_report(call: ServiceCall):
         await manager.generate_recorder_report(call.data.get(ATTR_LIMIT, 100), call.data.get(ATTR_DAYS_BACK, 30))
 
     # Existing handlers
+    @timed("service.update_recorder_exclude")
     async def handle_update_recorder_exclude(call: ServiceCall):
         await manager.update_recorder_exclude(call.data[ATTR_ENTITY_ID], call.data[ATTR_RECORDER_EXCLUDE])
     
+    @timed("service.bulk_update_recorder_exclude")
     async def handle_bulk_update_recorder_exclude(call: ServiceCall):
         await manager.bulk_update_recorder_exclude(call.data[ATTR_ENTITY_IDS], call.data[ATTR_RECORDER_EXCLUDE])
     
+    @timed("service.update_recorder_config")
     async def handle_update_recorder_config(call: ServiceCall):
         await manager.update_recorder_config(call.data.get(ATTR_BACKUP_CONFIG, True))
     
+    @timed("service.purge_all_entities")
     async def handle_purge_all_entities(call: ServiceCall):
         await manager.purge_all_entities(call.data.get(ATTR_FORCE_PURGE, False))
 
     # UPDATED DOMAIN HANDLERS
+    @timed("service.exclude_domain")
     async def handle_exclude_domain(call: ServiceCall):
         domain = call.data[ATTR_DOMAIN]
         recorder_exclude = call.data.get(ATTR_RECORDER_EXCLUDE, True)
         recorder_days = call.data.get(ATTR_RECORDER_DAYS)
         await manager.exclude_domain(domain, recorder_exclude, recorder_days)
     
+    @timed("service.include_domain")
     async def handle_include_domain(call: ServiceCall):
         domain = call.data[ATTR_DOMAIN]
         recorder_days = call.data.get(ATTR_RECORDER_DAYS)
         await manager.include_domain(domain, recorder_days)
     
+    @timed("service.bulk_exclude_domains")
     async def handle_bulk_exclude_domains(call: ServiceCall):
         domains = call.data[ATTR_DOMAINS]
         recorder_exclude = call.data.get(ATTR_RECORDER_EXCLUDE, True)
@@ -205,37 +287,70 @@ async def register_services(hass: HomeAssistant, manager):
         await manager.bulk_exclude_domains(domains, recorder_exclude, recorder_days)
 
     # NEW DOMAIN RECORDER DAYS HANDLERS
+    @timed("service.update_domain_recorder_days")
     async def handle_update_domain_recorder_days(call: ServiceCall):
         await manager.update_domain_recorder_days(call.data[ATTR_DOMAIN], call.data[ATTR_DOMAIN_RECORDER_DAYS])
     
+    @timed("service.bulk_update_domain_recorder_days")
     async def handle_bulk_update_domain_recorder_days(call: ServiceCall):
         await manager.bulk_update_domain_recorder_days(call.data[ATTR_DOMAINS], call.data[ATTR_DOMAIN_RECORDER_DAYS])
 
+    @timed("service.downsample_history")
+    async def handle_downsample_history(call: ServiceCall):
+        await manager.downsample_history(call.data.get(ATTR_ENTITY_IDS), call.data[ATTR_MAX_RECORDER_DAYS])
+
+    @timed("service.run_maintenance")
+    async def handle_run_maintenance(call: ServiceCall):
+        await manager.scheduler.async_run(call.data.get(ATTR_FORCE, False))
+
+    @timed("service.import_recorder_config")
+    async def handle_import_recorder_config(call: ServiceCall):
+        await manager.import_recorder_config(call.data[ATTR_OVERWRITE], call.data[ATTR_DRY_RUN])
+
+    @timed("service.set_retention_policies")
+    async def handle_set_retention_policies(call: ServiceCall):
+        await manager.set_retention_policies(call.data[ATTR_POLICIES])
+
+    @timed("service.batch")
+    async def handle_batch(call: ServiceCall):
+        result = await manager.apply_batch(call.data[ATTR_OPERATIONS])
+        if result["status"] != "success":
+            raise HomeAssistantError(
+                "; ".join(f"operation {error.get('index')}: {error['error']}" for error in result["errors"])
+            )
+
     # Register existing services
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE_ENTITY_STATE, handle_update_entity_state, UPDATE_ENTITY_STATE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE_RECORDER_DAYS, handle_update_recorder_days, UPDATE_RECORDER_DAYS_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_BULK_UPDATE, handle_bulk_update, BULK_UPDATE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_DELETE_ENTITY, handle_delete_entity, DELETE_ENTITY_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_BULK_DELETE, handle_bulk_delete, BULK_DELETE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_PURGE_RECORDER, handle_purge_recorder, PURGE_RECORDER_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_RELOAD_CONFIG, handle_reload_config)
-    hass.services.async_register(DOMAIN, SERVICE_INTELLIGENT_PURGE, handle_intelligent_purge, INTELLIGENT_PURGE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_GENERATE_RECORDER_REPORT, handle_generate_recorder_report, GENERATE_RECORDER_REPORT_SCHEMA)
+    _register(SERVICE_UPDATE_ENTITY_STATE, handle_update_entity_state, UPDATE_ENTITY_STATE_SCHEMA)
+    _register(SERVICE_UPDATE_RECORDER_DAYS, handle_update_recorder_days, UPDATE_RECORDER_DAYS_SCHEMA)
+    _register(SERVICE_BULK_UPDATE, handle_bulk_update, BULK_UPDATE_SCHEMA)
+    _register(SERVICE_DELETE_ENTITY, handle_delete_entity, DELETE_ENTITY_SCHEMA)
+    _register(SERVICE_BULK_DELETE, handle_bulk_delete, BULK_DELETE_SCHEMA)
+    _register(SERVICE_PURGE_RECORDER, handle_purge_recorder, PURGE_RECORDER_SCHEMA)
+    _register(SERVICE_RELOAD_CONFIG, handle_reload_config)
+    _register(SERVICE_INTELLIGENT_PURGE, handle_intelligent_purge, INTELLIGENT_PURGE_SCHEMA)
+    _register(SERVICE_GENERATE_RECORDER_REPORT, handle_generate_recorder_report, GENERATE_RECORDER_REPORT_SCHEMA)
     
     # Register existing services
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE_RECORDER_EXCLUDE, handle_update_recorder_exclude, UPDATE_RECORDER_EXCLUDE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_BULK_UPDATE_RECORDER_EXCLUDE, handle_bulk_update_recorder_exclude, BULK_UPDATE_RECORDER_EXCLUDE_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE_RECORDER_CONFIG, handle_update_recorder_config, UPDATE_RECORDER_CONFIG_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_PURGE_ALL_ENTITIES, handle_purge_all_entities, PURGE_ALL_ENTITIES_SCHEMA)
+    _register(SERVICE_UPDATE_RECORDER_EXCLUDE, handle_update_recorder_exclude, UPDATE_RECORDER_EXCLUDE_SCHEMA)
+    _register(SERVICE_BULK_UPDATE_RECORDER_EXCLUDE, handle_bulk_update_recorder_exclude, BULK_UPDATE_RECORDER_EXCLUDE_SCHEMA)
+    _register(SERVICE_UPDATE_RECORDER_CONFIG, handle_update_recorder_config, UPDATE_RECORDER_CONFIG_SCHEMA)
+    _register(SERVICE_PURGE_ALL_ENTITIES, handle_purge_all_entities, PURGE_ALL_ENTITIES_SCHEMA)
     
     # Register UPDATED domain services
-    hass.services.async_register(DOMAIN, SERVICE_EXCLUDE_DOMAIN, handle_exclude_domain, EXCLUDE_DOMAIN_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_INCLUDE_DOMAIN, handle_include_domain, INCLUDE_DOMAIN_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_BULK_EXCLUDE_DOMAINS, handle_bulk_exclude_domains, BULK_EXCLUDE_DOMAINS_SCHEMA)
+    _register(SERVICE_EXCLUDE_DOMAIN, handle_exclude_domain, EXCLUDE_DOMAIN_SCHEMA)
+    _register(SERVICE_INCLUDE_DOMAIN, handle_include_domain, INCLUDE_DOMAIN_SCHEMA)
+    _register(SERVICE_BULK_EXCLUDE_DOMAINS, handle_bulk_exclude_domains, BULK_EXCLUDE_DOMAINS_SCHEMA)
     
     # Register NEW domain recorder days services
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE_DOMAIN_RECORDER_DAYS, handle_update_domain_recorder_days, UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS, handle_bulk_update_domain_recorder_days, BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA)
+    _register(SERVICE_UPDATE_DOMAIN_RECORDER_DAYS, handle_update_domain_recorder_days, UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA)
+    _register(SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS, handle_bulk_update_domain_recorder_days, BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA)
+
+    # Register history downsampling service
+    _register(SERVICE_DOWNSAMPLE_HISTORY, handle_downsample_history, DOWNSAMPLE_HISTORY_SCHEMA)
+    _register(SERVICE_RUN_MAINTENANCE, handle_run_maintenance, RUN_MAINTENANCE_SCHEMA)
+    _register(SERVICE_IMPORT_RECORDER_CONFIG, handle_import_recorder_config, IMPORT_RECORDER_CONFIG_SCHEMA)
+    _register(SERVICE_SET_RETENTION_POLICIES, handle_set_retention_policies, SET_RETENTION_POLICIES_SCHEMA)
+    _register(SERVICE_BATCH, handle_batch, BATCH_SCHEMA)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -247,15 +362,30 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         SERVICE_INTELLIGENT_PURGE, SERVICE_GENERATE_RECORDER_REPORT, SERVICE_UPDATE_RECORDER_EXCLUDE,
         SERVICE_BULK_UPDATE_RECORDER_EXCLUDE, SERVICE_UPDATE_RECORDER_CONFIG, SERVICE_PURGE_ALL_ENTITIES,
         SERVICE_EXCLUDE_DOMAIN, SERVICE_INCLUDE_DOMAIN, SERVICE_BULK_EXCLUDE_DOMAINS,
-        SERVICE_UPDATE_DOMAIN_RECORDER_DAYS, SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS
+        SERVICE_UPDATE_DOMAIN_RECORDER_DAYS, SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS,
+        SERVICE_DOWNSAMPLE_HISTORY, SERVICE_RUN_MAINTENANCE, SERVICE_IMPORT_RECORDER_CONFIG,
+        SERVICE_SET_RETENTION_POLICIES, SERVICE_BATCH,
     ]
     
     for service in services_to_remove:
         hass.services.async_remove(DOMAIN, service)
+    async_remove_panel(hass)
     
     unload_ok = await hass.config_entries.async_forward_entry_unload(entry, "sensor")
     if unload_ok:
-        hass.data.pop(DOMAIN, None)
+        manager = hass.data.pop(DOMAIN, None)
+        if manager:
+            manager.scheduler.async_stop()
+            manager.growth.async_stop()
+            manager.stats.async_stop()
+            manager.snapshot_json.async_stop()
+            manager.search_index.async_stop()
+            manager.async_stop_policy_tracking()
+            manager.async_stop_nightly_downsample()
+            manager.lookups.async_stop()
+            await hass.async_add_executor_job(manager.history_store.close)
+        metrics.enabled = False
+        metrics.reset()
     return unload_ok
 
 
@@ -269,158 +399,425 @@ class EntityManager:
         self._domain_config: Dict[str, Any] = {}
         self._config_path = hass.config.path("custom_components", DOMAIN, CONFIG_FILE)
         self._domain_config_path = hass.config.path("custom_components", DOMAIN, DOMAIN_CONFIG_FILE)
-        self._config_lock = False  # Simple lock to prevent concurrent access
+        self._policy_path = hass.config.path("custom_components", DOMAIN, POLICY_CONFIG_FILE)
+        self._policies: List[Dict[str, Any]] = []
+        self._policy_matcher = PolicyMatcher([])
+        # entity_id -> settings of its first matching policy ({} if none); None when stale
+        self._policy_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._policy_unsubs: List[Callable[[], None]] = []
+        self._unsub_nightly_downsample: Optional[Callable[[], None]] = None
+        self._config_lock = asyncio.Lock()  # Serializes config file saves and batches
+        self.history_store = HistoryStore(hass.config.path(HISTORY_STORE_FILE))
+        self.scheduler: Optional[MaintenanceScheduler] = None
+        self.growth: Optional[DatabaseGrowthTracker] = None
+        self.stats: Optional[EntityStatsTracker] = None
+        self.lookups = RegistryLookupCache(hass)
+        self.search_index = EntitySearchIndex(hass, self.lookups)
+        self.snapshot_json = SerializedSnapshot(hass, self.get_entity_row)
+        self.max_recorder_backlog = DEFAULT_MAX_RECORDER_BACKLOG
+        # Last recorder.yaml content written, to skip unchanged regenerations,
+        # and the (mtime_ns, size) of the file it was read from or written to
+        self._written_recorder_config: Optional[Dict[str, Any]] = None
+        self._written_recorder_config_hash: Optional[str] = None
+        self._written_recorder_config_stat: Optional[Tuple[int, int]] = None
+        # Config files are loaded once, after Home Assistant started or on first use
+        self._load_task: Optional[asyncio.Task] = None
+        # Indexes are built once, after Home Assistant started or on first use
+        self._start_task: Optional[asyncio.Task] = None
+        self.startup_timings: Dict[str, float] = {}
 
+    @timed("file.load_config")
     def _load_config_sync(self) -> Dict[str, Any]:
         """Loads the config file synchronously."""
         if not os.path.exists(self._config_path):
             return {}
         try:
-            with open(self._config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            return read_json_file(self._config_path)
+        except (JSONDecodeError, IOError) as e:
             _LOGGER.error("Could not read or decode entity manager config file: %s", e)
             return {}
 
+    @timed("file.save_config")
     def _save_config_sync(self) -> None:
         """Saves the config file synchronously."""
         try:
             os.makedirs(os.path.dirname(self._config_path), exist_ok=True)
-            with open(self._config_path, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, indent=2, ensure_ascii=False)
+            write_json_file(self._config_path, self._config)
         except IOError as e:
             _LOGGER.error("Could not write to entity manager config file: %s", e)
 
+    @timed("file.load_domain_config")
     def _load_domain_config_sync(self) -> Dict[str, Any]:
         """Loads the domain config file synchronously."""
         if not os.path.exists(self._domain_config_path):
             return {}
         try:
-            with open(self._domain_config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            return read_json_file(self._domain_config_path)
+        except (JSONDecodeError, IOError) as e:
             _LOGGER.error("Could not read or decode domain config file: %s", e)
             return {}
 
+    @timed("file.save_domain_config")
     def _save_domain_config_sync(self) -> None:
         """Saves the domain config file synchronously."""
         try:
             os.makedirs(os.path.dirname(self._domain_config_path), exist_ok=True)
-            with open(self._domain_config_path, 'w', encoding='utf-8') as f:
-                json.dump(self._domain_config, f, indent=2, ensure_ascii=False)
+            write_json_file(self._domain_config_path, self._domain_config)
         except IOError as e:
             _LOGGER.error("Could not write to domain config file: %s", e)
 
+    @timed("file.load_policies")
+    def _load_policies_sync(self) -> List[Dict[str, Any]]:
+        """Loads the retention policy file synchronously."""
+        if not os.path.exists(self._policy_path):
+            return []
+        try:
+            return read_json_file(self._policy_path)
+        except (JSONDecodeError, IOError) as e:
+            _LOGGER.error("Could not read or decode retention policy file: %s", e)
+            return []
+
+    @timed("file.save_policies")
+    def _save_policies_sync(self) -> None:
+        """Saves the retention policy file synchronously."""
+        try:
+            os.makedirs(os.path.dirname(self._policy_path), exist_ok=True)
+            write_json_file(self._policy_path, self._policies, pretty=True)
+        except IOError as e:
+            _LOGGER.error("Could not write to retention policy file: %s", e)
+
+    async def async_ensure_loaded(self) -> None:
+        """Load the config files unless done already; concurrent callers share one load."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self.load_config())
+        await self._load_task
+
+    async def async_start(self, hass: Optional[HomeAssistant] = None) -> None:
+        """Load the configuration and build the in-memory indexes.
+
+        Called once Home Assistant has started, so that neither delays boot.
+        """
+        await self.async_ensure_started()
+
+    async def async_ensure_started(self) -> None:
+        """Start unless done already; concurrent callers share one start.
+
+        Requests served from the indexes (entity list, search, statistics)
+        wait on this, so one arriving before Home Assistant has started
+        builds them early instead of reading empty indexes.
+        """
+        if self._start_task is None:
+            self._start_task = self.hass.async_create_task(self._async_start())
+        await self._start_task
+
+    async def _async_start(self) -> None:
+        """Load the configuration and build the in-memory indexes (once)."""
+        start = time.monotonic()
+        await self.async_ensure_loaded()
+        loaded = time.monotonic()
+
+        self.lookups.async_start()
+        self._policy_cache = None
+        self.async_start_policy_tracking()
+        self.async_start_nightly_downsample()
+        self.stats.async_start()
+        self.search_index.async_start()
+        self.snapshot_json.async_start()
+        self.scheduler.async_start()
+        if "recorder" in self.hass.config.components:
+            await self.growth.async_start()
+
+        self.startup_timings["load_config"] = round(loaded - start, 3)
+        self.startup_timings["build_indexes"] = round(time.monotonic() - loaded, 3)
+        _LOGGER.info(
+            "Entity Manager started: setup %.3fs, config load %.3fs, indexes %.3fs",
+            self.startup_timings.get("setup", 0.0),
+            self.startup_timings["load_config"],
+            self.startup_timings["build_indexes"],
+        )
+
     async def load_config(self):
         """Load configuration from files asynchronously."""
-        if self._config_lock:
+        if self._config_lock.locked():
             _LOGGER.warning("Config is locked, waiting...")
             return
         self._config = await self.hass.async_add_executor_job(self._load_config_sync)
         self._domain_config = await self.hass.async_add_executor_job(self._load_domain_config_sync)
+        policies = await self.hass.async_add_executor_job(self._load_policies_sync)
+        try:
+            self._set_policies(policies)
+        except (ValueError, KeyError, TypeError) as e:
+            _LOGGER.error("Ignoring invalid retention policies: %s", e)
+            self._set_policies([])
+        async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
 
     async def save_config(self):
-        """Save configuration to file asynchronously."""
-        if self._config_lock:
-            _LOGGER.warning("Config is locked, skipping save...")
-            return
-        await self.hass.async_add_executor_job(self._save_config_sync)
+        """Save configuration to file asynchronously, after any save or batch in progress."""
+        async with self._config_lock:
+            await self.hass.async_add_executor_job(self._save_config_sync)
+        async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
 
     async def save_domain_config(self):
-        """Save domain configuration to file asynchronously."""
-        if self._config_lock:
-            _LOGGER.warning("Config is locked, skipping domain save...")
-            return
-        await self.hass.async_add_executor_job(self._save_domain_config_sync)
+        """Save domain configuration to file asynchronously, after any save or batch in progress."""
+        async with self._config_lock:
+            await self.hass.async_add_executor_job(self._save_domain_config_sync)
+        async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
 
-    async def get_all_entities(self) -> List[Dict[str, Any]]:
-        """Get all entities with their configurations and integration info."""
+    async def save_policies(self):
+        """Save retention policies to file asynchronously."""
+        await self.hass.async_add_executor_job(self._save_policies_sync)
+        async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
+
+    def _set_policies(self, policies: List[Dict[str, Any]]) -> None:
+        """Compile and activate retention policies; raises ValueError if invalid."""
+        self._policy_matcher = PolicyMatcher(policies)
+        self._policies = policies
+        self._policy_cache = None
+
+    async def set_retention_policies(self, policies: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Replace the ordered retention policies."""
+        try:
+            self._set_policies(list(policies))
+        except ValueError as e:
+            raise HomeAssistantError(str(e)) from e
+        await self.save_policies()
+        matched = sum(1 for policy in self._policy_settings().values() if policy)
+        _LOGGER.info("Retention policies updated: %d rules matching %d entities", len(policies), matched)
+        return {"status": "success", "policies": len(policies), "matched_entities": matched}
+
+    def get_retention_policies(self) -> List[Dict[str, Any]]:
+        """Return the retention policies with the number of entities each one resolves."""
+        counts: Dict[int, int] = {}
+        for policy in self._policy_settings().values():
+            if policy:
+                counts[policy["policy"]] = counts.get(policy["policy"], 0) + 1
+        return [{**policy, "matched_entities": counts.get(index, 0)} for index, policy in enumerate(self._policies)]
+
+    def _policy_attributes(self, entry: RegistryEntry) -> Dict[str, Optional[str]]:
+        """Return the attributes exact-match policies are evaluated against."""
+        return {
+            "integration": self.lookups.integration(entry.config_entry_id),
+            "platform": entry.platform,
+            "device_class": entry.device_class or entry.original_device_class,
+            "area": self.lookups.entity_area(entry),
+        }
+
+    def _match_policy(self, entity_id: str, attributes: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """Return the settings of the first policy matching an entity, or {}."""
+        index = self._policy_matcher.match(entity_id, attributes)
+        return {} if index is None else self._policy_matcher.settings(index)
+
+    def _policy_settings(self) -> Dict[str, Dict[str, Any]]:
+        """Return the policy settings of every known entity, evaluating all of them in one pass if stale."""
+        if self._policy_cache is None:
+            cache: Dict[str, Dict[str, Any]] = {}
+            if self._policies:
+                entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
+                for entity_id, entry in entity_registry.entities.items():
+                    cache[entity_id] = self._match_policy(entity_id, self._policy_attributes(entry))
+                for state in self.hass.states.async_all():
+                    if state.entity_id not in cache:
+                        cache[state.entity_id] = self._match_policy(state.entity_id, {"device_class": state.attributes.get("device_class")})
+            self._policy_cache = cache
+        return self._policy_cache
+
+    def _entity_policy(self, entity_id: str) -> Dict[str, Any]:
+        """Return the cached policy settings of one entity."""
+        if not self._policies:
+            return {}
+        cache = self._policy_settings()
+        policy = cache.get(entity_id)
+        if policy is None:
+            # Entity without registry entry that appeared after the last evaluation
+            policy = cache[entity_id] = self._match_policy(entity_id, {})
+        return policy
+
+    @callback
+    def async_start_policy_tracking(self) -> None:
+        """Keep the policy cache in sync with entity and device registry changes."""
+
+        @callback
+        def _async_entity_registry_updated(event: Event) -> None:
+            if not self._policies or self._policy_cache is None:
+                return
+            self._policy_cache.pop(event.data.get("old_entity_id"), None)
+            entity_id = event.data["entity_id"]
+            self._policy_cache.pop(entity_id, None)
+            if event.data["action"] != "remove":
+                entry = async_get_entity_registry(self.hass).async_get(entity_id)
+                if entry is not None:
+                    self._policy_cache[entity_id] = self._match_policy(entity_id, self._policy_attributes(entry))
+
+        @callback
+        def _async_device_registry_updated(event: Event) -> None:
+            # A device area change can move many entities between area policies
+            if self._policies and self._policy_cache is not None:
+                self._policy_cache = None
+                async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
+
+        self._policy_unsubs = [
+            self.hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, _async_entity_registry_updated),
+            self.hass.bus.async_listen(EVENT_DEVICE_REGISTRY_UPDATED, _async_device_registry_updated),
+        ]
+
+    @callback
+    def async_stop_policy_tracking(self) -> None:
+        """Stop tracking registry changes."""
+        for unsub in self._policy_unsubs:
+            unsub()
+        self._policy_unsubs = []
+
+    def _effective_entity_config(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-entity settings with policy results filled in below explicit entity settings."""
+        effective: Dict[str, Dict[str, Any]] = {}
+        for entity_id, policy in self._policy_settings().items():
+            settings = {key: value for key, value in policy.items() if key != "policy"}
+            if settings:
+                effective[entity_id] = settings
+        for entity_id, config in self._config.items():
+            effective[entity_id] = {**effective.get(entity_id, {}), **config}
+        return effective
+
+    def _resolve_recorder_settings(self, entity_id: str, domain: Optional[str] = None) -> Tuple[int, bool]:
+        """Return (recorder_days, recorder_exclude) - priority: entity > policy > domain > default."""
+        config = self._config.get(entity_id, {})
+        policy = self._entity_policy(entity_id)
+        domain_config = self._domain_config.get(domain or entity_id.split('.')[0], {})
+
+        recorder_days = config.get("recorder_days") or policy.get("recorder_days") or domain_config.get("recorder_days", DEFAULT_RECORDER_DAYS)
+        recorder_exclude = config.get("recorder_exclude")
+        if recorder_exclude is None:
+            recorder_exclude = policy.get("recorder_exclude")
+        if recorder_exclude is None:
+            recorder_exclude = domain_config.get("recorder_exclude", False)
+        return recorder_days, recorder_exclude
+
+    def _registry_entity_row(self, entity_entry: RegistryEntry) -> EntityRow:
+        """Build the entity list row of a registry entity."""
+        entity_id = entity_entry.entity_id
+        domain = entity_id.split('.')[0]
+        
+        # Determine if enabled
+        is_enabled = not entity_entry.disabled_by
+        
+        # Try to get current state
+        state_obj = self.hass.states.get(entity_id)
+        
+        if state_obj:
+            entity_name = state_obj.name or entity_id
+            entity_state = state_obj.state
+        else:
+            entity_name = entity_entry.name or entity_entry.original_name or entity_id
+            entity_state = "disabled" if not is_enabled else "unavailable"
+        
+        # Determine platform and integration domain
+        platform = entity_entry.platform or "unknown"
+        integration_domain = self.lookups.integration(entity_entry.config_entry_id) or "homeassistant"
+        
+        device_name, manufacturer, model, device_area_id = self.lookups.device(entity_entry.device_id)
+        area_id = entity_entry.area_id or device_area_id
+
+        recorder_days, recorder_exclude = self._resolve_recorder_settings(entity_id, domain)
+
+        return EntityRow(
+            entity_id,
+            entity_name,
+            entity_state,
+            domain,
+            platform,
+            integration_domain,
+            area_id,
+            self.lookups.area_name(area_id),
+            entity_entry.device_id,
+            device_name,
+            manufacturer,
+            model,
+            is_enabled,
+            recorder_days,
+            recorder_exclude,
+            self._entity_policy(entity_id).get("policy"),
+        )
+
+    def _state_entity_row(self, state) -> EntityRow:
+        """Build the entity list row of an entity that only exists as a state."""
+        entity_id = state.entity_id
+        domain = state.domain
+        recorder_days, recorder_exclude = self._resolve_recorder_settings(entity_id, domain)
+        
+        return EntityRow(
+            entity_id,
+            state.name or entity_id,
+            state.state,
+            domain,
+            "unknown",
+            "homeassistant",
+            None,
+            None,
+            None,
+            None,
+            None,
+            None,
+            True,
+            recorder_days,
+            recorder_exclude,
+            self._entity_policy(entity_id).get("policy"),
+        )
+
+    @timed("entities.snapshot")
+    def get_entity_snapshot(self) -> List[EntityRow]:
+        """Return the rows of all entities with their configurations and integration info."""
         entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
-        entities = []
 
         # Create a copy of registry entities to avoid modification during iteration
         registry_entities = dict(entity_registry.entities)
 
         # Process registry entities
-        for entity_entry in registry_entities.values():
-            entity_id = entity_entry.entity_id
-            config = self._config.get(entity_id, {})
-            domain = entity_id.split('.')[0]
-            domain_config = self._domain_config.get(domain, {})
-            
-            # Determine if enabled
-            is_enabled = not entity_entry.disabled_by
-            
-            # Try to get current state
-            state_obj = self.hass.states.get(entity_id)
-            
-            if state_obj:
-                entity_name = state_obj.name or entity_id
-                entity_state = state_obj.state
-            else:
-                entity_name = entity_entry.name or entity_entry.original_name or entity_id
-                entity_state = "disabled" if not is_enabled else "unavailable"
-            
-            # Determine platform and integration domain
-            platform = entity_entry.platform or "unknown"
-            integration_domain = "homeassistant"
-            
-            if entity_entry.config_entry_id:
-                config_entry = self.hass.config_entries.async_get_entry(entity_entry.config_entry_id)
-                if config_entry:
-                    integration_domain = config_entry.domain
-
-            # Determine recorder settings - priority: entity > domain > default
-            recorder_days = config.get("recorder_days") or domain_config.get("recorder_days", DEFAULT_RECORDER_DAYS)
-            recorder_exclude = config.get("recorder_exclude")
-            if recorder_exclude is None:
-                recorder_exclude = domain_config.get("recorder_exclude", False)
-
-            entities.append({
-                "entity_id": entity_id,
-                "name": entity_name,
-                "state": entity_state,
-                "domain": domain,
-                "platform": platform,
-                "integration_domain": integration_domain,
-                "enabled": is_enabled,
-                "recorder_days": recorder_days,
-                "recorder_exclude": recorder_exclude,
-            })
+        entities = [self._registry_entity_row(entity_entry) for entity_entry in registry_entities.values()]
 
         # Add entities from states that are not in registry
-        registry_entity_ids = set(registry_entities.keys())
-        all_states = self.hass.states.async_all()
-        
-        for state in all_states:
-            entity_id = state.entity_id
-            if entity_id not in registry_entity_ids:
-                config = self._config.get(entity_id, {})
-                domain = state.domain
-                domain_config = self._domain_config.get(domain, {})
-                
-                # Determine recorder settings - priority: entity > domain > default
-                recorder_days = config.get("recorder_days") or domain_config.get("recorder_days", DEFAULT_RECORDER_DAYS)
-                recorder_exclude = config.get("recorder_exclude")
-                if recorder_exclude is None:
-                    recorder_exclude = domain_config.get("recorder_exclude", False)
-                
-                entities.append({
-                    "entity_id": entity_id,
-                    "name": state.name or entity_id,
-                    "state": state.state,
-                    "domain": domain,
-                    "platform": "unknown",
-                    "integration_domain": "homeassistant",
-                    "enabled": True,
-                    "recorder_days": recorder_days,
-                    "recorder_exclude": recorder_exclude,
-                })
+        for state in self.hass.states.async_all():
+            if state.entity_id not in registry_entities:
+                entities.append(self._state_entity_row(state))
 
         # Sort for consistency
-        entities.sort(key=lambda x: x["entity_id"])
+        entities.sort(key=attrgetter("entity_id"))
         
         return entities
+
+    async def get_all_entities(self) -> List[Dict[str, Any]]:
+        """Get all entities with their configurations and integration info."""
+        return [row.as_dict() for row in self.get_entity_snapshot()]
+
+    def get_entity_row(self, entity_id: str) -> Optional[EntityRow]:
+        """Return the row of one entity, or None if it is unknown."""
+        entity_entry = async_get_entity_registry(self.hass).async_get(entity_id)
+        if entity_entry is not None:
+            return self._registry_entity_row(entity_entry)
+        if (state := self.hass.states.get(entity_id)) is not None:
+            return self._state_entity_row(state)
+        return None
+
+    def get_entities(self, entity_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the rows of the given entities, in the given order."""
+        rows = (self.get_entity_row(entity_id) for entity_id in entity_ids)
+        return [row.as_dict() for row in rows if row is not None]
+
+    def get_entities_json(self) -> bytes:
+        """Return all entities as JSON bytes, reusing rows serialized before."""
+        return self.snapshot_json.body()
+
+    def get_entity_changes_json(self, since: Optional[str]) -> bytes:
+        """Return the entities changed after revision ``since`` as JSON bytes."""
+        return self.snapshot_json.changes(since)
+
+    def search_entities(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Return the entity rows best matching ``query``, with their score."""
+        matches = self.search_index.search(query, limit)
+        entities = self.get_entities([entity_id for entity_id, _ in matches])
+        scores = dict(matches)
+        for entity in entities:
+            entity["score"] = scores[entity["entity_id"]]
+        return entities
     
     async def update_entity_state(self, entity_id: str, enabled: bool):
         """Update entity enabled state."""
@@ -461,34 +858,23 @@ class EntityManager:
         
         _LOGGER.info("Starting bulk update recorder exclude for %d entities: %s", len(entity_ids_copy), recorder_exclude)
         
-        # Lock config to prevent concurrent modifications
-        self._config_lock = True
+        # Process all entities at once to avoid multiple saves
+        for entity_id in entity_ids_copy:
+            if entity_id not in self._config:
+                self._config[entity_id] = {}
+            self._config[entity_id]["recorder_exclude"] = recorder_exclude
+            _LOGGER.debug("Updated recorder exclude for %s: %s", entity_id, recorder_exclude)
         
-        try:
-            # Process all entities at once to avoid multiple saves
-            for entity_id in entity_ids_copy:
-                if entity_id not in self._config:
-                    self._config[entity_id] = {}
-                self._config[entity_id]["recorder_exclude"] = recorder_exclude
-                _LOGGER.debug("Updated recorder exclude for %s: %s", entity_id, recorder_exclude)
-            
-            # Save config only once at the end
-            await self.save_config()
-            
-        finally:
-            self._config_lock = False
+        # Save config only once at the end
+        await self.save_config()
         
         _LOGGER.info("Bulk updated recorder exclude for %d entities: %s", len(entity_ids_copy), recorder_exclude)
     
     async def bulk_update(self, entity_ids: List[str], enabled: Optional[bool] = None, recorder_days: Optional[int] = None):
-        """Bulk update entities."""
-        entity_ids_copy = list(entity_ids)  # Avoid iteration issues
-        
-        for entity_id in entity_ids_copy:
-            if enabled is not None:
-                await self.update_entity_state(entity_id, enabled)
-            if recorder_days is not None:
-                await self.update_recorder_days(entity_id, recorder_days)
+        """Bulk update entities with one save and one registry pass."""
+        await self._async_run_batch([
+            {ATTR_ACTION: SERVICE_BULK_UPDATE, ATTR_ENTITY_IDS: list(entity_ids), ATTR_ENABLED: enabled, ATTR_RECORDER_DAYS: recorder_days},
+        ])
     
     async def delete_entity(self, entity_id: str):
         """Delete entity from Home Assistant."""
@@ -500,10 +886,84 @@ class EntityManager:
             await self.save_config()
     
     async def bulk_delete(self, entity_ids: List[str]):
-        """Bulk delete entities."""
-        entity_ids_copy = list(entity_ids)  # Avoid iteration issues
-        for entity_id in entity_ids_copy:
-            await self.delete_entity(entity_id)
+        """Bulk delete entities with one save."""
+        await self._async_run_batch([{ATTR_ACTION: SERVICE_BULK_DELETE, ATTR_ENTITY_IDS: list(entity_ids)}])
+    
+    def _new_batch(self) -> ConfigBatch:
+        """Return a batch on copies of the current configuration."""
+        by_domain: Optional[Dict[str, List[str]]] = None
+
+        def _domain_entities(domain: str) -> List[str]:
+            nonlocal by_domain
+            if by_domain is None:
+                by_domain = {}
+                for row in self.get_entity_snapshot():
+                    by_domain.setdefault(row.domain, []).append(row.entity_id)
+            return by_domain.get(domain, [])
+
+        return ConfigBatch(self._config, self._domain_config, _domain_entities)
+
+    @timed("file.save_batch")
+    def _save_batch_sync(self, config_changed: bool, domain_config_changed: bool) -> None:
+        """Saves the config files changed by a batch synchronously."""
+        if config_changed:
+            self._save_config_sync()
+        if domain_config_changed:
+            self._save_domain_config_sync()
+
+    async def _async_run_batch(self, operations: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Apply validated operations to a new batch and commit it.
+
+        _config_lock is held from copying the configuration until it is saved,
+        so no change made or saved meanwhile by another call is lost: those
+        wait for the lock, then act on the batch's configuration.
+        Returns the operation results and the number of registry updates.
+        """
+        async with self._config_lock:
+            batch = self._new_batch()
+            results = [batch.apply(operation) for operation in operations]
+            return results, await self._async_commit_batch(batch)
+
+    async def _async_commit_batch(self, batch: ConfigBatch) -> int:
+        """Make the batch's configuration live, save it and apply its registry changes.
+
+        Must be called with _config_lock held. Returns the number of registry
+        entries updated or removed.
+        """
+        if batch.config_changed or batch.domain_config_changed:
+            self._config = batch.config
+            self._domain_config = batch.domain_config
+            await self.hass.async_add_executor_job(self._save_batch_sync, batch.config_changed, batch.domain_config_changed)
+            async_dispatcher_send(self.hass, SIGNAL_CONFIG_UPDATED)
+
+        entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
+        disable_value = RegistryEntryDisabler.USER if HAS_REGISTRY_ENTRY_DISABLER else "user"
+        updated = 0
+        for entity_id, change in batch.registry_changes.items():
+            if not entity_registry.async_get(entity_id):
+                continue
+            if change == REMOVE:
+                entity_registry.async_remove(entity_id)
+            else:
+                entity_registry.async_update_entity(entity_id, disabled_by=None if change else disable_value)
+            updated += 1
+        return updated
+
+    async def apply_batch(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply an ordered list of configuration operations as one transaction.
+
+        Every operation is validated before any is applied; if one is invalid
+        nothing changes and all the errors are returned. Otherwise they are
+        applied in order to copies of the configuration, which replace it
+        with one save, followed by one pass over the entity registry.
+        """
+        validated, errors = validate_operations(operations)
+        if errors:
+            return {"status": "error", "applied": 0, "errors": errors}
+
+        results, registry_updates = await self._async_run_batch(validated)
+        _LOGGER.info("Applied batch of %d operations (%d registry updates)", len(results), registry_updates)
+        return {"status": "success", "applied": len(results), "registry_updates": registry_updates, "results": results}
     
     # NEW DOMAIN MANAGEMENT FUNCTIONS WITH RECORDER DAYS SUPPORT
     async def update_domain_recorder_days(self, domain: str, recorder_days: int):
@@ -543,8 +1003,7 @@ class EntityManager:
         
         # Optional: Also update individual entities if you want to override domain settings
         # Get all entities from the domain
-        entities = await self.get_all_entities()
-        domain_entities = [e["entity_id"] for e in entities if e["domain"] == domain]
+        domain_entities = [row.entity_id for row in self.get_entity_snapshot() if row.domain == domain]
         
         if domain_entities:
             # Clear individual entity overrides to let domain config take precedence
@@ -575,8 +1034,34 @@ class EntityManager:
         for domain in domains_copy:
             await self.exclude_domain(domain, recorder_exclude, recorder_days)
     
+    @timed("file.load_written_recorder_config")
+    def _load_written_recorder_config(self, recorder_yaml_path: str) -> Optional[Dict[str, Any]]:
+        """Return the recorder config currently in recorder.yaml, or None if there is none."""
+        if not os.path.exists(recorder_yaml_path):
+            return None
+        return self._load_yaml_file(recorder_yaml_path)
+
+    @staticmethod
+    def _file_stat(path: str) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of a file, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     async def update_recorder_config(self, backup_config: bool = True) -> Dict[str, Any]:
-        """Update recorder.yaml with complete domain and entity configuration."""
+        """Update recorder.yaml with complete domain and entity configuration.
+
+        The file is only rewritten when the content hash of the generated
+        configuration differs from the last written one. That hash is kept in
+        memory while the file's mtime and size are unchanged; after a restart,
+        or when the file was edited or deleted, it is read from the file again.
+        """
+        import shutil
+
+        from .recorder_config import build_recorder_config, diff_recorder_config, recorder_config_hash
+
         result = {"status": "success", "message": "", "excluded_entities": [], "excluded_domains": [], "domain_configs": {}}
         
         try:
@@ -584,104 +1069,78 @@ class EntityManager:
             config_yaml_path = self.hass.config.path(RECORDER_CONFIG_PATH)
             recorder_backup_path = self.hass.config.path(RECORDER_YAML_BACKUP_PATH)
             
-            # Make backup if requested
-            if backup_config and os.path.exists(recorder_yaml_path):
-                await self.hass.async_add_executor_job(shutil.copy2, recorder_yaml_path, recorder_backup_path)
-                _LOGGER.info("Backup created: %s", recorder_backup_path)
+            # No 'recorder:' wrapper since it's included via !include
+            entity_registry = async_get_entity_registry(self.hass)
+            recorder_config = build_recorder_config(self._effective_entity_config(), self._domain_config, entity_registry.entities.keys())
+            config_hash = recorder_config_hash(recorder_config)
             
-            # Get all entities to understand current state
-            entities = await self.get_all_entities()
-            
-            # Create recorder configuration - FIXED: No 'recorder:' wrapper since it's included via !include
-            recorder_config = {
-                "db_url": "sqlite:///home-assistant_v2.db",  # User should customize
-                "purge_keep_days": 10,  # Default - user should customize
-                "commit_interval": 1,
-                "auto_purge": True,
-                "auto_repack": True
-            }
-            
-            # Process domain exclusions
-            excluded_domains = []
-            domain_include_configs = {}
-            
-            for domain, domain_config in self._domain_config.items():
-                if domain_config.get("recorder_exclude", False):
-                    excluded_domains.append(domain)
-                else:
-                    # Domain is included, check if it has custom recorder days
-                    recorder_days = domain_config.get("recorder_days")
-                    if recorder_days is not None and recorder_days != DEFAULT_RECORDER_DAYS:
-                        domain_include_configs[domain] = {"purge_keep_days": recorder_days}
-            
-            # Process individual entity exclusions (only for entities not in excluded domains)
-            excluded_entities = []
-            individual_entity_configs = {}
+            exclude_section = recorder_config.get("exclude", {})
+            include_section = recorder_config.get("include", {})
+            excluded_domains = exclude_section.get("domains", [])
+            excluded_entities = exclude_section.get("entities", [])
+            excluded_globs = exclude_section.get("entity_globs", [])
+            domain_include_configs = include_section.get("domains", {})
+            individual_entity_configs = include_section.get("entities", {})
             
-            for entity_id, config in self._config.items():
-                domain = entity_id.split('.')[0]
-                
-                # Skip if domain is fully excluded
-                if domain in excluded_domains:
-                    continue
-                
-                if config.get("recorder_exclude", False):
-                    excluded_entities.append(entity_id)
-                else:
-                    # Entity is included, check if it has custom recorder days
-                    recorder_days = config.get("recorder_days")
-                    if recorder_days is not None:
-                        # Only include if different from domain default or system default
-                        domain_default = self._domain_config.get(domain, {}).get("recorder_days", DEFAULT_RECORDER_DAYS)
-                        if recorder_days != domain_default:
-                            individual_entity_configs[entity_id] = {"purge_keep_days": recorder_days}
-            
-            # Build exclude section
-            exclude_section = {}
-            if excluded_domains:
-                exclude_section["domains"] = sorted(excluded_domains)
-            if excluded_entities:
-                exclude_section["entities"] = sorted(excluded_entities)
+            result.update({
+                "excluded_entities": excluded_entities,
+                "excluded_domains": excluded_domains,
+                "excluded_entity_globs": excluded_globs,
+                "domain_configs": {
+                    "excluded_domains": len(excluded_domains),
+                    "excluded_entity_globs": len(excluded_globs),
+                    "domains_with_custom_days": len(domain_include_configs),
+                    "entities_with_custom_days": len(individual_entity_configs)
+                },
+                "hash": config_hash,
+            })
+            
+            # Seed the cache from the file written before a restart or changed since
+            file_stat = await self.hass.async_add_executor_job(self._file_stat, recorder_yaml_path)
+            if self._written_recorder_config_hash is None or file_stat != self._written_recorder_config_stat:
+                self._written_recorder_config = await self.hass.async_add_executor_job(
+                    self._load_written_recorder_config, recorder_yaml_path
+                )
+                self._written_recorder_config_hash = recorder_config_hash(self._written_recorder_config)
+                self._written_recorder_config_stat = file_stat
             
-            if exclude_section:
-                recorder_config["exclude"] = exclude_section
+            if config_hash == self._written_recorder_config_hash:
+                result.update({
+                    "changed": False,
+                    "diff": diff_recorder_config(recorder_config, recorder_config),
+                    "message": "recorder.yaml já está atualizado. Nenhuma alteração necessária.",
+                })
+                _LOGGER.debug("recorder.yaml unchanged (%s), skipping write", config_hash)
+                return result
             
-            # Build include section with custom purge_keep_days
-            include_section = {}
-            if domain_include_configs:
-                include_section["domains"] = domain_include_configs
-            if individual_entity_configs:
-                include_section["entities"] = individual_entity_configs
+            diff = diff_recorder_config(self._written_recorder_config, recorder_config)
             
-            if include_section:
-                recorder_config["include"] = include_section
+            # Make backup if requested
+            if backup_config and os.path.exists(recorder_yaml_path):
+                await self.hass.async_add_executor_job(shutil.copy2, recorder_yaml_path, recorder_backup_path)
+                _LOGGER.info("Backup created: %s", recorder_backup_path)
             
             # Add comments to the YAML
             yaml_content = self._create_recorder_yaml_with_comments(recorder_config)
             
             # Save recorder.yaml
             await self.hass.async_add_executor_job(self._save_yaml_content, recorder_yaml_path, yaml_content)
+            self._written_recorder_config = recorder_config
+            self._written_recorder_config_hash = config_hash
+            self._written_recorder_config_stat = await self.hass.async_add_executor_job(self._file_stat, recorder_yaml_path)
             
             # Update configuration.yaml to include recorder.yaml if not already included
             await self._ensure_recorder_yaml_included(config_yaml_path, backup_config)
             
-            # Prepare result
-            result.update({
-                "excluded_entities": excluded_entities,
-                "excluded_domains": excluded_domains,
-                "domain_configs": {
-                    "excluded_domains": len(excluded_domains),
-                    "domains_with_custom_days": len(domain_include_configs),
-                    "entities_with_custom_days": len(individual_entity_configs)
-                }
-            })
+            result.update({"changed": True, "diff": diff})
             
-            total_excluded = len(excluded_entities)
             message_parts = []
             if excluded_domains:
                 message_parts.append(f"{len(excluded_domains)} domínios excluídos")
             if excluded_entities:
                 message_parts.append(f"{len(excluded_entities)} entidades individuais excluídas")
+            if excluded_globs:
+                message_parts.append(f"{len(excluded_globs)} padrões de entidades excluídos")
             if domain_include_configs:
                 message_parts.append(f"{len(domain_include_configs)} domínios com dias customizados")
             if individual_entity_configs:
@@ -702,6 +1161,8 @@ class EntityManager:
     
     def _create_recorder_yaml_with_comments(self, config: Dict[str, Any]) -> str:
         """Create recorder.yaml content with helpful comments."""
+        import yaml
+
         content = "# Configuração do Recorder gerada pelo Entity Manager\n"
         content += "# Data: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n"
         content += "# \n"
@@ -730,6 +1191,8 @@ class EntityManager:
                 enhanced_lines.append(line + '  # Domínios completamente excluídos')
             elif 'entities:' in line and any(x in yaml_str[:yaml_str.find(line)] for x in ['exclude:']):
                 enhanced_lines.append(line + '  # Entidades individuais excluídas')
+            elif line.strip() == 'entity_globs:':
+                enhanced_lines.append(line + '  # Padrões de entidades excluídas (verificados contra as entidades atuais)')
             else:
                 enhanced_lines.append(line)
         
@@ -739,6 +1202,7 @@ class EntityManager:
         
         return content
     
+    @timed("file.save_yaml_content")
     def _save_yaml_content(self, file_path: str, content: str) -> None:
         """Save YAML content to file synchronously."""
         try:
@@ -750,6 +1214,8 @@ class EntityManager:
     
     async def _ensure_recorder_yaml_included(self, config_path: str, backup_config: bool = True):
         """Ensure that recorder.yaml is included in configuration.yaml."""
+        import shutil
+
         try:
             # Make backup of configuration.yaml if requested
             if backup_config and os.path.exists(config_path):
@@ -787,7 +1253,8 @@ class EntityManager:
                 _LOGGER.warning(
                     "recorder: section already exists in configuration.yaml. "
                     "Para usar o Entity Manager, substitua a seção recorder: existente por: "
-                    "'recorder: !include recorder.yaml' e mova suas configurações para recorder.yaml"
+                    "'recorder: !include recorder.yaml' e mova suas configurações para recorder.yaml. "
+                    "Use o serviço entity_manager.import_recorder_config para importar as configurações existentes."
                 )
             
             else:
@@ -796,14 +1263,244 @@ class EntityManager:
         except Exception as e:
             _LOGGER.error("Error ensuring recorder.yaml include: %s", e)
     
+    @timed("file.load_recorder_section")
+    def _load_recorder_section_sync(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (recorder section, source file) of the current configuration."""
+        config_yaml_path = self.hass.config.path(RECORDER_CONFIG_PATH)
+        if os.path.exists(config_yaml_path):
+            recorder_config = self._load_yaml_file(config_yaml_path).get("recorder")
+            if isinstance(recorder_config, dict):
+                return recorder_config, config_yaml_path
+        recorder_yaml_path = self.hass.config.path(RECORDER_YAML_PATH)
+        if os.path.exists(recorder_yaml_path):
+            return self._load_yaml_file(recorder_yaml_path), recorder_yaml_path
+        return None, None
+
+    async def import_recorder_config(self, overwrite: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+        """Import the include/exclude settings of the current recorder configuration.
+
+        Imported values that differ from an existing Entity Manager setting
+        are reported as conflicts and only applied with ``overwrite``. All
+        changes are persisted with a single save of each config file.
+        """
+        from .recorder_config import recorder_config_to_settings
+
+        result = {"status": "success", "source": None, "entities_imported": 0, "domains_imported": 0, "conflicts": []}
+        try:
+            recorder_config, source = await self.hass.async_add_executor_job(self._load_recorder_section_sync)
+            if recorder_config is None:
+                result.update({"status": "error", "message": "Nenhuma configuração do recorder encontrada."})
+                return result
+            result["source"] = source
+            result["purge_keep_days"] = recorder_config.get("purge_keep_days")
+            
+            entity_registry = async_get_entity_registry(self.hass)
+            known_entities = set(entity_registry.entities) | set(self.hass.states.async_entity_ids())
+            entity_settings, domain_settings = recorder_config_to_settings(recorder_config, known_entities)
+            
+            conflicts: List[Dict[str, Any]] = []
+            
+            def _merge(target: Dict[str, Any], imported: Dict[str, Dict[str, Any]], kind: str) -> int:
+                changed = 0
+                for key, settings in imported.items():
+                    current = target.get(key, {})
+                    updates = {}
+                    for field, value in settings.items():
+                        if field not in current or current[field] == value:
+                            updates[field] = value
+                            continue
+                        conflicts.append({"type": kind, "id": key, "field": field, "current": current[field], "imported": value})
+                        if overwrite:
+                            updates[field] = value
+                    updates = {field: value for field, value in updates.items() if current.get(field) != value}
+                    if updates and not dry_run:
+                        target.setdefault(key, {}).update(updates)
+                    changed += bool(updates)
+                return changed
+            
+            domains_imported = _merge(self._domain_config, domain_settings, "domain")
+            entities_imported = _merge(self._config, entity_settings, "entity")
+            
+            if not dry_run:
+                if domains_imported:
+                    await self.save_domain_config()
+                if entities_imported:
+                    await self.save_config()
+            
+            result.update({
+                "dry_run": dry_run,
+                "entities_imported": entities_imported,
+                "domains_imported": domains_imported,
+                "conflicts": conflicts,
+                "message": (
+                    f"{entities_imported} entidades e {domains_imported} domínios importados de {os.path.basename(source)}, "
+                    f"{len(conflicts)} conflitos{' (sobrescritos)' if overwrite and conflicts else ''}."
+                ),
+            })
+            _LOGGER.info("Imported recorder configuration: %s", result["message"])
+        except Exception as e:
+            _LOGGER.error("Error importing recorder configuration: %s", e, exc_info=True)
+            result.update({"status": "error", "message": f"Erro ao importar configuração: {str(e)}"})
+        return result
+
+    async def simulate_recorder_filter(self, source: str = "generated", limit: int = 500) -> Dict[str, Any]:
+        """Evaluate a recorder configuration for every known entity.
+
+        ``source`` is "generated" for the configuration update_recorder_config
+        would write, or "file" for the current recorder.yaml. Entities whose
+        simulated recording differs from the intended recorder_exclude setting
+        are reported as mismatches.
+        """
+        from .recorder_config import build_recorder_config
+        from .recorder_filter import RecorderFilter
+
+        result = {"status": "success", "source": source, "total_entities": 0, "recorded": 0, "excluded": 0, "mismatch_count": 0, "mismatches": []}
+        try:
+            entity_registry = async_get_entity_registry(self.hass)
+            if source == "file":
+                recorder_config = await self.hass.async_add_executor_job(
+                    self._load_written_recorder_config, self.hass.config.path(RECORDER_YAML_PATH)
+                )
+            else:
+                recorder_config = build_recorder_config(self._effective_entity_config(), self._domain_config, entity_registry.entities.keys())
+            
+            entity_ids = sorted(set(entity_registry.entities) | set(self.hass.states.async_entity_ids()) | set(self._config))
+            
+            start = time.perf_counter()
+            recorder_filter = RecorderFilter(recorder_config)
+            compiled = time.perf_counter()
+            recorded = recorder_filter.evaluate(entity_ids)
+            evaluated = time.perf_counter()
+            
+            mismatches = []
+            for entity_id, is_recorded in zip(entity_ids, recorded):
+                recorder_exclude = self._resolve_recorder_settings(entity_id)[1]
+                if is_recorded == recorder_exclude:
+                    mismatches.append({"entity_id": entity_id, "intended": not recorder_exclude, "simulated": is_recorded})
+            
+            recorded_count = sum(recorded)
+            result.update({
+                "total_entities": len(entity_ids),
+                "recorded": recorded_count,
+                "excluded": len(entity_ids) - recorded_count,
+                "mismatch_count": len(mismatches),
+                "mismatches": mismatches[:limit],
+                "compile_ms": round((compiled - start) * 1000, 3),
+                "evaluate_ms": round((evaluated - compiled) * 1000, 3),
+                "ns_per_entity": round((evaluated - compiled) * 1e9 / len(entity_ids), 1) if entity_ids else 0,
+            })
+        except Exception as e:
+            _LOGGER.error("Error simulating recorder filter: %s", e, exc_info=True)
+            result.update({"status": "error", "error": str(e)})
+        return result
+
+    def _short_retention_entities(self, max_recorder_days: int) -> List[str]:
+        """Return recorded entities whose retention is at most max_recorder_days."""
+        entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
+        entity_ids = set(entity_registry.entities.keys())
+        entity_ids.update(self.hass.states.async_entity_ids())
+
+        short_retention = []
+        for entity_id in entity_ids:
+            recorder_days, recorder_exclude = self._resolve_recorder_settings(entity_id)
+            if not recorder_exclude and recorder_days <= max_recorder_days:
+                short_retention.append(entity_id)
+        return sorted(short_retention)
+
+    async def downsample_history(self, entity_ids: Optional[List[str]] = None, max_recorder_days: int = DEFAULT_DOWNSAMPLE_MAX_DAYS) -> Dict[str, Any]:
+        """Store hourly min/max/mean of numeric states before they are purged.
+
+        Only complete hours are aggregated, and each entity keeps a watermark so
+        that repeated runs never count the same state row twice. Entities are
+        read in chunks of DOWNSAMPLE_CHUNK_SIZE, each its own recorder query
+        starting at the chunk's oldest watermark and merged before the next
+        one. Chunks are taken in watermark order, so entities never
+        downsampled before do not make the others rescan their history.
+        """
+        result = {"status": "success", "entities": 0, "rows_processed": 0, "hours_written": 0}
+        try:
+            if entity_ids is None:
+                entity_ids = self._short_retention_entities(max_recorder_days)
+            entity_ids = list(entity_ids)
+            result["entities"] = len(entity_ids)
+            if not entity_ids:
+                return result
+
+            end_ts = int(datetime.now().timestamp()) // SECONDS_PER_HOUR * SECONDS_PER_HOUR
+            watermarks = await self.hass.async_add_executor_job(self.history_store.get_watermarks, entity_ids)
+            entity_ids.sort(key=lambda entity_id: watermarks.get(entity_id, 0))
+
+            def _downsample(session, chunk: List[str]) -> Tuple[int, int]:
+                from .recorder_queries import iter_state_batches
+
+                acc: Dict[Tuple[str, int], List[float]] = {}
+                rows_processed = 0
+                start_ts = watermarks.get(chunk[0], 0)
+                for batch in iter_state_batches(session, chunk, start_ts, end_ts, DOWNSAMPLE_BATCH_SIZE):
+                    rows_processed += accumulate_hourly(acc, batch, watermarks)
+
+                hours_written = self.history_store.merge_hourly(acc, chunk, end_ts)
+                return rows_processed, hours_written
+
+            for index in range(0, len(entity_ids), DOWNSAMPLE_CHUNK_SIZE):
+                chunk = entity_ids[index:index + DOWNSAMPLE_CHUNK_SIZE]
+                rows_processed, hours_written = await self._async_recorder_query(_downsample, chunk)
+                result["rows_processed"] += rows_processed
+                result["hours_written"] += hours_written
+            _LOGGER.info(
+                "Downsampled %d states from %d entities into %d hourly buckets",
+                result["rows_processed"], len(entity_ids), result["hours_written"],
+            )
+
+        except Exception as e:
+            _LOGGER.error("Error downsampling recorder history: %s", e, exc_info=True)
+            result.update({"status": "error", "error": str(e)})
+
+        return result
+
+    @callback
+    def async_start_nightly_downsample(self) -> None:
+        """Downsample every night, before the recorder's auto_purge deletes the raw history."""
+        self._unsub_nightly_downsample = async_track_time_change(
+            self.hass, self._async_nightly_downsample,
+            hour=DOWNSAMPLE_NIGHTLY_HOUR, minute=DOWNSAMPLE_NIGHTLY_MINUTE, second=0,
+        )
+
+    @callback
+    def async_stop_nightly_downsample(self) -> None:
+        """Stop the nightly downsampling."""
+        if self._unsub_nightly_downsample is not None:
+            self._unsub_nightly_downsample()
+            self._unsub_nightly_downsample = None
+
+    async def _async_nightly_downsample(self, now: datetime) -> None:
+        """Downsample short-retention entities if the recorder purges on its own."""
+        if "recorder" not in self.hass.config.components:
+            return
+        if not getattr(self._get_recorder_instance(), "auto_purge", False):
+            return
+        await self.downsample_history()
+
+    async def get_hourly_stats(self, entity_id: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return stored hourly aggregates for an entity."""
+        start_ts = 0
+        if days is not None:
+            start_ts = (datetime.now() - timedelta(days=days)).timestamp()
+        return await self.hass.async_add_executor_job(self.history_store.get_hourly, entity_id, start_ts)
+
     async def purge_all_entities(self, force_purge: bool = False) -> Dict[str, Any]:
-        """Execute recorder.purge_entities service."""
-        result = {"status": "success", "message": "", "purged_entities": []}
-        
+        """Execute recorder.purge_entities service and wait until the recorder finished it.
+
+        Entities are purged in chunks of PURGE_CHUNK_SIZE, each one submitted
+        only when the recorder backlog is below the configured threshold.
+        """
+        result = {"status": "success", "message": "", "purged_entities": [], "chunks": 0, "waited_seconds": 0.0, "duration": 0.0}
+        start = time.monotonic()
+
         try:
-            # Collect excluded entities
+            # Collect entities excluded individually or by a retention policy
             excluded_entities = []
-            for entity_id, config in self._config.items():
+            for entity_id, config in self._effective_entity_config().items():
                 if config.get("recorder_exclude", False):
                     excluded_entities.append(entity_id)
             
@@ -811,21 +1508,34 @@ class EntityManager:
                 result["message"] = "Nenhuma entidade marcada para limpeza do recorder."
                 return result
             
-            # Execute purge_entities
-            service_data = {}
-            if excluded_entities:
-                service_data["entity_ids"] = excluded_entities
+            # Keep hourly trends of the entities whose history is about to go away
+            downsample = await self.downsample_history(entity_ids=excluded_entities)
+            if downsample["status"] == "error":
+                result.update({
+                    "status": "error",
+                    "message": f"Limpeza cancelada: erro ao agregar o histórico: {downsample['error']}",
+                })
+                return result
             
-            await self.hass.services.async_call(
-                "recorder",
-                "purge_entities",
-                service_data,
-                blocking=False
-            )
+            # Execute purge_entities chunk by chunk, pacing on the recorder backlog
+            waited = 0.0
+            chunks = 0
+            for index in range(0, len(excluded_entities), PURGE_CHUNK_SIZE):
+                chunk = excluded_entities[index:index + PURGE_CHUNK_SIZE]
+                waited += await self._async_recorder_service("purge_entities", {"entity_id": chunk})
+                chunks += 1
             
-            result["purged_entities"] = excluded_entities
-            result["message"] = f"Comando de limpeza enviado para {len(excluded_entities)} entidades."
-            _LOGGER.info("Executed recorder.purge_entities for %d entities", len(excluded_entities))
+            result.update({
+                "purged_entities": excluded_entities,
+                "chunks": chunks,
+                "waited_seconds": round(waited, 3),
+                "duration": round(time.monotonic() - start, 3),
+            })
+            result["message"] = f"Limpeza concluída para {len(excluded_entities)} entidades."
+            _LOGGER.info(
+                "Completed recorder.purge_entities for %d entities in %d chunks (%.1fs waiting for recorder)",
+                len(excluded_entities), chunks, waited,
+            )
             
         except Exception as e:
             _LOGGER.error("Error executing purge_entities: %s", e, exc_info=True)
@@ -833,17 +1543,23 @@ class EntityManager:
         
         return result
     
+    @timed("file.load_yaml_file")
     def _load_yaml_file(self, file_path: str) -> Dict[str, Any]:
-        """Load YAML file synchronously."""
+        """Load YAML file synchronously, resolving !include and !secret like Home Assistant."""
+        from homeassistant.util.yaml import Secrets, load_yaml
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+            data = load_yaml(file_path, Secrets(Path(self.hass.config.config_dir)))
+            return data if isinstance(data, dict) else {}
         except Exception as e:
             _LOGGER.error("Error loading YAML file %s: %s", file_path, e)
             return {}
     
+    @timed("file.save_yaml_file")
     def _save_yaml_file(self, file_path: str, data: Dict[str, Any]) -> None:
         """Save YAML file synchronously."""
+        import yaml
+
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
                 yaml.safe_dump(data, f, default_flow_style=False, allow_unicode=True, indent=2)
@@ -861,31 +1577,225 @@ class EntityManager:
         # Simplified implementation
         return {}
 
+    def _get_recorder_instance(self):
+        """Return the recorder instance or raise if it is not running."""
+        if "recorder" not in self.hass.config.components:
+            raise HomeAssistantError("Recorder component not available")
+
+        from homeassistant.components.recorder import get_instance
+
+        recorder_instance = get_instance(self.hass)
+        if not recorder_instance:
+            raise HomeAssistantError("Recorder instance not available")
+        return recorder_instance
+
+    def get_recorder_backlog(self) -> int:
+        """Return the number of tasks waiting in the recorder queue."""
+        try:
+            return getattr(self._get_recorder_instance(), "backlog", 0) or 0
+        except HomeAssistantError:
+            return 0
+
+    async def async_wait_for_recorder(self) -> float:
+        """Wait until the recorder backlog is at most max_recorder_backlog.
+
+        Returns the number of seconds waited. Raises HomeAssistantError if the
+        backlog does not drain within RECORDER_BACKLOG_TIMEOUT.
+        """
+        start = time.monotonic()
+        delay = RECORDER_BACKLOG_POLL_INTERVAL
+        while (backlog := self.get_recorder_backlog()) > self.max_recorder_backlog:
+            waited = time.monotonic() - start
+            if waited >= RECORDER_BACKLOG_TIMEOUT:
+                raise HomeAssistantError(
+                    f"Recorder backlog still at {backlog} (limit {self.max_recorder_backlog}) after {int(waited)}s"
+                )
+            _LOGGER.debug("Recorder backlog %d above %d, waiting %.1fs", backlog, self.max_recorder_backlog, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECORDER_BACKLOG_MAX_POLL_INTERVAL)
+        return time.monotonic() - start
+
+    async def _async_recorder_query(self, query, *args):
+        """Run query(session, *args) in the recorder executor once the backlog allows it."""
+        recorder_instance = self._get_recorder_instance()
+        await self.async_wait_for_recorder()
+        return await self._async_recorder_job(recorder_instance, query, *args)
+
+    @staticmethod
+    async def _async_recorder_job(recorder_instance, query, *args):
+        """Run query(session, *args) in the recorder executor with its own session."""
+
+        def _run():
+            with metrics.span(f"sql.{getattr(query, '__name__', 'query')}"), recorder_instance.get_session() as session:
+                return query(session, *args)
+
+        return await recorder_instance.async_add_executor_job(_run)
+
+    @staticmethod
+    def _recorder_query_concurrency() -> int:
+        """Return how many partition queries may run at once.
+
+        RECORDER_RESERVED_WORKERS of the recorder's database executor workers
+        are left free, so the frontend's history and logbook queries are not
+        queued behind a report.
+        """
+        try:
+            from homeassistant.components.recorder.core import MAX_DB_EXECUTOR_WORKERS
+        except ImportError:
+            return 1
+        return max(1, MAX_DB_EXECUTOR_WORKERS - RECORDER_RESERVED_WORKERS)
+
+    async def _async_partitioned_recorder_query(self, query, *args) -> List[Any]:
+        """Run query(session, first_id, last_id, *args) over metadata_id ranges of states.
+
+        The recorder backlog is waited on once; then each range is a separate
+        job in the recorder executor with its own session, a few at a time
+        (see _recorder_query_concurrency), so no single query scans the whole
+        table and large databases are read on several cores. Returns the
+        result of every range, for the caller to merge.
+        """
+        from .recorder_queries import metadata_id_ranges, query_metadata_id_bounds
+
+        recorder_instance = self._get_recorder_instance()
+        await self.async_wait_for_recorder()
+        bounds = await self._async_recorder_job(recorder_instance, query_metadata_id_bounds)
+        if bounds is None:
+            return []
+        ranges = metadata_id_ranges(*bounds, RECORDER_QUERY_PARTITIONS, RECORDER_QUERY_MIN_PARTITION_IDS)
+        semaphore = asyncio.Semaphore(self._recorder_query_concurrency())
+
+        async def _run(first_id: int, last_id: int) -> Any:
+            async with semaphore:
+                return await self._async_recorder_job(recorder_instance, query, first_id, last_id, *args)
+
+        with metrics.span(f"sql.partitioned.{getattr(query, '__name__', 'query')}"):
+            return await asyncio.gather(*(_run(first_id, last_id) for first_id, last_id in ranges))
+
+    async def _async_recorder_service(self, service: str, service_data: Dict[str, Any]) -> float:
+        """Call a recorder service and wait until the recorder has processed it.
+
+        Returns the number of seconds spent waiting for the backlog to drain.
+        """
+        recorder_instance = self._get_recorder_instance()
+        waited = await self.async_wait_for_recorder()
+        with metrics.span(f"recorder.{service}"):
+            await self.hass.services.async_call("recorder", service, service_data, blocking=True)
+            await recorder_instance.async_block_till_done()
+        return waited
+
+    def _retention_purge_groups(self) -> Dict[int, List[str]]:
+        """Group the entities to purge by retention days.
+
+        Entities whose retention is not shorter than the recorder's own
+        purge_keep_days are left to the recorder's auto purge.
+        """
+        recorder_instance = self._get_recorder_instance()
+        recorder_keep_days = getattr(recorder_instance, "keep_days", DEFAULT_RECORDER_DAYS)
+
+        entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
+        entity_ids = set(entity_registry.entities.keys())
+        entity_ids.update(self.hass.states.async_entity_ids())
+
+        by_days: Dict[int, List[str]] = {}
+        for entity_id in entity_ids:
+            recorder_days, recorder_exclude = self._resolve_recorder_settings(entity_id)
+            keep_days = 0 if recorder_exclude else recorder_days
+            if keep_days < recorder_keep_days:
+                by_days.setdefault(keep_days, []).append(entity_id)
+        return {keep_days: sorted(ids) for keep_days, ids in sorted(by_days.items())}
+
+    async def _async_purge_entities(self, entity_ids: List[str], keep_days: int) -> int:
+        """Purge the history of entities down to ``keep_days``, chunk by chunk.
+
+        Returns the number of state rows deleted, counted for each chunk just
+        before it is submitted; the count only reads the rows being purged.
+        """
+        from .recorder_queries import count_purgeable_states
+
+        rows_deleted = 0
+        for index in range(0, len(entity_ids), PURGE_CHUNK_SIZE):
+            chunk = entity_ids[index:index + PURGE_CHUNK_SIZE]
+            before_ts = time.time() - keep_days * 86400
+            counts = await self._async_recorder_query(count_purgeable_states, chunk, before_ts)
+            rows_deleted += sum(counts.values())
+            await self._async_recorder_service("purge_entities", {"entity_id": chunk, "keep_days": keep_days})
+        return rows_deleted
+
+    async def purge_by_retention(self) -> Dict[str, Any]:
+        """Purge each entity down to its resolved retention."""
+        by_days = self._retention_purge_groups()
+
+        rows_deleted = 0
+        for keep_days, ids in by_days.items():
+            rows_deleted += await self._async_purge_entities(ids, keep_days)
+
+        _LOGGER.info("Retention purge done for %d entities in %d groups", sum(len(ids) for ids in by_days.values()), len(by_days))
+        return {
+            "entities": sum(len(ids) for ids in by_days.values()),
+            "groups": {str(days): len(ids) for days, ids in by_days.items()},
+            "rows_deleted": rows_deleted,
+        }
+
+    async def estimate_retention_purge(self) -> Dict[str, Any]:
+        """Count the rows purge_by_retention would delete, without deleting anything."""
+        from .recorder_queries import count_purgeable_states
+
+        by_days = self._retention_purge_groups()
+        now = time.time()
+        groups: Dict[str, Dict[str, int]] = {}
+        for keep_days, ids in by_days.items():
+            before_ts = now - keep_days * 86400
+            rows = 0
+            for index in range(0, len(ids), PURGE_CHUNK_SIZE):
+                counts = await self._async_recorder_query(count_purgeable_states, ids[index:index + PURGE_CHUNK_SIZE], before_ts)
+                rows += sum(counts.values())
+            groups[str(keep_days)] = {"entities": len(ids), "rows": rows}
+
+        return {
+            "entities": sum(group["entities"] for group in groups.values()),
+            "rows": sum(group["rows"] for group in groups.values()),
+            "groups": groups,
+        }
+
+    async def purge_orphaned_entities(self) -> Dict[str, Any]:
+        """Purge recorder history of entities that no longer exist."""
+        from .recorder_queries import get_recorded_entity_ids
+
+        recorded = await self._async_recorder_query(get_recorded_entity_ids)
+
+        entity_registry: EntityRegistry = async_get_entity_registry(self.hass)
+        known = set(entity_registry.entities.keys())
+        known.update(self.hass.states.async_entity_ids())
+        orphans = sorted(entity_id for entity_id in recorded if entity_id not in known)
+
+        rows_deleted = await self._async_purge_entities(orphans, 0)
+
+        _LOGGER.info("Orphan cleanup purged %d entities", len(orphans))
+        return {"entities": len(orphans), "orphaned_entities": orphans, "rows_deleted": rows_deleted}
+
+    async def repack_database(self) -> Dict[str, Any]:
+        """Run a recorder purge with repack (VACUUM on SQLite)."""
+        from .recorder_queries import count_states_before
+
+        recorder_instance = self._get_recorder_instance()
+        keep_days = getattr(recorder_instance, "keep_days", DEFAULT_RECORDER_DAYS)
+
+        rows_deleted = await self._async_recorder_query(count_states_before, time.time() - keep_days * 86400)
+        await self._async_recorder_service("purge", {"keep_days": keep_days, "repack": True})
+
+        _LOGGER.info("Recorder repack finished (keep_days=%d)", keep_days)
+        return {"keep_days": keep_days, "rows_deleted": rows_deleted}
+
     async def generate_recorder_report(self, limit: int = 100, days_back: int = 30) -> Dict[str, Any]:
-        """Generate a simple report counting all records per entity."""
+        """Generate a simple report counting the records per entity of the last ``days_back`` days."""
         result = {"status": "success", "entities_analyzed": 0, "total_records": 0, "report_file": "", "report_data": []}
         try:
-            if "recorder" not in self.hass.config.components:
-                raise HomeAssistantError("Recorder component not available")
-            
-            def _simple_query():
-                from homeassistant.components.recorder import get_instance
-                from sqlalchemy import text
-                
-                recorder_instance = get_instance(self.hass)
-                if not recorder_instance:
-                    raise HomeAssistantError("Recorder instance not available")
-                
-                with recorder_instance.get_session() as session:
-                    sql_query = text("""
-                    SELECT sm.entity_id as entity_id, COUNT(*) as record_count
-                    FROM states s JOIN states_meta sm ON s.metadata_id = sm.metadata_id
-                    WHERE sm.entity_id IS NOT NULL
-                    GROUP BY sm.entity_id ORDER BY record_count DESC LIMIT :limit_param
-                    """)
-                    return session.execute(sql_query, {"limit_param": limit}).fetchall()
+            from .recorder_queries import query_record_counts
             
-            sql_results = await self.hass.async_add_executor_job(_simple_query)
+            # Each range returns its own top entities; entities never span ranges
+            start_ts = time.time() - days_back * 86400
+            partitions = await self._async_partitioned_recorder_query(query_record_counts, start_ts, limit)
+            sql_results = heapq.nlargest(limit, chain.from_iterable(partitions), key=itemgetter(1))
             
             report_data = [{"entity_id": row[0], "record_count": row[1]} for row in sql_results if row[0]]
             total_records = sum(item["record_count"] for item in report_data)
@@ -912,11 +1822,11 @@ class EntityManager:
             result.update({"status": "error", "error": str(e)})
             return result
 
+    @timed("file.save_report_file")
     def _save_report_file(self, path: str, data: Dict[str, Any]) -> None:
         """Save report file synchronously."""
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            write_json_file(path, data, pretty=True)
         except Exception as e:
             _LOGGER.error("Error saving report file: %s", e)
             raise
\ No newline at end of file
@@ -1,15 +1,18 @@
 """API views for Entity Manager."""
-import json
 import logging
 import os
 from typing import Any, Dict
 
+import voluptuous as vol
 from aiohttp import web
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
 
-from .const import DOMAIN, DEFAULT_RECORDER_DAYS, DEFAULT_DOMAIN_RECORDER_DAYS
+from .const import DOMAIN, DEFAULT_DOMAIN_RECORDER_DAYS, DEFAULT_DOWNSAMPLE_MAX_DAYS, SET_RETENTION_POLICIES_SCHEMA, BATCH_SCHEMA, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from .metrics import metrics, timed_view
+from .serialization import json_bytes_response, json_dumps, json_response
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,12 +26,13 @@ def setup_api(hass: HomeAssistant) -> None:
         hass.http.register_view(EntityManagerStatusView())
         hass.http.register_view(EntityManagerConfigView())
         hass.http.register_view(EntityManagerEntitiesView())
-        hass.http.register_view(EntityManagerPanelView())
         
         # Existing endpoints
         hass.http.register_view(EntityManagerIntelligentPurgeView())
         hass.http.register_view(EntityManagerRecorderReportView())
         hass.http.register_view(EntityManagerUpdateRecorderConfigView())
+        hass.http.register_view(EntityManagerSimulateRecorderFilterView())
+        hass.http.register_view(EntityManagerImportRecorderConfigView())
         hass.http.register_view(EntityManagerPurgeAllEntitiesView())
         hass.http.register_view(EntityManagerBulkUpdateRecorderExcludeView())
         
@@ -42,6 +46,27 @@ def setup_api(hass: HomeAssistant) -> None:
         hass.http.register_view(EntityManagerUpdateDomainRecorderDaysView())
         hass.http.register_view(EntityManagerBulkUpdateDomainRecorderDaysView())
         
+        # HISTORY DOWNSAMPLING ENDPOINT
+        hass.http.register_view(EntityManagerHourlyStatsView())
+        
+        # MAINTENANCE WINDOW ENDPOINT
+        hass.http.register_view(EntityManagerMaintenanceView())
+        
+        # DATABASE GROWTH ENDPOINT
+        hass.http.register_view(EntityManagerDatabaseGrowthView())
+        
+        # Entity statistics
+        hass.http.register_view(EntityManagerStatisticsView())
+        
+        # Timing metrics (debug_mode)
+        hass.http.register_view(EntityManagerMetricsView())
+        
+        # Retention policies
+        hass.http.register_view(EntityManagerRetentionPoliciesView())
+        
+        # Transactional batch of configuration changes
+        hass.http.register_view(EntityManagerBatchView())
+        
         _LOGGER.info("Entity Manager API views registered successfully")
         
         # Log registered endpoints for debugging
@@ -49,18 +74,39 @@ def setup_api(hass: HomeAssistant) -> None:
         _LOGGER.debug("- GET /api/entity_manager/status")
         _LOGGER.debug("- GET/POST /api/entity_manager/config")
         _LOGGER.debug("- GET /api/entity_manager/entities")
+        _LOGGER.debug("- GET /api/entity_manager/entities?q=<query>")
+        _LOGGER.debug("- GET /api/entity_manager/entities?since=<revision>")
         _LOGGER.debug("- GET /api/entity_manager/domains")
         _LOGGER.debug("- POST /api/entity_manager/exclude_domain")
         _LOGGER.debug("- POST /api/entity_manager/include_domain")
         _LOGGER.debug("- POST /api/entity_manager/bulk_exclude_domains")
         _LOGGER.debug("- POST /api/entity_manager/update_domain_recorder_days")
         _LOGGER.debug("- POST /api/entity_manager/bulk_update_domain_recorder_days")
+        _LOGGER.debug("- GET/POST /api/entity_manager/hourly_stats")
+        _LOGGER.debug("- GET/POST /api/entity_manager/maintenance")
+        _LOGGER.debug("- GET /api/entity_manager/maintenance?estimate=1")
+        _LOGGER.debug("- GET /api/entity_manager/database_growth")
+        _LOGGER.debug("- GET /api/entity_manager/statistics")
+        _LOGGER.debug("- GET /api/entity_manager/metrics")
+        _LOGGER.debug("- GET /api/entity_manager/simulate_recorder_filter")
+        _LOGGER.debug("- POST /api/entity_manager/import_recorder_config")
+        _LOGGER.debug("- GET/POST /api/entity_manager/retention_policies")
+        _LOGGER.debug("- POST /api/entity_manager/batch")
+        _LOGGER.debug("- GET /entity_manager")
         
     except Exception as e:
         _LOGGER.error("Failed to register Entity Manager API views: %s", e, exc_info=True)
         raise
 
 
+async def _async_get_manager(hass: HomeAssistant):
+    """Return the started manager (config loaded, indexes built), or None if it is not set up."""
+    manager = hass.data.get(DOMAIN)
+    if manager:
+        await manager.async_ensure_started()
+    return manager
+
+
 class EntityManagerStatusView(HomeAssistantView):
     """View to check if Entity Manager is running."""
     
@@ -68,15 +114,16 @@ class EntityManagerStatusView(HomeAssistantView):
     name = "api:entity_manager:status"
     requires_auth = True
     
+    @timed_view
     async def get(self, request: web.Request) -> web.Response:
-        """Get Entity Manager status."""
+        """Get Entity Manager status and startup timings (seconds)."""
         hass = request.app["hass"]
         manager = hass.data.get(DOMAIN)
         
         if not manager:
-            return web.Response(text=json.dumps({"status": "error", "message": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"status": "error", "message": "Entity Manager not initialized"}, status=500)
         
-        return web.Response(text=json.dumps({"status": "ok", "message": "Entity Manager is running"}), content_type="application/json")
+        return json_response({"status": "ok", "message": "Entity Manager is running", "startup": manager.startup_timings})
 
 
 class EntityManagerConfigView(HomeAssistantView):
@@ -86,25 +133,27 @@ class EntityManagerConfigView(HomeAssistantView):
     name = "api:entity_manager:config"
     requires_auth = True
     
+    @timed_view
     async def get(self, request: web.Request) -> web.Response:
         """Get entity manager configuration."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         config_data = {
             "entities": manager._config,
             "domains": manager._domain_config
         }
-        return web.Response(text=json.dumps(config_data), content_type="application/json")
+        return json_response(config_data)
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Update entity manager configuration."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -114,9 +163,9 @@ class EntityManagerConfigView(HomeAssistantView):
             if "domains" in data:
                 manager._domain_config.update(data["domains"])
                 await manager.save_domain_config()
-            return web.Response(text=json.dumps({"success": True}), content_type="application/json")
+            return json_response({"success": True})
         except Exception as e:
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerEntitiesView(HomeAssistantView):
@@ -126,19 +175,33 @@ class EntityManagerEntitiesView(HomeAssistantView):
     name = "api:entity_manager:entities"
     requires_auth = True
     
+    @timed_view
     async def get(self, request: web.Request) -> web.Response:
-        """Get all entities with their configurations."""
+        """Get all entities, the best matches of ?q=<query>&limit=<n>, or the changes ?since=<revision>."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
-            entities = await manager.get_all_entities()
-            return web.Response(text=json.dumps(entities), content_type="application/json")
+            query = request.query.get("q")
+            if query is not None:
+                limit = min(int(request.query.get("limit", DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+                entities = manager.search_entities(query, limit)
+                return json_response(entities)
+            
+            since = request.query.get("since")
+            if since is not None:
+                with metrics.span("json.entity_changes"):
+                    body = manager.get_entity_changes_json(since)
+                return json_bytes_response(body)
+            
+            with metrics.span("json.entities"):
+                body = manager.get_entities_json()
+            return json_bytes_response(body)
         except Exception as e:
             _LOGGER.error("API: Error getting entities: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": f"Error getting entities: {str(e)}"}), status=500, content_type="application/json")
+            return json_response({"error": f"Error getting entities: {str(e)}"}, status=500)
 
 
 class EntityManagerIntelligentPurgeView(HomeAssistantView):
@@ -148,19 +211,20 @@ class EntityManagerIntelligentPurgeView(HomeAssistantView):
     name = "api:entity_manager:intelligent_purge"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
             force_purge = data.get("force_purge", False)
             result = await manager.intelligent_purge(force_purge)
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
         except Exception as e:
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerRecorderReportView(HomeAssistantView):
@@ -170,13 +234,14 @@ class EntityManagerRecorderReportView(HomeAssistantView):
     name = "api:entity_manager:recorder_report"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Generate recorder report."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -202,13 +267,13 @@ class EntityManagerRecorderReportView(HomeAssistantView):
                 if result.get("status") == "error":
                     response_data["error"] = result.get("error", "Unknown error")
                 
-                return web.Response(text=json.dumps(response_data), content_type="application/json")
+                return json_response(response_data)
             else:
-                return web.Response(text=json.dumps(result), content_type="application/json")
+                return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error generating recorder report: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerUpdateRecorderConfigView(HomeAssistantView):
@@ -218,13 +283,14 @@ class EntityManagerUpdateRecorderConfigView(HomeAssistantView):
     name = "api:entity_manager:update_recorder_config"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Update recorder configuration with excluded entities and domains."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -233,11 +299,72 @@ class EntityManagerUpdateRecorderConfigView(HomeAssistantView):
             _LOGGER.info("API: Updating recorder configuration (backup=%s)", backup_config)
             
             result = await manager.update_recorder_config(backup_config)
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error updating recorder configuration: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerSimulateRecorderFilterView(HomeAssistantView):
+    """View to preview which entities the recorder would record."""
+    
+    url = "/api/entity_manager/simulate_recorder_filter"
+    name = "api:entity_manager:simulate_recorder_filter"
+    requires_auth = True
+    
+    @timed_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Simulate the generated (source=generated) or current (source=file) recorder filter."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            source = request.query.get("source", "generated")
+            if source not in ("generated", "file"):
+                return json_response({"error": "source must be 'generated' or 'file'"}, status=400)
+            limit = int(request.query.get("limit", 500))
+            
+            result = await manager.simulate_recorder_filter(source, limit)
+            return json_response(result)
+            
+        except Exception as e:
+            _LOGGER.error("API: Error simulating recorder filter: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerImportRecorderConfigView(HomeAssistantView):
+    """View to import the existing recorder configuration."""
+    
+    url = "/api/entity_manager/import_recorder_config"
+    name = "api:entity_manager:import_recorder_config"
+    requires_auth = True
+    
+    @timed_view
+    async def post(self, request: web.Request) -> web.Response:
+        """Import recorder include/exclude settings, optionally as a dry run."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            data = await request.json() if request.body_exists else {}
+            overwrite = data.get("overwrite", False)
+            dry_run = data.get("dry_run", False)
+            
+            _LOGGER.info("API: Importing recorder configuration (overwrite=%s, dry_run=%s)", overwrite, dry_run)
+            
+            result = await manager.import_recorder_config(overwrite, dry_run)
+            return json_response(result)
+            
+        except Exception as e:
+            _LOGGER.error("API: Error importing recorder configuration: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerPurgeAllEntitiesView(HomeAssistantView):
@@ -247,13 +374,14 @@ class EntityManagerPurgeAllEntitiesView(HomeAssistantView):
     name = "api:entity_manager:purge_all_entities"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Execute recorder.purge_entities service."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -262,11 +390,11 @@ class EntityManagerPurgeAllEntitiesView(HomeAssistantView):
             _LOGGER.info("API: Executing purge_all_entities (force=%s)", force_purge)
             
             result = await manager.purge_all_entities(force_purge)
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error executing purge_all_entities: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerBulkUpdateRecorderExcludeView(HomeAssistantView):
@@ -276,13 +404,14 @@ class EntityManagerBulkUpdateRecorderExcludeView(HomeAssistantView):
     name = "api:entity_manager:bulk_update_recorder_exclude"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Bulk update entities recorder exclude setting."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -290,7 +419,7 @@ class EntityManagerBulkUpdateRecorderExcludeView(HomeAssistantView):
             recorder_exclude = data.get("recorder_exclude", False)
             
             if not entity_ids:
-                return web.Response(text=json.dumps({"error": "No entity_ids provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No entity_ids provided"}, status=400)
             
             _LOGGER.info("API: Bulk updating recorder exclude for %d entities: %s", len(entity_ids), recorder_exclude)
             
@@ -303,11 +432,11 @@ class EntityManagerBulkUpdateRecorderExcludeView(HomeAssistantView):
                 "recorder_exclude": recorder_exclude
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error bulk updating recorder exclude: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 # UPDATED AND NEW API VIEWS FOR DOMAIN MANAGEMENT
@@ -319,21 +448,21 @@ class EntityManagerGetDomainsView(HomeAssistantView):
     name = "api:entity_manager:domains"
     requires_auth = True
     
+    @timed_view
     async def get(self, request: web.Request) -> web.Response:
         """Get all domains with entity counts, exclusion status, and recorder days configuration."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
-            entities = await manager.get_all_entities()
             domains = {}
             
             # Count entities and excluded entities per domain
-            for entity in entities:
-                domain = entity["domain"]
+            for entity in manager.get_entity_snapshot():
+                domain = entity.domain
                 if domain not in domains:
                     domains[domain] = {
                         "domain": domain,
@@ -347,10 +476,10 @@ class EntityManagerGetDomainsView(HomeAssistantView):
                 
                 domains[domain]["total_entities"] += 1
                 
-                if entity.get("recorder_exclude", False):
+                if entity.recorder_exclude:
                     domains[domain]["excluded_entities"] += 1
                 
-                if entity.get("enabled", True):
+                if entity.enabled:
                     domains[domain]["enabled_entities"] += 1
                 else:
                     domains[domain]["disabled_entities"] += 1
@@ -392,11 +521,13 @@ class EntityManagerGetDomainsView(HomeAssistantView):
             # Sort by domain name
             sorted_domains = sorted(domains.values(), key=lambda x: x["domain"])
             
-            return web.Response(text=json.dumps(sorted_domains), content_type="application/json")
+            with metrics.span("json.domains"):
+                body = json_dumps(sorted_domains)
+            return json_bytes_response(body)
             
         except Exception as e:
             _LOGGER.error("API: Error getting domains: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerExcludeDomainView(HomeAssistantView):
@@ -406,13 +537,14 @@ class EntityManagerExcludeDomainView(HomeAssistantView):
     name = "api:entity_manager:exclude_domain"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Exclude all entities from a domain with optional recorder days."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -421,7 +553,7 @@ class EntityManagerExcludeDomainView(HomeAssistantView):
             recorder_days = data.get("recorder_days")
             
             if not domain:
-                return web.Response(text=json.dumps({"error": "No domain provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No domain provided"}, status=400)
             
             _LOGGER.info("API: Excluding domain %s from recorder: %s (days: %s)", domain, recorder_exclude, recorder_days)
             
@@ -435,11 +567,11 @@ class EntityManagerExcludeDomainView(HomeAssistantView):
                 "recorder_days": recorder_days
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error excluding domain: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerIncludeDomainView(HomeAssistantView):
@@ -449,13 +581,14 @@ class EntityManagerIncludeDomainView(HomeAssistantView):
     name = "api:entity_manager:include_domain"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Include all entities from a domain in recorder with optional recorder days."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -463,7 +596,7 @@ class EntityManagerIncludeDomainView(HomeAssistantView):
             recorder_days = data.get("recorder_days")
             
             if not domain:
-                return web.Response(text=json.dumps({"error": "No domain provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No domain provided"}, status=400)
             
             _LOGGER.info("API: Including domain %s in recorder (days: %s)", domain, recorder_days)
             
@@ -477,11 +610,11 @@ class EntityManagerIncludeDomainView(HomeAssistantView):
                 "recorder_days": recorder_days
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error including domain: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerBulkExcludeDomainsView(HomeAssistantView):
@@ -491,13 +624,14 @@ class EntityManagerBulkExcludeDomainsView(HomeAssistantView):
     name = "api:entity_manager:bulk_exclude_domains"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Bulk exclude/include multiple domains with optional recorder days."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -506,7 +640,7 @@ class EntityManagerBulkExcludeDomainsView(HomeAssistantView):
             recorder_days = data.get("recorder_days")
             
             if not domains:
-                return web.Response(text=json.dumps({"error": "No domains provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No domains provided"}, status=400)
             
             _LOGGER.info("API: Bulk excluding %d domains from recorder: %s (days: %s)", len(domains), recorder_exclude, recorder_days)
             
@@ -520,11 +654,11 @@ class EntityManagerBulkExcludeDomainsView(HomeAssistantView):
                 "recorder_days": recorder_days
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error bulk excluding domains: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 # NEW API VIEWS FOR DOMAIN RECORDER DAYS MANAGEMENT
@@ -536,13 +670,14 @@ class EntityManagerUpdateDomainRecorderDaysView(HomeAssistantView):
     name = "api:entity_manager:update_domain_recorder_days"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Update recorder days for a domain."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -550,10 +685,10 @@ class EntityManagerUpdateDomainRecorderDaysView(HomeAssistantView):
             recorder_days = data.get("recorder_days")
             
             if not domain:
-                return web.Response(text=json.dumps({"error": "No domain provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No domain provided"}, status=400)
             
             if recorder_days is None:
-                return web.Response(text=json.dumps({"error": "No recorder_days provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No recorder_days provided"}, status=400)
             
             _LOGGER.info("API: Updating recorder days for domain %s: %d", domain, recorder_days)
             
@@ -566,11 +701,11 @@ class EntityManagerUpdateDomainRecorderDaysView(HomeAssistantView):
                 "recorder_days": recorder_days
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error updating domain recorder days: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
 
 
 class EntityManagerBulkUpdateDomainRecorderDaysView(HomeAssistantView):
@@ -580,13 +715,14 @@ class EntityManagerBulkUpdateDomainRecorderDaysView(HomeAssistantView):
     name = "api:entity_manager:bulk_update_domain_recorder_days"
     requires_auth = True
     
+    @timed_view
     async def post(self, request: web.Request) -> web.Response:
         """Bulk update recorder days for multiple domains."""
         hass = request.app["hass"]
-        manager = hass.data.get(DOMAIN)
+        manager = await _async_get_manager(hass)
         
         if not manager:
-            return web.Response(text=json.dumps({"error": "Entity Manager not initialized"}), status=500, content_type="application/json")
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
         
         try:
             data = await request.json()
@@ -594,10 +730,10 @@ class EntityManagerBulkUpdateDomainRecorderDaysView(HomeAssistantView):
             recorder_days = data.get("recorder_days")
             
             if not domains:
-                return web.Response(text=json.dumps({"error": "No domains provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No domains provided"}, status=400)
             
             if recorder_days is None:
-                return web.Response(text=json.dumps({"error": "No recorder_days provided"}), status=400, content_type="application/json")
+                return json_response({"error": "No recorder_days provided"}, status=400)
             
             _LOGGER.info("API: Bulk updating recorder days for %d domains: %d", len(domains), recorder_days)
             
@@ -610,21 +746,242 @@ class EntityManagerBulkUpdateDomainRecorderDaysView(HomeAssistantView):
                 "recorder_days": recorder_days
             }
             
-            return web.Response(text=json.dumps(result), content_type="application/json")
+            return json_response(result)
             
         except Exception as e:
             _LOGGER.error("API: Error bulk updating domain recorder days: %s", e, exc_info=True)
-            return web.Response(text=json.dumps({"error": str(e)}), status=500, content_type="application/json")
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerHourlyStatsView(HomeAssistantView):
+    """View to read and build hourly aggregates of short-retention entities."""
+    
+    url = "/api/entity_manager/hourly_stats"
+    name = "api:entity_manager:hourly_stats"
+    requires_auth = True
+    
+    @timed_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Get stored hourly min/max/mean for an entity."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        entity_id = request.query.get("entity_id")
+        if not entity_id:
+            return json_response({"error": "No entity_id provided"}, status=400)
+        
+        try:
+            days = int(request.query["days"]) if "days" in request.query else None
+            stats = await manager.get_hourly_stats(entity_id, days)
+            return json_response({"entity_id": entity_id, "hourly": stats})
+        except Exception as e:
+            _LOGGER.error("API: Error getting hourly stats: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+    
+    @timed_view
+    async def post(self, request: web.Request) -> web.Response:
+        """Downsample short-retention entities now."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            data = await request.json()
+            entity_ids = data.get("entity_ids")
+            max_recorder_days = data.get("max_recorder_days", DEFAULT_DOWNSAMPLE_MAX_DAYS)
+            
+            _LOGGER.info("API: Downsampling history (max_recorder_days=%d)", max_recorder_days)
+            
+            result = await manager.downsample_history(entity_ids, max_recorder_days)
+            return json_response(result)
+            
+        except Exception as e:
+            _LOGGER.error("API: Error downsampling history: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerMaintenanceView(HomeAssistantView):
+    """View to inspect and trigger scheduled maintenance."""
+    
+    url = "/api/entity_manager/maintenance"
+    name = "api:entity_manager:maintenance"
+    requires_auth = True
+    
+    @timed_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Get maintenance schedule and recent run history, or a retention purge estimate with ?estimate=1."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            if request.query.get("estimate"):
+                estimate = await manager.estimate_retention_purge()
+                return json_response(estimate)
+            
+            limit = int(request.query.get("limit", 100))
+            status = await manager.scheduler.async_get_status(limit)
+            return json_response(status)
+        except Exception as e:
+            _LOGGER.error("API: Error getting maintenance status: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+    
+    @timed_view
+    async def post(self, request: web.Request) -> web.Response:
+        """Run maintenance now."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            data = await request.json()
+            force = data.get("force", False)
+            
+            _LOGGER.info("API: Running maintenance (force=%s)", force)
+            
+            result = await manager.scheduler.async_run(force)
+            return json_response(result)
+            
+        except Exception as e:
+            _LOGGER.error("API: Error running maintenance: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerDatabaseGrowthView(HomeAssistantView):
+    """View to get database size samples, per-domain row counts and forecast."""
+    
+    url = "/api/entity_manager/database_growth"
+    name = "api:entity_manager:database_growth"
+    requires_auth = True
+    
+    @timed_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Get stored database growth samples."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            days = int(request.query.get("days", 30))
+            report = await manager.growth.async_get_report(days)
+            return json_response(report)
+        except Exception as e:
+            _LOGGER.error("API: Error getting database growth: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
 
 
-class EntityManagerPanelView(HomeAssistantView):
-    """View to serve the Entity Manager panel."""
+class EntityManagerStatisticsView(HomeAssistantView):
+    """View to get the entity statistics histograms."""
     
-    url = "/entity_manager"
-    name = "entity_manager:panel"
+    url = "/api/entity_manager/statistics"
+    name = "api:entity_manager:statistics"
     requires_auth = True
     
+    @timed_view
     async def get(self, request: web.Request) -> web.Response:
-        """Serve the Entity Manager panel."""
-        # Simplified implementation
-        return web.Response(text="Panel HTML would be here", content_type="text/html")
\ No newline at end of file
+        """Get entity counters by domain, state and retention."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        return json_response(manager.stats.as_dict())
+
+
+class EntityManagerMetricsView(HomeAssistantView):
+    """View to get the timing metrics recorded while debug_mode is enabled."""
+    
+    url = "/api/entity_manager/metrics"
+    name = "api:entity_manager:metrics"
+    requires_auth = True
+    
+    async def get(self, request: web.Request) -> web.Response:
+        """Get span histograms as JSON, or as Prometheus text with ?format=prometheus."""
+        if request.query.get("format") == "prometheus":
+            return web.Response(text=metrics.as_prometheus(), content_type="text/plain", headers={"X-Content-Type-Options": "nosniff"})
+        return json_response(metrics.as_dict())
+
+
+class EntityManagerRetentionPoliciesView(HomeAssistantView):
+    """View to get and replace the ordered retention policies."""
+    
+    url = "/api/entity_manager/retention_policies"
+    name = "api:entity_manager:retention_policies"
+    requires_auth = True
+    
+    @timed_view
+    async def get(self, request: web.Request) -> web.Response:
+        """Get the retention policies with their matched entity counts."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        return json_response({"policies": manager.get_retention_policies()})
+    
+    @timed_view
+    async def post(self, request: web.Request) -> web.Response:
+        """Replace the retention policies."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            data = SET_RETENTION_POLICIES_SCHEMA(await request.json())
+        except (vol.Invalid, ValueError) as e:
+            return json_response({"error": str(e)}, status=400)
+        
+        try:
+            _LOGGER.info("API: Updating %d retention policies", len(data["policies"]))
+            result = await manager.set_retention_policies(data["policies"])
+            return json_response(result)
+        except HomeAssistantError as e:
+            return json_response({"error": str(e)}, status=400)
+        except Exception as e:
+            _LOGGER.error("API: Error updating retention policies: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
+
+
+class EntityManagerBatchView(HomeAssistantView):
+    """View to apply an ordered list of configuration changes as one transaction."""
+    
+    url = "/api/entity_manager/batch"
+    name = "api:entity_manager:batch"
+    requires_auth = True
+    
+    @timed_view
+    async def post(self, request: web.Request) -> web.Response:
+        """Validate all operations, then apply them with one save and return per-operation results."""
+        hass = request.app["hass"]
+        manager = await _async_get_manager(hass)
+        
+        if not manager:
+            return json_response({"error": "Entity Manager not initialized"}, status=500)
+        
+        try:
+            data = BATCH_SCHEMA(await request.json())
+        except (vol.Invalid, ValueError) as e:
+            return json_response({"error": str(e)}, status=400)
+        
+        try:
+            _LOGGER.info("API: Applying batch of %d operations", len(data["operations"]))
+            result = await manager.apply_batch(data["operations"])
+            return json_response(result, status=200 if result["status"] == "success" else 400)
+        except Exception as e:
+            _LOGGER.error("API: Error applying batch: %s", e, exc_info=True)
+            return json_response({"error": str(e)}, status=500)
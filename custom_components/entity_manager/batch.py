@@ -0,0 +1,218 @@
+"""Transactional batches of entity and domain configuration changes."""
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import voluptuous as vol
+
+from .const import (
+    ATTR_ACTION,
+    ATTR_DOMAIN,
+    ATTR_DOMAIN_RECORDER_DAYS,
+    ATTR_DOMAINS,
+    ATTR_ENABLED,
+    ATTR_ENTITY_ID,
+    ATTR_ENTITY_IDS,
+    ATTR_RECORDER_DAYS,
+    ATTR_RECORDER_EXCLUDE,
+    BULK_DELETE_SCHEMA,
+    BULK_EXCLUDE_DOMAINS_SCHEMA,
+    BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
+    BULK_UPDATE_RECORDER_EXCLUDE_SCHEMA,
+    BULK_UPDATE_SCHEMA,
+    DELETE_ENTITY_SCHEMA,
+    EXCLUDE_DOMAIN_SCHEMA,
+    INCLUDE_DOMAIN_SCHEMA,
+    SERVICE_BULK_DELETE,
+    SERVICE_BULK_EXCLUDE_DOMAINS,
+    SERVICE_BULK_UPDATE,
+    SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS,
+    SERVICE_BULK_UPDATE_RECORDER_EXCLUDE,
+    SERVICE_DELETE_ENTITY,
+    SERVICE_EXCLUDE_DOMAIN,
+    SERVICE_INCLUDE_DOMAIN,
+    SERVICE_UPDATE_DOMAIN_RECORDER_DAYS,
+    SERVICE_UPDATE_ENTITY_STATE,
+    SERVICE_UPDATE_RECORDER_DAYS,
+    SERVICE_UPDATE_RECORDER_EXCLUDE,
+    UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
+    UPDATE_ENTITY_STATE_SCHEMA,
+    UPDATE_RECORDER_DAYS_SCHEMA,
+    UPDATE_RECORDER_EXCLUDE_SCHEMA,
+)
+
+# Batchable actions are the configuration services, validated by their own schemas
+BATCH_ACTION_SCHEMAS: Dict[str, vol.Schema] = {
+    SERVICE_UPDATE_ENTITY_STATE: UPDATE_ENTITY_STATE_SCHEMA,
+    SERVICE_UPDATE_RECORDER_DAYS: UPDATE_RECORDER_DAYS_SCHEMA,
+    SERVICE_UPDATE_RECORDER_EXCLUDE: UPDATE_RECORDER_EXCLUDE_SCHEMA,
+    SERVICE_BULK_UPDATE: BULK_UPDATE_SCHEMA,
+    SERVICE_BULK_UPDATE_RECORDER_EXCLUDE: BULK_UPDATE_RECORDER_EXCLUDE_SCHEMA,
+    SERVICE_DELETE_ENTITY: DELETE_ENTITY_SCHEMA,
+    SERVICE_BULK_DELETE: BULK_DELETE_SCHEMA,
+    SERVICE_UPDATE_DOMAIN_RECORDER_DAYS: UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
+    SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS: BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA,
+    SERVICE_EXCLUDE_DOMAIN: EXCLUDE_DOMAIN_SCHEMA,
+    SERVICE_INCLUDE_DOMAIN: INCLUDE_DOMAIN_SCHEMA,
+    SERVICE_BULK_EXCLUDE_DOMAINS: BULK_EXCLUDE_DOMAINS_SCHEMA,
+}
+
+# Registry change queued for an entity: enabled flag, or REMOVE
+REMOVE = "remove"
+
+
+def validate_operations(operations: Iterable[Mapping[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validate every operation; return the validated operations and the errors.
+
+    Each operation is ``{"action": <service>, **service data}``. All of them
+    are checked, so one call reports every invalid operation.
+    """
+    validated: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for index, operation in enumerate(operations):
+        data = dict(operation)
+        action = data.pop(ATTR_ACTION, None)
+        schema = BATCH_ACTION_SCHEMAS.get(action)
+        if schema is None:
+            errors.append({"index": index, "action": action, "error": f"Unsupported action: {action}"})
+            continue
+        try:
+            validated.append({ATTR_ACTION: action, **schema(data)})
+        except vol.Invalid as e:
+            errors.append({"index": index, "action": action, "error": str(e)})
+    return validated, errors
+
+
+class ConfigBatch:
+    """Operations applied to working copies of the entity and domain configuration.
+
+    The copies are copy-on-write: the top-level dicts are copied once and an
+    entity's or domain's settings only when an operation first changes them,
+    so the live configuration is untouched until the batch is committed.
+    Registry changes are coalesced per entity (the last operation wins) and
+    applied in one pass after the configuration has been saved.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Dict[str, Any]],
+        domain_config: Dict[str, Dict[str, Any]],
+        domain_entities: Callable[[str], List[str]],
+    ):
+        """Initialize the working copies; ``domain_entities`` lists a domain's entity ids."""
+        self.config = dict(config)
+        self.domain_config = dict(domain_config)
+        self.config_changed = False
+        self.domain_config_changed = False
+        self.registry_changes: Dict[str, Any] = {}
+        self._domain_entities = domain_entities
+        self._copied_entities: set = set()
+        self._copied_domains: set = set()
+
+    def apply(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        """Apply one validated operation and return its result."""
+        action = operation[ATTR_ACTION]
+        handler = getattr(self, f"_{action}")
+        return {"action": action, "status": "success", **handler(operation)}
+
+    def _entity(self, entity_id: str) -> Dict[str, Any]:
+        """Return the writable settings of an entity."""
+        if entity_id not in self._copied_entities:
+            self.config[entity_id] = dict(self.config.get(entity_id, {}))
+            self._copied_entities.add(entity_id)
+        self.config_changed = True
+        return self.config[entity_id]
+
+    def _domain(self, domain: str) -> Dict[str, Any]:
+        """Return the writable settings of a domain."""
+        if domain not in self._copied_domains:
+            self.domain_config[domain] = dict(self.domain_config.get(domain, {}))
+            self._copied_domains.add(domain)
+        self.domain_config_changed = True
+        return self.domain_config[domain]
+
+    def _set_entities(self, entity_ids: List[str], key: str, value: Any) -> Dict[str, Any]:
+        """Set one setting on several entities."""
+        for entity_id in entity_ids:
+            self._entity(entity_id)[key] = value
+        return {"entities": len(entity_ids)}
+
+    def _set_enabled(self, entity_ids: List[str], enabled: bool) -> Dict[str, Any]:
+        """Set the enabled setting and queue the registry update."""
+        for entity_id in entity_ids:
+            self._entity(entity_id)["enabled"] = enabled
+            self.registry_changes[entity_id] = enabled
+        return {"entities": len(entity_ids)}
+
+    def _delete(self, entity_ids: List[str]) -> Dict[str, Any]:
+        """Drop the entities' settings and queue their registry removal."""
+        for entity_id in entity_ids:
+            if entity_id in self.config:
+                del self.config[entity_id]
+                self._copied_entities.discard(entity_id)
+                self.config_changed = True
+            self.registry_changes[entity_id] = REMOVE
+        return {"entities": len(entity_ids)}
+
+    def _exclude_domains(self, domains: List[str], recorder_exclude: bool, recorder_days: Optional[int]) -> Dict[str, Any]:
+        """Set domain recorder settings and clear the overrides of their entities."""
+        cleared = 0
+        for domain in domains:
+            settings = self._domain(domain)
+            settings["recorder_exclude"] = recorder_exclude
+            if recorder_days is not None:
+                settings["recorder_days"] = recorder_days
+            for entity_id in self._domain_entities(domain):
+                current = self.config.get(entity_id)
+                if not current or not ("recorder_exclude" in current or (recorder_days is not None and "recorder_days" in current)):
+                    continue
+                entity_settings = self._entity(entity_id)
+                entity_settings.pop("recorder_exclude", None)
+                if recorder_days is not None:
+                    entity_settings.pop("recorder_days", None)
+                if not entity_settings:
+                    del self.config[entity_id]
+                    self._copied_entities.discard(entity_id)
+                cleared += 1
+        return {"domains": len(domains), "cleared_overrides": cleared}
+
+    def _update_entity_state(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._set_enabled([operation[ATTR_ENTITY_ID]], operation[ATTR_ENABLED])
+
+    def _update_recorder_days(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._set_entities([operation[ATTR_ENTITY_ID]], "recorder_days", operation[ATTR_RECORDER_DAYS])
+
+    def _update_recorder_exclude(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._set_entities([operation[ATTR_ENTITY_ID]], "recorder_exclude", operation[ATTR_RECORDER_EXCLUDE])
+
+    def _bulk_update(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        entity_ids = operation[ATTR_ENTITY_IDS]
+        if operation.get(ATTR_ENABLED) is not None:
+            self._set_enabled(entity_ids, operation[ATTR_ENABLED])
+        if operation.get(ATTR_RECORDER_DAYS) is not None:
+            self._set_entities(entity_ids, "recorder_days", operation[ATTR_RECORDER_DAYS])
+        return {"entities": len(entity_ids)}
+
+    def _bulk_update_recorder_exclude(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._set_entities(operation[ATTR_ENTITY_IDS], "recorder_exclude", operation[ATTR_RECORDER_EXCLUDE])
+
+    def _delete_entity(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._delete([operation[ATTR_ENTITY_ID]])
+
+    def _bulk_delete(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._delete(operation[ATTR_ENTITY_IDS])
+
+    def _update_domain_recorder_days(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._bulk_update_domain_recorder_days({**operation, ATTR_DOMAINS: [operation[ATTR_DOMAIN]]})
+
+    def _bulk_update_domain_recorder_days(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        for domain in operation[ATTR_DOMAINS]:
+            self._domain(domain)["recorder_days"] = operation[ATTR_DOMAIN_RECORDER_DAYS]
+        return {"domains": len(operation[ATTR_DOMAINS])}
+
+    def _exclude_domain(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._exclude_domains([operation[ATTR_DOMAIN]], operation[ATTR_RECORDER_EXCLUDE], operation.get(ATTR_RECORDER_DAYS))
+
+    def _include_domain(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._exclude_domains([operation[ATTR_DOMAIN]], False, operation.get(ATTR_RECORDER_DAYS))
+
+    def _bulk_exclude_domains(self, operation: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._exclude_domains(operation[ATTR_DOMAINS], operation[ATTR_RECORDER_EXCLUDE], operation.get(ATTR_RECORDER_DAYS))
@@ -5,11 +5,24 @@ from typing import Any, Dict, Optional
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_DEBUG_MODE,
+    CONF_MAINTENANCE_ENABLED,
+    CONF_MAINTENANCE_START,
+    CONF_MAINTENANCE_END,
+    CONF_MAINTENANCE_REPACK,
+    CONF_MAX_RECORDER_BACKLOG,
+    CONF_DB_SIZE_LIMIT,
+    DEFAULT_MAINTENANCE_START,
+    DEFAULT_MAINTENANCE_END,
+    DEFAULT_MAX_RECORDER_BACKLOG,
+    DEFAULT_DB_SIZE_LIMIT,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -45,6 +58,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle import from YAML."""
         return await self.async_step_user(user_input)
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> "OptionsFlow":
+        """Get the options flow for this handler."""
+        return OptionsFlow(config_entry)
+
 
 class OptionsFlow(config_entries.OptionsFlow):
     """Entity Manager config flow options handler."""
@@ -60,12 +79,38 @@ class OptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
+        options = self.config_entry.options
+        hour = vol.All(vol.Coerce(int), vol.Range(min=0, max=23))
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
                 vol.Optional(
-                    "debug_mode",
-                    default=self.config_entry.options.get("debug_mode", False),
+                    CONF_DEBUG_MODE,
+                    default=options.get(CONF_DEBUG_MODE, False),
+                ): bool,
+                vol.Optional(
+                    CONF_MAINTENANCE_ENABLED,
+                    default=options.get(CONF_MAINTENANCE_ENABLED, False),
                 ): bool,
+                vol.Optional(
+                    CONF_MAINTENANCE_START,
+                    default=options.get(CONF_MAINTENANCE_START, DEFAULT_MAINTENANCE_START),
+                ): hour,
+                vol.Optional(
+                    CONF_MAINTENANCE_END,
+                    default=options.get(CONF_MAINTENANCE_END, DEFAULT_MAINTENANCE_END),
+                ): hour,
+                vol.Optional(
+                    CONF_MAINTENANCE_REPACK,
+                    default=options.get(CONF_MAINTENANCE_REPACK, False),
+                ): bool,
+                vol.Optional(
+                    CONF_MAX_RECORDER_BACKLOG,
+                    default=options.get(CONF_MAX_RECORDER_BACKLOG, DEFAULT_MAX_RECORDER_BACKLOG),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DB_SIZE_LIMIT,
+                    default=options.get(CONF_DB_SIZE_LIMIT, DEFAULT_DB_SIZE_LIMIT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
             }),
         )
\ No newline at end of file
@@ -1,4 +1,6 @@
 """Constants for Entity Manager integration."""
+from datetime import timedelta
+
 import voluptuous as vol
 import homeassistant.helpers.config_validation as cv
 
@@ -7,12 +9,26 @@ DOMAIN = "entity_manager"
 # Configuration
 CONF_ENTITIES_CONFIG = "entities_config"
 CONF_DEFAULT_RECORDER_DAYS = "default_recorder_days"
+CONF_DEBUG_MODE = "debug_mode"
+
+# Maintenance window options
+CONF_MAINTENANCE_ENABLED = "maintenance_enabled"
+CONF_MAINTENANCE_START = "maintenance_window_start"
+CONF_MAINTENANCE_END = "maintenance_window_end"
+CONF_MAINTENANCE_REPACK = "maintenance_repack"
+CONF_MAX_RECORDER_BACKLOG = "max_recorder_backlog"
+CONF_DB_SIZE_LIMIT = "db_size_limit_mb"
 
 # Default values
 DEFAULT_RECORDER_DAYS = 10
 DEFAULT_DOMAIN_RECORDER_DAYS = 30
 CONFIG_FILE = "entity_manager_config.json"
 DOMAIN_CONFIG_FILE = "entity_manager_domains.json"
+POLICY_CONFIG_FILE = "entity_manager_policies.json"
+
+# Retention policy rule types: entity_id patterns and exact attribute matches
+POLICY_PATTERN_TYPES = ("glob", "regex")
+POLICY_EXACT_TYPES = ("integration", "platform", "device_class", "area")
 
 # Services
 SERVICE_UPDATE_ENTITY_STATE = "update_entity_state"
@@ -38,6 +54,21 @@ SERVICE_BULK_EXCLUDE_DOMAINS = "bulk_exclude_domains"
 SERVICE_UPDATE_DOMAIN_RECORDER_DAYS = "update_domain_recorder_days"
 SERVICE_BULK_UPDATE_DOMAIN_RECORDER_DAYS = "bulk_update_domain_recorder_days"
 
+# History downsampling
+SERVICE_DOWNSAMPLE_HISTORY = "downsample_history"
+
+# Maintenance
+SERVICE_RUN_MAINTENANCE = "run_maintenance"
+
+# Import of an existing recorder configuration
+SERVICE_IMPORT_RECORDER_CONFIG = "import_recorder_config"
+
+# Retention policies
+SERVICE_SET_RETENTION_POLICIES = "set_retention_policies"
+
+# Transactional batch of configuration changes
+SERVICE_BATCH = "batch"
+
 # Attributes
 ATTR_ENTITY_ID = "entity_id"
 ATTR_ENTITY_IDS = "entity_ids"
@@ -53,6 +84,15 @@ ATTR_DAYS_BACK = "days_back"
 ATTR_DOMAIN = "domain"
 ATTR_DOMAINS = "domains"
 ATTR_DOMAIN_RECORDER_DAYS = "domain_recorder_days"
+ATTR_MAX_RECORDER_DAYS = "max_recorder_days"
+ATTR_FORCE = "force"
+ATTR_OVERWRITE = "overwrite"
+ATTR_DRY_RUN = "dry_run"
+ATTR_POLICIES = "policies"
+ATTR_MATCH = "match"
+ATTR_VALUE = "value"
+ATTR_OPERATIONS = "operations"
+ATTR_ACTION = "action"
 
 # Events
 EVENT_ENTITY_MANAGER_UPDATED = "entity_manager_updated"
@@ -63,7 +103,115 @@ RECORDER_YAML_PATH = "recorder.yaml"
 RECORDER_CONFIG_BACKUP_PATH = "configuration.yaml.entity_manager_backup"
 RECORDER_YAML_BACKUP_PATH = "recorder.yaml.entity_manager_backup"
 
+# Hourly aggregates kept for short-retention entities before they are purged
+HISTORY_STORE_FILE = "entity_manager_history.db"
+DEFAULT_DOWNSAMPLE_MAX_DAYS = 7
+DOWNSAMPLE_BATCH_SIZE = 10000
+DOWNSAMPLE_CHUNK_SIZE = 100  # entities read and merged per recorder query
+# The recorder's nightly auto_purge runs at 04:12 local time; downsample before it
+DOWNSAMPLE_NIGHTLY_HOUR = 4
+DOWNSAMPLE_NIGHTLY_MINUTE = 0
+
+# Maintenance scheduler
+DEFAULT_MAINTENANCE_START = 3
+DEFAULT_MAINTENANCE_END = 5
+DEFAULT_MAX_RECORDER_BACKLOG = 500
+MAINTENANCE_CHECK_INTERVAL = timedelta(minutes=5)
+MAINTENANCE_REPACK_INTERVAL = timedelta(days=7)
+MAINTENANCE_TASK_DOWNSAMPLE = "downsample"
+MAINTENANCE_TASK_RETENTION_PURGE = "retention_purge"
+MAINTENANCE_TASK_ORPHAN_CLEANUP = "orphan_cleanup"
+MAINTENANCE_TASK_REPACK = "repack"
+
+# Recorder back-pressure
+RECORDER_BACKLOG_POLL_INTERVAL = 0.5
+RECORDER_BACKLOG_MAX_POLL_INTERVAL = 5.0
+RECORDER_BACKLOG_TIMEOUT = 300
+PURGE_CHUNK_SIZE = 100
+
+# Aggregations over the states table run as metadata_id range queries in parallel
+RECORDER_QUERY_PARTITIONS = 8
+RECORDER_QUERY_MIN_PARTITION_IDS = 64  # small databases are read in one query
+RECORDER_RESERVED_WORKERS = 2  # database executor workers left to history and logbook queries
+
+# Database growth tracking
+DEFAULT_DB_SIZE_LIMIT = 0  # MB, 0 disables the days-until-limit projection
+DB_SIZE_SAMPLE_INTERVAL = timedelta(hours=1)
+DB_ROW_COUNT_INTERVAL = timedelta(hours=24)
+DB_GROWTH_WINDOW = timedelta(days=7)
+DB_GROWTH_HISTORY = timedelta(days=30)
+SIGNAL_DB_GROWTH_UPDATED = f"{DOMAIN}_db_growth_updated"
+
+# Change notifications
+SIGNAL_CONFIG_UPDATED = f"{DOMAIN}_config_updated"
+SIGNAL_STATS_UPDATED = f"{DOMAIN}_stats_updated"
+STATS_UPDATE_THROTTLE = 10  # seconds between stats sensor writes
+
+# Effective retention buckets counted by the stats sensors: (max days, key)
+RETENTION_EXCLUDED = "excluded"
+RETENTION_BUCKETS = [
+    (1, "retention_1_day"),
+    (7, "retention_2_7_days"),
+    (30, "retention_8_30_days"),
+    (None, "retention_over_30_days"),
+]
+
+# Entity search: term scores by match kind, multiplied by the field weight
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 1000
+SEARCH_SCORE_EXACT = 3.0
+SEARCH_SCORE_PREFIX = 2.0
+SEARCH_SCORE_SUBSTRING = 1.0
+SEARCH_SCORE_FUZZY = 0.8  # scaled by the trigram similarity
+SEARCH_FUZZY_MIN_SIMILARITY = 0.5
+WS_TYPE_SEARCH = f"{DOMAIN}/search"
+
+# Timing metrics (enabled by the debug_mode option)
+METRICS_SAMPLE_SIZE = 1024  # most recent durations kept per span for percentiles
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+
+# Frontend bundle loaded by the panel, built from the current card
+CARD_SOURCE = "entity-manager-card-v45.js"
+FRONTEND_STATIC_URL = f"/{DOMAIN}/static"
+FRONTEND_BUILD_DIR = "frontend"  # in the integration directory, served at FRONTEND_STATIC_URL
+PANEL_URL_PATH = DOMAIN  # the panel is at /entity_manager
+PANEL_COMPONENT = "entity-manager-card"
+PANEL_TITLE = "Entity Manager"
+PANEL_ICON = "mdi:database-cog"
+
+# Batches: operations validated together and saved once
+MAX_BATCH_OPERATIONS = 1000
+
 # SCHEMAS
+UPDATE_ENTITY_STATE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+    vol.Required(ATTR_ENABLED): cv.boolean,
+})
+
+UPDATE_RECORDER_DAYS_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+    vol.Required(ATTR_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
+})
+
+BULK_UPDATE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_IDS): cv.entity_ids,
+    vol.Optional(ATTR_ENABLED): cv.boolean,
+    vol.Optional(ATTR_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
+})
+
+DELETE_ENTITY_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+})
+
+BULK_DELETE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_IDS): cv.entity_ids,
+})
+
+PURGE_RECORDER_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_IDS): cv.entity_ids,
+    vol.Optional(ATTR_FORCE_PURGE, default=False): cv.boolean,
+})
+
 UPDATE_RECORDER_EXCLUDE_SCHEMA = vol.Schema({
     vol.Required(ATTR_ENTITY_ID): cv.entity_id,
     vol.Required(ATTR_RECORDER_EXCLUDE): cv.boolean,
@@ -118,4 +266,36 @@ UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA = vol.Schema({
 BULK_UPDATE_DOMAIN_RECORDER_DAYS_SCHEMA = vol.Schema({
     vol.Required(ATTR_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
     vol.Required(ATTR_DOMAIN_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
-})
\ No newline at end of file
+})
+
+DOWNSAMPLE_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_IDS): cv.entity_ids,
+    vol.Optional(ATTR_MAX_RECORDER_DAYS, default=DEFAULT_DOWNSAMPLE_MAX_DAYS): vol.All(int, vol.Range(min=0, max=365)),
+})
+
+RUN_MAINTENANCE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+})
+
+RETENTION_POLICY_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Required(ATTR_MATCH): vol.In(POLICY_PATTERN_TYPES + POLICY_EXACT_TYPES),
+        vol.Required(ATTR_VALUE): cv.string,
+        vol.Optional(ATTR_RECORDER_DAYS): vol.All(int, vol.Range(min=0, max=365)),
+        vol.Optional(ATTR_RECORDER_EXCLUDE): cv.boolean,
+    }),
+    cv.has_at_least_one_key(ATTR_RECORDER_DAYS, ATTR_RECORDER_EXCLUDE),
+)
+
+SET_RETENTION_POLICIES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_POLICIES): vol.All(cv.ensure_list, [RETENTION_POLICY_SCHEMA]),
+})
+
+IMPORT_RECORDER_CONFIG_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+    vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+})
+
+BATCH_SCHEMA = vol.Schema({
+    vol.Required(ATTR_OPERATIONS): vol.All(cv.ensure_list, vol.Length(min=1, max=MAX_BATCH_OPERATIONS), [dict]),
+})
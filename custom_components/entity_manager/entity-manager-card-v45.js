@@ -4,6 +4,317 @@
  * Data: 2025-07-21 - VERSÃO CORRIGIDA
  */
 
+// Entity rows have a fixed height so the grid can be virtualized: only the
+// visible rows plus ROW_OVERSCAN above and below are in the DOM.
+const ROW_HEIGHT = 64;
+const ROW_OVERSCAN = 10;
+const SEARCH_DEBOUNCE_MS = 150;
+
+// The last entity and domain lists are kept in IndexedDB; bump
+// SNAPSHOT_VERSION when the shape of the stored rows changes.
+const SNAPSHOT_DB = 'entity-manager';
+const SNAPSHOT_STORE = 'snapshot';
+const SNAPSHOT_KEY = 'entities';
+const SNAPSHOT_VERSION = 1;
+
+/**
+ * Column store of the entity list answering filter, sort and statistics
+ * queries. It runs inside a Web Worker (see EntityQueryWorker), so it must
+ * not reference anything outside this function.
+ *
+ * Search matches a precomputed lowercase "entity_id\nname" key; flags,
+ * states and domain/integration/area codes are typed-array columns, and
+ * each sort order is computed once per entity list.
+ */
+function createEntityIndex() {
+    const FLAG_ENABLED = 1;
+    const FLAG_EXCLUDED = 2;
+    const STATE_NORMAL = 0;
+    const STATE_CODES = { unavailable: 1, unknown: 2, disabled: 3 };
+    const STATE_NOT_PROVIDED = 4;
+    const STATE_FILTERS = { normal: STATE_NORMAL, unavailable: 1, unknown: 2, disabled: 3, not_provided: STATE_NOT_PROVIDED };
+    const collator = new Intl.Collator(undefined, { sensitivity: 'base', numeric: true });
+
+    let count = 0;
+    let entityIds = [];
+    let names = [];
+    let searchKeys = [];
+    let flags = new Uint8Array(0);
+    let states = new Uint8Array(0);
+    let recorderDays = new Uint16Array(0);
+    let domainCodes = new Int32Array(0);
+    let integrationCodes = new Int32Array(0);
+    let areaCodes = new Int32Array(0);
+    let dictionaries = { domain: new Map(), integration: new Map(), area: new Map() };
+    let areaNames = new Map();
+    let sortOrders = {};
+    let enabledCount = 0;
+    let excludedCount = 0;
+
+    function encode(dictionary, value) {
+        if (!value) return -1;
+        let code = dictionary.get(value);
+        if (code === undefined) {
+            code = dictionary.size;
+            dictionary.set(value, code);
+        }
+        return code;
+    }
+
+    function setFlags(index, enabled, excluded) {
+        const previous = flags[index];
+        const next = (enabled ? FLAG_ENABLED : 0) | (excluded ? FLAG_EXCLUDED : 0);
+        enabledCount += (next & FLAG_ENABLED) - (previous & FLAG_ENABLED);
+        excludedCount += ((next & FLAG_EXCLUDED) - (previous & FLAG_EXCLUDED)) / FLAG_EXCLUDED;
+        flags[index] = next;
+    }
+
+    function sortOrder(key) {
+        if (!sortOrders[key]) {
+            const order = Int32Array.from({ length: count }, (_, i) => i);
+            if (key === 'name') order.sort((a, b) => collator.compare(names[a], names[b]));
+            else if (key === 'entity_id') order.sort((a, b) => (entityIds[a] < entityIds[b] ? -1 : entityIds[a] > entityIds[b] ? 1 : 0));
+            else if (key === 'recorder_days') order.sort((a, b) => recorderDays[b] - recorderDays[a] || a - b);
+            sortOrders[key] = order;
+        }
+        return sortOrders[key];
+    }
+
+    function stats() {
+        return {
+            total: count,
+            enabled: enabledCount,
+            excluded: excludedCount,
+            integrations: [...dictionaries.integration.keys()].sort(),
+            domains: [...dictionaries.domain.keys()].sort(),
+            areas: [...areaNames.entries()].sort((a, b) => collator.compare(a[1], b[1])),
+        };
+    }
+
+    return {
+        load(entities) {
+            count = entities.length;
+            entityIds = new Array(count);
+            names = new Array(count);
+            searchKeys = new Array(count);
+            flags = new Uint8Array(count);
+            states = new Uint8Array(count);
+            recorderDays = new Uint16Array(count);
+            domainCodes = new Int32Array(count);
+            integrationCodes = new Int32Array(count);
+            areaCodes = new Int32Array(count);
+            dictionaries = { domain: new Map(), integration: new Map(), area: new Map() };
+            areaNames = new Map();
+            sortOrders = {};
+            enabledCount = 0;
+            excludedCount = 0;
+            for (let i = 0; i < count; i++) {
+                const entity = entities[i];
+                const name = entity.name || '';
+                entityIds[i] = entity.entity_id;
+                names[i] = name || entity.entity_id;
+                // The newline keeps a search from matching across the two fields
+                searchKeys[i] = `${entity.entity_id}\n${name.toLowerCase()}`;
+                setFlags(i, entity.enabled, entity.recorder_exclude);
+                states[i] = entity.state === null || entity.state === '' ? STATE_NOT_PROVIDED : (STATE_CODES[entity.state] || STATE_NORMAL);
+                recorderDays[i] = entity.recorder_days || 0;
+                domainCodes[i] = encode(dictionaries.domain, entity.domain);
+                integrationCodes[i] = encode(dictionaries.integration, entity.integration_domain);
+                areaCodes[i] = encode(dictionaries.area, entity.area_id);
+                if (entity.area_id && !areaNames.has(entity.area_id)) areaNames.set(entity.area_id, entity.area_name || entity.area_id);
+            }
+            return stats();
+        },
+
+        update({ index, enabled, recorder_exclude, recorder_days }) {
+            if (index < 0 || index >= count) return stats();
+            const current = flags[index];
+            setFlags(
+                index,
+                enabled === undefined ? current & FLAG_ENABLED : enabled,
+                recorder_exclude === undefined ? current & FLAG_EXCLUDED : recorder_exclude,
+            );
+            if (recorder_days !== undefined) {
+                recorderDays[index] = recorder_days;
+                delete sortOrders.recorder_days;
+            }
+            return stats();
+        },
+
+        query({ filters, sort }) {
+            const search = (filters.search || '').toLowerCase();
+            const state = filters.state ? STATE_FILTERS[filters.state] : undefined;
+            const flagMask = (filters.enabled ? FLAG_ENABLED : 0) | (filters.recorder ? FLAG_EXCLUDED : 0);
+            const flagValue = (filters.enabled === 'enabled' ? FLAG_ENABLED : 0) | (filters.recorder === 'excluded' ? FLAG_EXCLUDED : 0);
+            // An unknown value gets code -2 so that it matches nothing
+            const domain = filters.domain ? (dictionaries.domain.get(filters.domain) ?? -2) : undefined;
+            const integration = filters.integration ? (dictionaries.integration.get(filters.integration) ?? -2) : undefined;
+            const area = filters.area ? (dictionaries.area.get(filters.area) ?? -2) : undefined;
+            const order = sort ? sortOrder(sort) : null;
+
+            const matches = new Int32Array(count);
+            let matched = 0;
+            for (let position = 0; position < count; position++) {
+                const i = order ? order[position] : position;
+                if ((flags[i] & flagMask) !== flagValue) continue;
+                if (state !== undefined && states[i] !== state) continue;
+                if (domain !== undefined && domainCodes[i] !== domain) continue;
+                if (integration !== undefined && integrationCodes[i] !== integration) continue;
+                if (area !== undefined && areaCodes[i] !== area) continue;
+                if (search && !searchKeys[i].includes(search)) continue;
+                matches[matched++] = i;
+            }
+            return { indices: matches.slice(0, matched) };
+        },
+    };
+}
+
+/**
+ * Runs createEntityIndex in a Web Worker created from a Blob URL. If workers
+ * are unavailable (or blocked by a content security policy) the index runs
+ * on the main thread instead, with the same asynchronous interface.
+ */
+class EntityQueryWorker {
+    constructor() {
+        this.nextId = 0;
+        this.pending = new Map(); // id -> { type, payload, resolve, reject }
+        this.local = null;
+        try {
+            const source = `${createEntityIndex.toString()}
+                const index = createEntityIndex();
+                self.onmessage = (event) => {
+                    const { id, type, payload } = event.data;
+                    try {
+                        const result = index[type](payload);
+                        self.postMessage({ id, result }, result && result.indices ? [result.indices.buffer] : []);
+                    } catch (error) {
+                        self.postMessage({ id, error: String(error) });
+                    }
+                };`;
+            this.url = URL.createObjectURL(new Blob([source], { type: 'text/javascript' }));
+            this.worker = new Worker(this.url);
+            this.worker.onmessage = (event) => this.handleMessage(event.data);
+            this.worker.onerror = (event) => {
+                console.warn('Entity Manager: filter worker failed, filtering on the main thread', event.message);
+                this.useLocal();
+            };
+        } catch (error) {
+            this.useLocal();
+        }
+    }
+
+    useLocal() {
+        this.terminate();
+        this.local = createEntityIndex();
+        // Replay what the worker did not answer, in order
+        const pending = [...this.pending.values()];
+        this.pending.clear();
+        pending.forEach(({ type, payload, resolve, reject }) => this.call(type, payload).then(resolve, reject));
+    }
+
+    call(type, payload) {
+        if (this.local) {
+            return Promise.resolve().then(() => this.local[type](payload));
+        }
+        return new Promise((resolve, reject) => {
+            const id = ++this.nextId;
+            this.pending.set(id, { type, payload, resolve, reject });
+            this.worker.postMessage({ id, type, payload });
+        });
+    }
+
+    handleMessage({ id, result, error }) {
+        const request = this.pending.get(id);
+        if (!request) return;
+        this.pending.delete(id);
+        if (error) request.reject(new Error(error));
+        else request.resolve(result);
+    }
+
+    terminate() {
+        if (this.worker) {
+            this.worker.terminate();
+            this.worker = null;
+        }
+        if (this.url) {
+            URL.revokeObjectURL(this.url);
+            this.url = null;
+        }
+    }
+}
+
+/**
+ * Entity and domain lists stored in IndexedDB with the server revision they
+ * match, so the card renders before the network answers and then asks only
+ * for the entities changed since. Any failure (private browsing, quota,
+ * blocked database) behaves as an empty cache.
+ */
+class EntitySnapshotCache {
+    constructor() {
+        this.db = null;
+    }
+
+    open() {
+        if (!this.db) {
+            this.db = new Promise((resolve) => {
+                if (typeof indexedDB === 'undefined') return resolve(null);
+                try {
+                    const request = indexedDB.open(SNAPSHOT_DB, 1);
+                    request.onupgradeneeded = () => request.result.createObjectStore(SNAPSHOT_STORE);
+                    request.onsuccess = () => resolve(request.result);
+                    request.onerror = request.onblocked = () => resolve(null);
+                } catch (error) {
+                    resolve(null);
+                }
+            });
+        }
+        return this.db;
+    }
+
+    async run(mode, action) {
+        const db = await this.open();
+        if (!db) return null;
+        return new Promise((resolve) => {
+            try {
+                const transaction = db.transaction(SNAPSHOT_STORE, mode);
+                const request = action(transaction.objectStore(SNAPSHOT_STORE));
+                transaction.oncomplete = () => resolve(request.result);
+                transaction.onerror = transaction.onabort = () => resolve(null);
+            } catch (error) {
+                resolve(null);
+            }
+        });
+    }
+
+    async read() {
+        const snapshot = await this.run('readonly', store => store.get(SNAPSHOT_KEY));
+        return snapshot && snapshot.version === SNAPSHOT_VERSION ? snapshot : null;
+    }
+
+    write({ revision, entities, domains }) {
+        return this.run('readwrite', store => store.put({ version: SNAPSHOT_VERSION, revision, entities, domains }, SNAPSHOT_KEY));
+    }
+}
+
+/**
+ * Apply the rows changed and the ids removed since a revision to an entity
+ * list sorted by entity_id, returning a new list in the same order.
+ */
+function mergeEntityChanges(entities, changed, removed) {
+    const byId = new Map(entities.map(entity => [entity.entity_id, entity]));
+    removed.forEach(entityId => byId.delete(entityId));
+    let added = false;
+    for (const entity of changed) {
+        if (!byId.has(entity.entity_id)) added = true;
+        byId.set(entity.entity_id, entity);
+    }
+    const merged = [...byId.values()];
+    if (added) {
+        merged.sort((a, b) => (a.entity_id < b.entity_id ? -1 : a.entity_id > b.entity_id ? 1 : 0));
+    }
+    return merged;
+}
+
 class EntityManagerCard extends HTMLElement {
     constructor() {
         super();
@@ -12,6 +323,16 @@ class EntityManagerCard extends HTMLElement {
         this.entities = [];
         this.domains = [];
         this.filteredEntities = [];
+        this.filteredIndex = new Map(); // entity_id -> position in filteredEntities
+        this.gridContainer = null;
+        this.visibleRows = new Map(); // entity_id -> row element in the DOM
+        this.rowPool = []; // detached rows ready to be recycled
+        this.entityQuery = new EntityQueryWorker();
+        this.entityStats = null; // counts and filter options computed by entityQuery
+        this.snapshotCache = new EntitySnapshotCache();
+        this.revision = null; // server revision this.entities matches
+        this.filterSeq = 0;
+        this.searchTimer = null;
         this.selectedEntities = new Set();
         this.selectedDomains = new Set();
         this.reportEntityIds = [];
@@ -70,18 +391,32 @@ class EntityManagerCard extends HTMLElement {
 
     async loadData() {
         if (!this._hass) return;
-        this.isLoading = true;
-        this.render();
         
         try {
-            // Load entities and domains in parallel
-            const [entitiesResult, domainsResult] = await Promise.all([
+            // First load: show the cached snapshot while asking for what changed since
+            if (!this.revision && !this.entities.length && await this.loadCachedSnapshot()) {
+                this.isLoading = false;
+                await this.filterEntities();
+            } else if (!this.entities.length) {
+                this.isLoading = true;
+                this.render();
+            }
+            
+            // Entity changes and domains are loaded in parallel
+            const [entitiesChanged, domainsChanged] = await Promise.all([
                 this.loadEntities(),
                 this.loadDomains()
             ]);
             
+            if (entitiesChanged || !this.entityStats) {
+                this.entityStats = await this.entityQuery.call('load', this.entities);
+            }
             this.isLoading = false;
-            this.filterEntities();
+            await this.filterEntities();
+            // The cached snapshot is only rewritten when something changed
+            if (this.revision && (entitiesChanged || domainsChanged)) {
+                this.snapshotCache.write({ revision: this.revision, entities: this.entities, domains: this.domains });
+            }
         } catch (error) {
             console.error('Entity Manager: Error loading data:', error);
             this.isLoading = false;
@@ -89,13 +424,33 @@ class EntityManagerCard extends HTMLElement {
         }
     }
 
+    async loadCachedSnapshot() {
+        const snapshot = await this.snapshotCache.read();
+        if (!snapshot || this.entities.length) return false;
+        this.debug("Rendering cached snapshot", { revision: snapshot.revision, count: snapshot.entities.length });
+        this.revision = snapshot.revision;
+        this.entities = snapshot.entities;
+        this.domains = snapshot.domains;
+        this.entityStats = await this.entityQuery.call('load', this.entities);
+        return true;
+    }
+
     async loadEntities() {
         try {
-            this.debug("Attempting to load entities from API");
-            const entities = await this._hass.callApi('GET', 'entity_manager/entities');
-            this.debug("Entities loaded successfully", { count: entities.length });
-            this.entities = entities;
-            return entities;
+            this.debug("Attempting to load entity changes from API", { since: this.revision });
+            const response = await this._hass.callApi('GET', `entity_manager/entities?since=${encodeURIComponent(this.revision || '')}`);
+            this.revision = response.revision;
+            if (response.full) {
+                this.debug("Entities loaded successfully", { count: response.entities.length });
+                this.entities = response.entities;
+                return true;
+            }
+            
+            this.debug("Entity changes loaded successfully", { changed: response.changed.length, removed: response.removed.length });
+            if (!response.changed.length && !response.removed.length) return false;
+            this.entities = mergeEntityChanges(this.entities, response.changed, response.removed);
+            response.removed.forEach(entityId => this.selectedEntities.delete(entityId));
+            return true;
         } catch (error) {
             console.error('Error loading entities:', error);
             this.debug("Failed to load entities", error);
@@ -104,7 +459,7 @@ class EntityManagerCard extends HTMLElement {
             if (error.message.includes('404')) {
                 console.warn('Entity Manager API not available. Is the integration installed and running?');
                 this.renderError('Entity Manager não está instalado ou não está funcionando. Verifique se a integração está ativa em Configurações > Integrações.');
-                return [];
+                return false;
             }
             throw error;
         }
@@ -115,8 +470,9 @@ class EntityManagerCard extends HTMLElement {
             this.debug("Attempting to load domains from API");
             const domains = await this._hass.callApi('GET', 'entity_manager/domains');
             this.debug("Domains loaded successfully", { count: domains.length });
+            const changed = JSON.stringify(domains) !== JSON.stringify(this.domains);
             this.domains = domains;
-            return domains;
+            return changed;
         } catch (error) {
             console.error('Error loading domains:', error);
             this.debug("Failed to load domains", error);
@@ -124,58 +480,55 @@ class EntityManagerCard extends HTMLElement {
             // Try alternative endpoint or show helpful error
             if (error.message.includes('404')) {
                 console.warn('Entity Manager API not available. Is the integration installed and running?');
-                return [];
+                return false;
             }
             throw error;
         }
     }
 
-    filterEntities(options = {}) {
+    async filterEntities(options = {}) {
         const currentFilters = this.getCurrentFilterValues();
+        const seq = ++this.filterSeq;
+        clearTimeout(this.searchTimer);
         
+        let filteredEntities;
         if (options.useReportFilter) {
             const reportEntityIdsSet = new Set(this.reportEntityIds);
-            this.filteredEntities = this.entities.filter(entity => reportEntityIdsSet.has(entity.entity_id));
+            filteredEntities = this.entities.filter(entity => reportEntityIdsSet.has(entity.entity_id));
         } else {
-            const searchText = currentFilters.search.toLowerCase();
-            const stateFilter = currentFilters.state;
-            const integrationFilter = currentFilters.integration;
-            const domainFilter = currentFilters.domain;
-            const enabledFilter = currentFilters.enabled;
-            const recorderFilter = currentFilters.recorder;
-
-            this.filteredEntities = this.entities.filter(entity => {
-                let matchesState = true;
-                if (stateFilter) {
-                    switch (stateFilter) {
-                        case 'normal': matchesState = entity.state !== 'unavailable' && entity.state !== 'unknown' && entity.state !== 'disabled' && entity.state !== null && entity.state !== ''; break;
-                        case 'unavailable': matchesState = entity.state === 'unavailable'; break;
-                        case 'unknown': matchesState = entity.state === 'unknown'; break;
-                        case 'disabled': matchesState = entity.state === 'disabled'; break;
-                        case 'not_provided': matchesState = entity.state === null || entity.state === ''; break;
-                    }
-                }
-                if (!matchesState) return false;
-                if (enabledFilter && (enabledFilter === 'enabled' ? !entity.enabled : entity.enabled)) return false;
-                if (recorderFilter && (recorderFilter === 'excluded' ? !entity.recorder_exclude : entity.recorder_exclude)) return false;
-                if (integrationFilter && entity.integration_domain !== integrationFilter) return false;
-                if (domainFilter && entity.domain !== domainFilter) return false;
-                if (searchText && !entity.entity_id.includes(searchText) && !(entity.name || '').toLowerCase().includes(searchText)) return false;
-                return true;
-            });
+            const entities = this.entities;
+            const { indices } = await this.entityQuery.call('query', { filters: currentFilters, sort: currentFilters.sort });
+            // Drop results overtaken by a newer filter or a reload
+            if (seq !== this.filterSeq || entities !== this.entities) return;
+            filteredEntities = Array.from(indices, index => entities[index]);
         }
+        this.filteredEntities = filteredEntities;
+        this.filteredIndex = new Map(this.filteredEntities.map((entity, index) => [entity.entity_id, index]));
         
         this.clearInvisibleSelections();
-        this.render(currentFilters);
+        if (this.gridContainer?.isConnected) {
+            // Only the grid depends on the filters; keep the rest of the card
+            this.gridContainer.scrollTop = 0;
+            this.renderVisibleRows();
+            this.updateStats();
+            this.updateSelectionSummary();
+        } else {
+            this.render(currentFilters);
+        }
+    }
+
+    scheduleFilter() {
+        clearTimeout(this.searchTimer);
+        this.searchTimer = setTimeout(() => this.filterEntities(), SEARCH_DEBOUNCE_MS);
     }
 
     render(preservedFilters = null) {
         const title = this._config?.title || "Gerenciador de Entidades";
         const version = "v44.0-DOMAIN-MANAGEMENT-RECORDER-YAML-FIXED";
-        const enabledCount = this.entities.filter(e => e.enabled).length;
-        const excludedCount = this.entities.filter(e => e.recorder_exclude).length;
-        const integrations = [...new Set(this.entities.map(e => e.integration_domain).filter(Boolean))].sort();
-        const domains = [...new Set(this.entities.map(e => e.domain).filter(Boolean))].sort();
+        const stats = this.entityStats || { enabled: 0, excluded: 0, integrations: [], domains: [], areas: [] };
+        const enabledCount = stats.enabled;
+        const excludedCount = stats.excluded;
+        const { integrations, domains, areas } = stats;
 
         this.shadowRoot.innerHTML = `
             <style>
@@ -219,15 +572,18 @@ class EntityManagerCard extends HTMLElement {
                 .exclusion-bar { width: 100px; height: 8px; background: #eee; border-radius: 4px; overflow: hidden; }
                 .exclusion-fill { height: 100%; background: linear-gradient(90deg, #4caf50, #ff9800); transition: width 0.3s ease; }
                 
-                .filters { display: grid; grid-template-columns: 2fr 1fr 1fr 1fr 1fr 1fr; gap: 12px; padding: 16px; background: var(--secondary-background-color); border-bottom: 1px solid var(--divider-color); }
+                .filters { display: grid; grid-template-columns: 2fr 1fr 1fr 1fr 1fr 1fr 1fr 1fr; gap: 12px; padding: 16px; background: var(--secondary-background-color); border-bottom: 1px solid var(--divider-color); }
                 input, select { width: 100%; padding: 8px 12px; border-radius: 6px; border: 1px solid var(--divider-color); background: var(--card-background-color); color: var(--primary-text-color); box-sizing: border-box; font-size: 14px; }
                 .bulk-actions { display: flex; flex-wrap: wrap; gap: 8px; padding: 16px; align-items: center; background: var(--secondary-background-color); border-bottom: 1px solid var(--divider-color); }
-                .entities-container { flex: 1; overflow-y: auto; max-height: 60vh; background: var(--card-background-color); }
-                .entity-row { display: grid; grid-template-columns: auto 1fr auto auto auto auto auto auto; align-items: center; gap: 12px; padding: 12px 16px; border-bottom: 1px solid var(--divider-color); }
+                .entities-container { flex: 1; overflow-y: auto; max-height: 60vh; background: var(--card-background-color); overflow-anchor: none; }
+                .virtual-spacer { position: relative; width: 100%; }
+                .entity-row { display: grid; grid-template-columns: auto 1fr auto auto auto auto auto auto; align-items: center; gap: 12px; padding: 0 16px; border-bottom: 1px solid var(--divider-color); position: absolute; top: 0; left: 0; right: 0; height: ${ROW_HEIGHT}px; box-sizing: border-box; contain: strict; background: var(--card-background-color); }
+                .entity-row[hidden], .message[hidden] { display: none; }
                 .entity-row.disabled { opacity: 0.6; }
                 .entity-row.excluded { background: rgba(255, 152, 0, 0.1); }
-                .entity-info .name { font-weight: 500; }
-                .entity-info .id { font-size: 0.85em; color: var(--secondary-text-color); }
+                .entity-info { min-width: 0; }
+                .entity-info .name { font-weight: 500; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+                .entity-info .id { font-size: 0.85em; color: var(--secondary-text-color); white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
                 .entity-state { font-size: 0.9em; text-align: center; padding: 4px 8px; border-radius: 12px; background: var(--state-icon-color, var(--primary-color)); color: var(--text-primary-color); min-width: 60px; font-weight: 500; }
                 .entity-state.unavailable { background: var(--warning-color, #ff9800); }
                 .entity-state.unknown { background: var(--error-color, #f44336); }
@@ -498,7 +854,7 @@ class EntityManagerCard extends HTMLElement {
                     <button class="view-btn ${this.currentView === 'domains' ? 'active' : ''}" id="domainsViewBtn">📁 Domínios</button>
                 </div>
                 
-                ${this.renderContent(enabledCount, excludedCount, integrations, domains)}
+                ${this.renderContent(enabledCount, excludedCount, integrations, domains, areas)}
             </ha-card>
             
             <!-- MODAL DE PROGRESSO -->
@@ -532,16 +888,16 @@ class EntityManagerCard extends HTMLElement {
         this.updateSelectAllCheckbox();
     }
 
-    renderContent(enabledCount, excludedCount, integrations, domains) {
+    renderContent(enabledCount, excludedCount, integrations, domains, areas) {
         if (this.isLoading) return `<div class="message">Carregando dados...</div>`;
         
         const statsBar = `
             <div class="stats-bar">
-                <div class="stat-item"><span class="stat-value">${this.entities.length}</span><span class="stat-label">TOTAL</span></div>
-                <div class="stat-item"><span class="stat-value">${enabledCount}</span><span class="stat-label">HABILITADAS</span></div>
-                <div class="stat-item"><span class="stat-value">${this.entities.length - enabledCount}</span><span class="stat-label">DESABILITADAS</span></div>
-                <div class="stat-item"><span class="stat-value">${excludedCount}</span><span class="stat-label">EXCLUÍDAS REC.</span></div>
-                <div class="stat-item"><span class="stat-value">${this.currentView === 'entities' ? this.filteredEntities.length : this.domains.length}</span><span class="stat-label">EXIBIDAS</span></div>
+                <div class="stat-item"><span class="stat-value" id="statTotal">${this.entities.length}</span><span class="stat-label">TOTAL</span></div>
+                <div class="stat-item"><span class="stat-value" id="statEnabled">${enabledCount}</span><span class="stat-label">HABILITADAS</span></div>
+                <div class="stat-item"><span class="stat-value" id="statDisabled">${this.entities.length - enabledCount}</span><span class="stat-label">DESABILITADAS</span></div>
+                <div class="stat-item"><span class="stat-value" id="statExcluded">${excludedCount}</span><span class="stat-label">EXCLUÍDAS REC.</span></div>
+                <div class="stat-item"><span class="stat-value" id="statShown">${this.currentView === 'entities' ? this.filteredEntities.length : this.domains.length}</span><span class="stat-label">EXIBIDAS</span></div>
             </div>
         `;
         
@@ -557,35 +913,21 @@ class EntityManagerCard extends HTMLElement {
         if (this.currentView === 'domains') {
             return statsBar + specialActions + this.renderDomainsView();
         } else {
-            return statsBar + specialActions + this.renderEntitiesView(integrations, domains);
+            return statsBar + specialActions + this.renderEntitiesView(integrations, domains, areas);
         }
     }
 
-    renderDomainsView() {
-        return `
-            <div class="domain-actions ${this.isProcessing ? 'bulk-actions-disabled' : ''}">
-                <label><input type="checkbox" id="selectAllDomainsCheckbox" ${this.isProcessing ? 'disabled' : ''}> Selecionar Todos</label>
-                <input id="bulkDomainRecorderDays" type="number" min="1" max="730" placeholder="Dias de retenção" style="width: 140px;" ${this.isProcessing ? 'disabled' : ''}>
-                <button id="setDomainRecorderDaysBtn" ${this.isProcessing ? 'disabled' : ''}>Definir Dias</button>
-                <button id="excludeSelectedDomainsBtn" class="recorder-exclude" ${this.isProcessing ? 'disabled' : ''}>Excluir do Recorder</button>
-                <button id="includeSelectedDomainsBtn" ${this.isProcessing ? 'disabled' : ''}>Incluir no Recorder</button>
-                <span class="selected-count">${this.selectedDomains.size} domínio(s) selecionado(s)</span>
-            </div>
-            <div class="domain-container">
-                ${this.domains.length === 0 ? `<div class="message">Nenhum domínio encontrado.</div>` : this.domains.map(domain => this.renderDomainRow(domain)).join('')}
-            </div>
-        `;
-    }
-
-    renderEntitiesView(integrations, domains) {
+    renderEntitiesView(integrations, domains, areas) {
         return `
             <div class="filters">
                 <input id="searchFilter" placeholder="Buscar entidades..." class="filter-input" ${this.isProcessing ? 'disabled' : ''}>
                 <select id="stateFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Estado (Todos)</option><option value="normal">Normal</option><option value="unavailable">Indisponível</option><option value="unknown">Desconhecido</option><option value="disabled">Desabilitado</option><option value="not_provided">Não Fornecido</option></select>
                 <select id="integrationFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Integração (Todas)</option>${integrations.map(i => `<option value="${i}">${i}</option>`).join('')}</select>
+                <select id="areaFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Área (Todas)</option>${areas.map(([id, name]) => `<option value="${id}">${name}</option>`).join('')}</select>
                 <select id="domainFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Domínio (Todos)</option>${domains.map(d => `<option value="${d}">${d}</option>`).join('')}</select>
                 <select id="enabledFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Status (Todos)</option><option value="enabled">Habilitados</option><option value="disabled">Desabilitados</option></select>
                 <select id="recorderFilter" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Recorder (Todos)</option><option value="excluded">Excluídos</option><option value="included">Incluídos</option></select>
+                <select id="sortOrder" class="filter-input" ${this.isProcessing ? 'disabled' : ''}><option value="">Ordem (Padrão)</option><option value="name">Nome</option><option value="entity_id">ID</option><option value="recorder_days">Dias no Recorder</option></select>
             </div>
             <div class="bulk-actions ${this.isProcessing ? 'bulk-actions-disabled' : ''}">
                 <label><input type="checkbox" id="selectAllCheckbox" ${this.isProcessing ? 'disabled' : ''}> Selecionar Todos</label>
@@ -598,76 +940,194 @@ class EntityManagerCard extends HTMLElement {
                 <button id="deleteSelectedBtn" class="danger" ${this.isProcessing ? 'disabled' : ''}>Excluir</button>
                 <span class="selected-count">${this.selectedEntities.size} selecionada(s)</span>
             </div>
-            <div class="entities-container">
-                ${this.filteredEntities.length === 0 ? `<div class="message">Nenhuma entidade encontrada.</div>` : this.filteredEntities.map(entity => this.renderEntityRow(entity)).join('')}
+            <div class="entities-container" id="entitiesContainer">
+                <div class="message" id="noEntitiesMessage" hidden>Nenhuma entidade encontrada.</div>
+                <div class="virtual-spacer" id="virtualSpacer"></div>
             </div>
         `;
     }
 
-    renderDomainRow(domain) {
-        const isSelected = this.selectedDomains.has(domain.domain);
-        const statusClass = domain.status;
-        const rowClass = statusClass === 'fully_excluded' ? 'fully-excluded' : 
-                         statusClass === 'partially_excluded' ? 'partially-excluded' : '';
-        
-        return `
-            <div class="domain-row ${rowClass}" data-domain="${domain.domain}">
-                <input type="checkbox" data-select-domain ${isSelected ? 'checked' : ''} ${this.isProcessing ? 'disabled' : ''}>
-                <div class="domain-info">
-                    <div class="domain-name">${domain.domain}</div>
-                    <div class="domain-stats">${domain.total_entities} entidades • ${domain.excluded_entities} excluídas • ${domain.enabled_entities} habilitadas</div>
-                    <div class="domain-config">${domain.has_domain_config ? 'Configurado' : 'Usando padrão'} • ${domain.recorder_days || 10} dias de retenção</div>
-                </div>
-                <div class="domain-status ${statusClass.replace('_', '-')}">${this.getDomainStatusText(domain.status)}</div>
-                <div class="exclusion-bar">
-                    <div class="exclusion-fill" style="width: ${domain.exclusion_percentage}%"></div>
+    createEntityRow() {
+        if (!this.rowTemplate) {
+            this.rowTemplate = document.createElement('template');
+            this.rowTemplate.innerHTML = `
+                <div class="entity-row">
+                    <input type="checkbox" data-select>
+                    <div class="entity-info">
+                        <div class="name"></div>
+                        <div class="id"></div>
+                    </div>
+                    <div class="entity-state"></div>
+                    <label class="toggle-switch">
+                        <input type="checkbox" data-enable-toggle>
+                        <span class="slider"></span>
+                    </label>
+                    <input type="number" data-recorder min="0" max="365" title="Dias no Recorder">
+                    <label class="recorder-exclude-switch">
+                        <input type="checkbox" data-recorder-exclude-toggle>
+                        <span class="recorder-exclude-slider"></span>
+                    </label>
+                    <button class="icon-button" data-purge title="Limpar Histórico">🗑️</button>
+                    <button class="icon-button danger" data-delete title="Excluir Entidade">❌</button>
                 </div>
-                <div style="text-align: center; font-weight: 600;">${domain.exclusion_percentage}%</div>
-                <input type="number" data-domain-recorder value="${domain.recorder_days || 10}" min="1" max="730" title="Dias de Retenção do Domínio" ${this.isProcessing ? 'disabled' : ''}>
-                <button class="icon-button" data-exclude-domain title="Excluir Domínio" ${this.isProcessing ? 'disabled' : ''}>🚫</button>
-                <button class="icon-button" data-include-domain title="Incluir Domínio" ${this.isProcessing ? 'disabled' : ''}>✅</button>
-            </div>
-        `;
-    }
-
-    getDomainStatusText(status) {
-        switch(status) {
-            case 'fully_excluded': return 'Totalmente Excluído';
-            case 'partially_excluded': return 'Parcialmente Excluído';
-            case 'included': return 'Incluído';
-            case 'empty': return 'Vazio';
-            default: return 'Desconhecido';
+            `;
         }
+        const row = this.rowTemplate.content.firstElementChild.cloneNode(true);
+        row.refs = {
+            select: row.querySelector('[data-select]'),
+            name: row.querySelector('.name'),
+            id: row.querySelector('.id'),
+            state: row.querySelector('.entity-state'),
+            enableLabel: row.querySelector('.toggle-switch'),
+            enableToggle: row.querySelector('[data-enable-toggle]'),
+            recorder: row.querySelector('[data-recorder]'),
+            excludeLabel: row.querySelector('.recorder-exclude-switch'),
+            excludeToggle: row.querySelector('[data-recorder-exclude-toggle]'),
+            purge: row.querySelector('[data-purge]'),
+            delete: row.querySelector('[data-delete]'),
+        };
+        return row;
     }
 
-    renderEntityRow(entity) {
-        const isSelected = this.selectedEntities.has(entity.entity_id);
+    updateEntityRow(row, entity) {
+        const refs = row.refs;
         const isEnabled = entity.enabled;
         const isRecorderExcluded = entity.recorder_exclude;
         const stateClass = entity.state === 'unavailable' ? 'unavailable' : entity.state === 'unknown' ? 'unknown' : entity.state === 'disabled' ? 'disabled' : '';
-        const rowClass = `${isEnabled ? '' : 'disabled'} ${isRecorderExcluded ? 'excluded' : ''}`;
+        const name = entity.name || entity.entity_id;
         
-        return `
-            <div class="entity-row ${rowClass}" data-entity-id="${entity.entity_id}">
-                <input type="checkbox" data-select ${isSelected ? 'checked' : ''} ${this.isProcessing ? 'disabled' : ''}>
-                <div class="entity-info">
-                    <div class="name" title="${entity.name || entity.entity_id}">${entity.name || entity.entity_id}</div>
-                    <div class="id" title="${entity.entity_id}">${entity.entity_id}</div>
-                </div>
-                <div class="entity-state ${stateClass}" title="Estado: ${entity.state}">${entity.state}</div>
-                <label class="toggle-switch" title="${isEnabled ? 'Habilitado' : 'Desabilitado'}">
-                    <input type="checkbox" data-enable-toggle ${isEnabled ? 'checked' : ''} ${this.isProcessing ? 'disabled' : ''}>
-                    <span class="slider"></span>
-                </label>
-                <input type="number" data-recorder value="${entity.recorder_days || 10}" min="0" max="365" title="Dias no Recorder" ${this.isProcessing ? 'disabled' : ''}>
-                <label class="recorder-exclude-switch" title="${isRecorderExcluded ? 'Excluído do Recorder' : 'Incluído no Recorder'}">
-                    <input type="checkbox" data-recorder-exclude-toggle ${isRecorderExcluded ? 'checked' : ''} ${this.isProcessing ? 'disabled' : ''}>
-                    <span class="recorder-exclude-slider"></span>
-                </label>
-                <button class="icon-button" data-purge title="Limpar Histórico" ${this.isProcessing ? 'disabled' : ''}>🗑️</button>
-                <button class="icon-button danger" data-delete title="Excluir Entidade" ${this.isProcessing ? 'disabled' : ''}>❌</button>
-            </div>
-        `;
+        row.entity = entity;
+        row.dataset.entityId = entity.entity_id;
+        row.className = `entity-row ${isEnabled ? '' : 'disabled'} ${isRecorderExcluded ? 'excluded' : ''}`;
+        refs.select.checked = this.selectedEntities.has(entity.entity_id);
+        refs.name.textContent = name;
+        refs.name.title = name;
+        refs.id.textContent = entity.entity_id;
+        refs.id.title = entity.entity_id;
+        refs.state.className = `entity-state ${stateClass}`;
+        refs.state.textContent = entity.state;
+        refs.state.title = `Estado: ${entity.state}`;
+        refs.enableLabel.title = isEnabled ? 'Habilitado' : 'Desabilitado';
+        refs.enableToggle.checked = !!isEnabled;
+        refs.recorder.value = entity.recorder_days || 10;
+        refs.excludeLabel.title = isRecorderExcluded ? 'Excluído do Recorder' : 'Incluído no Recorder';
+        refs.excludeToggle.checked = !!isRecorderExcluded;
+        for (const control of [refs.select, refs.enableToggle, refs.recorder, refs.excludeToggle, refs.purge, refs.delete]) {
+            control.disabled = this.isProcessing;
+        }
+    }
+
+    mountGrid() {
+        const root = this.shadowRoot;
+        this.gridContainer = root.getElementById('entitiesContainer');
+        this.gridSpacer = root.getElementById('virtualSpacer');
+        this.visibleRows = new Map();
+        this.rowPool = [];
+        if (!this.gridContainer) return;
+        
+        // Rows are recycled, so their events are handled once on the container
+        this.gridContainer.addEventListener('change', (e) => {
+            const row = e.target.closest('.entity-row');
+            if (!row) return;
+            const entityId = row.dataset.entityId;
+            if (e.target.matches('[data-select]')) this.toggleSelection(entityId, e.target.checked);
+            else if (e.target.matches('[data-enable-toggle]')) this.toggleEntityEnabled(entityId, e.target.checked);
+            else if (e.target.matches('[data-recorder]')) this.updateRecorderDays(entityId, e.target.value);
+            else if (e.target.matches('[data-recorder-exclude-toggle]')) this.toggleRecorderExclude(entityId, e.target.checked);
+        });
+        this.gridContainer.addEventListener('click', (e) => {
+            const button = e.target.closest('[data-purge], [data-delete]');
+            const row = button?.closest('.entity-row');
+            if (!row) return;
+            if (button.matches('[data-purge]')) this.handlePurgeEntity(row.dataset.entityId);
+            else this.handleDeleteEntity(row.dataset.entityId);
+        });
+        this.gridContainer.addEventListener('scroll', () => {
+            if (this.scrollFrame) return;
+            this.scrollFrame = requestAnimationFrame(() => {
+                this.scrollFrame = null;
+                this.renderVisibleRows();
+            });
+        }, { passive: true });
+        
+        this.renderVisibleRows();
+    }
+
+    renderVisibleRows() {
+        const container = this.gridContainer;
+        if (!container) return;
+        const total = this.filteredEntities.length;
+        this.gridSpacer.style.height = `${total * ROW_HEIGHT}px`;
+        this.shadowRoot.getElementById('noEntitiesMessage').hidden = total > 0;
+        
+        const viewportHeight = container.clientHeight || window.innerHeight;
+        const first = Math.max(0, Math.floor(container.scrollTop / ROW_HEIGHT) - ROW_OVERSCAN);
+        const last = Math.min(total, Math.ceil((container.scrollTop + viewportHeight) / ROW_HEIGHT) + ROW_OVERSCAN);
+        
+        // Keep rows whose entity is still in range, recycle the others
+        const rows = new Map();
+        for (const [entityId, row] of this.visibleRows) {
+            const index = this.filteredIndex.get(entityId);
+            if (index !== undefined && index >= first && index < last) {
+                rows.set(entityId, row);
+            } else {
+                row.hidden = true;
+                this.rowPool.push(row);
+            }
+        }
+        
+        for (let index = first; index < last; index++) {
+            const entity = this.filteredEntities[index];
+            let row = rows.get(entity.entity_id);
+            if (!row) {
+                row = this.rowPool.pop();
+                if (!row) {
+                    row = this.createEntityRow();
+                    this.gridSpacer.appendChild(row);
+                }
+                rows.set(entity.entity_id, row);
+            }
+            if (row.entity !== entity) this.updateEntityRow(row, entity);
+            if (row.index !== index) {
+                row.index = index;
+                row.style.transform = `translateY(${index * ROW_HEIGHT}px)`;
+            }
+            row.hidden = false;
+        }
+        this.visibleRows = rows;
+    }
+
+    async updateEntity(entityId, changes) {
+        const index = this.entities.findIndex(e => e.entity_id === entityId);
+        if (index === -1) return;
+        Object.assign(this.entities[index], changes);
+        // Keyed update: only the row of the changed entity is touched
+        const row = this.visibleRows.get(entityId);
+        if (row) this.updateEntityRow(row, row.entity);
+        this.entityStats = await this.entityQuery.call('update', { index, ...changes });
+        this.updateStats();
+    }
+
+    updateStats() {
+        const root = this.shadowRoot;
+        const stats = this.entityStats || { enabled: 0, excluded: 0 };
+        const values = {
+            statTotal: this.entities.length,
+            statEnabled: stats.enabled,
+            statDisabled: this.entities.length - stats.enabled,
+            statExcluded: stats.excluded,
+            statShown: this.currentView === 'entities' ? this.filteredEntities.length : this.domains.length,
+        };
+        for (const [id, value] of Object.entries(values)) {
+            const el = root.getElementById(id);
+            if (el) el.textContent = value;
+        }
+    }
+
+    updateSelectionSummary() {
+        const counter = this.shadowRoot.querySelector('.bulk-actions .selected-count');
+        if (counter) counter.textContent = `${this.selectedEntities.size} selecionada(s)`;
+        this.updateSelectAllCheckbox();
     }
 
     attachEventListeners() {
@@ -679,7 +1139,7 @@ class EntityManagerCard extends HTMLElement {
         
         // Basic event listeners
         root.getElementById('refreshBtn')?.addEventListener('click', () => this.loadData());
-        root.getElementById('generateReportBtn')?.addEventListener('click', () => this.handleGenerateReport());
+        root.getElementById('generateReportBtn')?.addEventListener('click', () => this.loadModule('reports').then(() => this.handleGenerateReport()));
         root.getElementById('intelligentPurgeBtn')?.addEventListener('click', () => alert("Função de limpeza inteligente ainda não implementada."));
         root.getElementById('updateRecorderConfigBtn')?.addEventListener('click', () => this.handleUpdateRecorderConfig());
         root.getElementById('purgeAllEntitiesBtn')?.addEventListener('click', () => this.handlePurgeAllEntities());
@@ -701,6 +1161,7 @@ class EntityManagerCard extends HTMLElement {
         // Filters
         root.querySelectorAll('.filter-input').forEach(el => el.addEventListener('change', () => this.filterEntities()));
         root.getElementById('searchFilter')?.addEventListener('keypress', (e) => e.key === 'Enter' && this.filterEntities());
+        root.getElementById('searchFilter')?.addEventListener('input', () => this.scheduleFilter());
 
         // Bulk actions
         root.getElementById('selectAllCheckbox')?.addEventListener('change', (e) => this.toggleSelectAll(e.target.checked));
@@ -712,15 +1173,80 @@ class EntityManagerCard extends HTMLElement {
         root.getElementById('deleteSelectedBtn')?.addEventListener('click', () => this.handleBulkAction('delete'));
 
         // Entity rows
-        root.querySelectorAll('.entity-row').forEach(row => {
-            const entityId = row.dataset.entityId;
-            row.querySelector('[data-select]')?.addEventListener('change', (e) => this.toggleSelection(entityId, e.target.checked));
-            row.querySelector('[data-enable-toggle]')?.addEventListener('change', (e) => this.toggleEntityEnabled(entityId, e.target.checked));
-            row.querySelector('[data-recorder]')?.addEventListener('change', (e) => this.updateRecorderDays(entityId, e.target.value));
-            row.querySelector('[data-recorder-exclude-toggle]')?.addEventListener('change', (e) => this.toggleRecorderExclude(entityId, e.target.checked));
-            row.querySelector('[data-purge]')?.addEventListener('click', () => this.handlePurgeEntity(entityId));
-            row.querySelector('[data-delete]')?.addEventListener('click', () => this.handleDeleteEntity(entityId));
-        });
+        this.mountGrid();
+    }
+
+    // Rarely used features are wrapped in "@module <name>" comments. The
+    // bundle served by the panel moves them to files imported here on first
+    // use; when this file is loaded as is they are already defined.
+    async loadModule(name) {
+        const url = EntityManagerCard.moduleUrls && EntityManagerCard.moduleUrls[name];
+        if (url) await import(url);
+    }
+
+    async switchView(view) {
+        if (view === this.currentView) return;
+        if (view === 'domains') await this.loadModule('domains');
+        
+        this.currentView = view;
+        this.selectedEntities.clear();
+        this.selectedDomains.clear();
+        this.render(this.getCurrentFilterValues());
+    }
+
+    // @module domains
+    // DOMAIN-RELATED METHODS
+
+    renderDomainsView() {
+        return `
+            <div class="domain-actions ${this.isProcessing ? 'bulk-actions-disabled' : ''}">
+                <label><input type="checkbox" id="selectAllDomainsCheckbox" ${this.isProcessing ? 'disabled' : ''}> Selecionar Todos</label>
+                <input id="bulkDomainRecorderDays" type="number" min="1" max="730" placeholder="Dias de retenção" style="width: 140px;" ${this.isProcessing ? 'disabled' : ''}>
+                <button id="setDomainRecorderDaysBtn" ${this.isProcessing ? 'disabled' : ''}>Definir Dias</button>
+                <button id="excludeSelectedDomainsBtn" class="recorder-exclude" ${this.isProcessing ? 'disabled' : ''}>Excluir do Recorder</button>
+                <button id="includeSelectedDomainsBtn" ${this.isProcessing ? 'disabled' : ''}>Incluir no Recorder</button>
+                <span class="selected-count">${this.selectedDomains.size} domínio(s) selecionado(s)</span>
+            </div>
+            <div class="domain-container">
+                ${this.domains.length === 0 ? `<div class="message">Nenhum domínio encontrado.</div>` : this.domains.map(domain => this.renderDomainRow(domain)).join('')}
+            </div>
+        `;
+    }
+
+    renderDomainRow(domain) {
+        const isSelected = this.selectedDomains.has(domain.domain);
+        const statusClass = domain.status;
+        const rowClass = statusClass === 'fully_excluded' ? 'fully-excluded' : 
+                         statusClass === 'partially_excluded' ? 'partially-excluded' : '';
+        
+        return `
+            <div class="domain-row ${rowClass}" data-domain="${domain.domain}">
+                <input type="checkbox" data-select-domain ${isSelected ? 'checked' : ''} ${this.isProcessing ? 'disabled' : ''}>
+                <div class="domain-info">
+                    <div class="domain-name">${domain.domain}</div>
+                    <div class="domain-stats">${domain.total_entities} entidades • ${domain.excluded_entities} excluídas • ${domain.enabled_entities} habilitadas</div>
+                    <div class="domain-config">${domain.has_domain_config ? 'Configurado' : 'Usando padrão'} • ${domain.recorder_days || 10} dias de retenção</div>
+                </div>
+                <div class="domain-status ${statusClass.replace('_', '-')}">${this.getDomainStatusText(domain.status)}</div>
+                <div class="exclusion-bar">
+                    <div class="exclusion-fill" style="width: ${domain.exclusion_percentage}%"></div>
+                </div>
+                <div style="text-align: center; font-weight: 600;">${domain.exclusion_percentage}%</div>
+                <input type="number" data-domain-recorder value="${domain.recorder_days || 10}" min="1" max="730" title="Dias de Retenção do Domínio" ${this.isProcessing ? 'disabled' : ''}>
+                <button class="icon-button" data-exclude-domain title="Excluir Domínio" ${this.isProcessing ? 'disabled' : ''}>🚫</button>
+                <button class="icon-button" data-include-domain title="Incluir Domínio" ${this.isProcessing ? 'disabled' : ''}>✅</button>
+            </div>
+        `;
+    }
+
+    getDomainStatusText(status) {
+        switch(status) {
+            case 'fully_excluded': return 'Totalmente Excluído';
+            case 'partially_excluded': return 'Parcialmente Excluído';
+            case 'included': return 'Incluído';
+            case 'empty': return 'Vazio';
+            default: return 'Desconhecido';
+        }
     }
 
     attachDomainEventListeners() {
@@ -742,17 +1268,6 @@ class EntityManagerCard extends HTMLElement {
         });
     }
 
-    switchView(view) {
-        if (view === this.currentView) return;
-        
-        this.currentView = view;
-        this.selectedEntities.clear();
-        this.selectedDomains.clear();
-        this.render(this.getCurrentFilterValues());
-    }
-
-    // DOMAIN-RELATED METHODS
-
     toggleDomainSelection(domain, isSelected) {
         if (isSelected) {
             this.selectedDomains.add(domain);
@@ -891,6 +1406,8 @@ class EntityManagerCard extends HTMLElement {
         }
     }
 
+    // @end module
+
     // PROGRESS MODAL METHODS
 
     async testProgressModal() {
@@ -1055,6 +1572,7 @@ class EntityManagerCard extends HTMLElement {
         }
     }
 
+    // @module reports
     // REPORT GENERATION - FIXED
 
     async handleGenerateReport() {
@@ -1304,11 +1822,14 @@ class EntityManagerCard extends HTMLElement {
         root.getElementById('searchFilter').value = '';
         root.getElementById('stateFilter').value = '';
         root.getElementById('integrationFilter').value = '';
+        root.getElementById('areaFilter').value = '';
         root.getElementById('domainFilter').value = '';
         root.getElementById('enabledFilter').value = '';
         root.getElementById('recorderFilter').value = '';
     }
 
+    // @end module
+
     // EXISTING METHODS (updated to avoid iteration issues)
 
     async handleBulkAction(action) {
@@ -1433,7 +1954,7 @@ class EntityManagerCard extends HTMLElement {
     }
 
     async handleUpdateRecorderConfig() {
-        const excludedCount = this.entities.filter(e => e.recorder_exclude).length;
+        const excludedCount = this.entityStats?.excluded || 0;
         if (excludedCount === 0) {
             alert("Nenhuma entidade marcada para exclusão do recorder.");
             return;
@@ -1466,7 +1987,7 @@ class EntityManagerCard extends HTMLElement {
     }
 
     async handlePurgeAllEntities() {
-        const excludedCount = this.entities.filter(e => e.recorder_exclude).length;
+        const excludedCount = this.entityStats?.excluded || 0;
         if (excludedCount === 0) {
             alert("Nenhuma entidade marcada para limpeza do recorder.");
             return;
@@ -1497,9 +2018,7 @@ class EntityManagerCard extends HTMLElement {
 
     async toggleRecorderExclude(entityId, exclude) {
         await this.callService('update_recorder_exclude', { entity_id: entityId, recorder_exclude: exclude });
-        const entity = this.entities.find(e => e.entity_id === entityId);
-        if (entity) entity.recorder_exclude = exclude;
-        this.filterEntities();
+        await this.updateEntity(entityId, { recorder_exclude: exclude });
     }
 
     getCurrentFilterValues() {
@@ -1508,9 +2027,11 @@ class EntityManagerCard extends HTMLElement {
             search: root.getElementById('searchFilter')?.value || '',
             state: root.getElementById('stateFilter')?.value || '',
             integration: root.getElementById('integrationFilter')?.value || '',
+            area: root.getElementById('areaFilter')?.value || '',
             domain: root.getElementById('domainFilter')?.value || '',
             enabled: root.getElementById('enabledFilter')?.value || '',
-            recorder: root.getElementById('recorderFilter')?.value || ''
+            recorder: root.getElementById('recorderFilter')?.value || '',
+            sort: root.getElementById('sortOrder')?.value || ''
         };
     }
     
@@ -1520,9 +2041,11 @@ class EntityManagerCard extends HTMLElement {
         root.getElementById('searchFilter').value = filters.search;
         root.getElementById('stateFilter').value = filters.state;
         root.getElementById('integrationFilter').value = filters.integration;
+        root.getElementById('areaFilter').value = filters.area || '';
         root.getElementById('domainFilter').value = filters.domain;
         root.getElementById('enabledFilter').value = filters.enabled;
         root.getElementById('recorderFilter').value = filters.recorder || '';
+        root.getElementById('sortOrder').value = filters.sort || '';
     }
     
     toggleSelectAll(selectAll) {
@@ -1531,23 +2054,25 @@ class EntityManagerCard extends HTMLElement {
             if (selectAll) this.selectedEntities.add(id);
             else this.selectedEntities.delete(id);
         });
-        this.render(this.getCurrentFilterValues());
+        this.visibleRows.forEach(row => { row.refs.select.checked = selectAll; });
+        this.updateSelectionSummary();
     }
 
     updateSelectAllCheckbox() {
         const selectAllCheckbox = this.shadowRoot.getElementById('selectAllCheckbox');
         if (!selectAllCheckbox) return;
-        const visibleEntityIds = this.filteredEntities.map(e => e.entity_id);
-        if (visibleEntityIds.length === 0) {
+        const visibleCount = this.filteredEntities.length;
+        if (visibleCount === 0) {
             selectAllCheckbox.checked = false;
             selectAllCheckbox.indeterminate = false;
             return;
         }
-        const selectedVisibleCount = visibleEntityIds.filter(id => this.selectedEntities.has(id)).length;
+        let selectedVisibleCount = 0;
+        this.selectedEntities.forEach(id => { if (this.filteredIndex.has(id)) selectedVisibleCount++; });
         if (selectedVisibleCount === 0) {
             selectAllCheckbox.checked = false;
             selectAllCheckbox.indeterminate = false;
-        } else if (selectedVisibleCount === visibleEntityIds.length) {
+        } else if (selectedVisibleCount === visibleCount) {
             selectAllCheckbox.checked = true;
             selectAllCheckbox.indeterminate = false;
         } else {
@@ -1558,9 +2083,8 @@ class EntityManagerCard extends HTMLElement {
     
     clearInvisibleSelections() {
         if (this.currentView === 'entities') {
-            const visibleEntityIds = new Set(this.filteredEntities.map(e => e.entity_id));
             this.selectedEntities.forEach(id => {
-                if (!visibleEntityIds.has(id)) this.selectedEntities.delete(id);
+                if (!this.filteredIndex.has(id)) this.selectedEntities.delete(id);
             });
         }
     }
@@ -1568,7 +2092,7 @@ class EntityManagerCard extends HTMLElement {
     toggleSelection(entityId, isSelected) {
         if (isSelected) this.selectedEntities.add(entityId);
         else this.selectedEntities.delete(entityId);
-        this.render(this.getCurrentFilterValues());
+        this.updateSelectionSummary();
     }
 
     async callService(service, data) {
@@ -1582,15 +2106,14 @@ class EntityManagerCard extends HTMLElement {
 
     async toggleEntityEnabled(entityId, enabled) {
         await this.callService('update_entity_state', { entity_id: entityId, enabled: enabled });
-        const entity = this.entities.find(e => e.entity_id === entityId);
-        if (entity) entity.enabled = enabled;
-        this.filterEntities();
+        await this.updateEntity(entityId, { enabled: enabled });
     }
 
     async updateRecorderDays(entityId, days) {
         const numDays = parseInt(days, 10);
         if (isNaN(numDays) || numDays < 0) return;
         await this.callService('update_recorder_days', { entity_id: entityId, recorder_days: numDays });
+        await this.updateEntity(entityId, { recorder_days: numDays });
     }
 
     async handleDeleteEntity(entityId) {
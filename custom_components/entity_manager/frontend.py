@@ -0,0 +1,336 @@
+"""Frontend bundle loaded by the Entity Manager panel.
+
+The current card is split at its "@module <name>" comments into a core
+script and modules the card imports on first use. Each file is minified,
+named after a hash of its content and written with a gzip-compressed copy
+to a directory Home Assistant serves as a static path, like its own
+frontend files: the compressed copy is sent to clients accepting it, and a
+new version of the card gets new names, so browsers can cache the files.
+
+The core script is the module of a custom panel at /entity_manager. Home
+Assistant's frontend serves that page and passes its hass object to the
+card, which then calls the authenticated API.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import re
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from homeassistant.components import frontend, panel_custom
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CARD_SOURCE,
+    FRONTEND_BUILD_DIR,
+    FRONTEND_STATIC_URL,
+    PANEL_COMPONENT,
+    PANEL_ICON,
+    PANEL_TITLE,
+    PANEL_URL_PATH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_MODULE_RE = re.compile(
+    r"^[ \t]*// @module (?P<name>\w+)\n(?P<body>.*?)^[ \t]*// @end module\n",
+    re.DOTALL | re.MULTILINE,
+)
+
+# A module's methods are declared in a class body, as in the card, and copied
+# onto the card's prototype when the module is imported
+_MODULE_TEMPLATE = """const card = customElements.get('entity-manager-card');
+const methods = class {
+%s
+};
+for (const name of Object.getOwnPropertyNames(methods.prototype)) {
+    if (name !== 'constructor') Object.defineProperty(card.prototype, name, Object.getOwnPropertyDescriptor(methods.prototype, name));
+}
+"""
+
+# After these, a "/" starts a regular expression rather than a division
+_REGEX_PREFIX_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_PREFIX_WORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+    "void", "throw", "instanceof", "yield", "await",
+}
+# A line break after or before these never changes automatic semicolon insertion
+_NO_BREAK_AFTER = set("{;,([")
+_NO_BREAK_BEFORE = set("})]")
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char in "_$" or ord(char) > 127
+
+
+def minify_js(source: str) -> str:
+    """Strip comments and indentation from JavaScript.
+
+    Strings, template literals and regular expressions are copied as they
+    are. Elsewhere comments are dropped and each run of whitespace becomes
+    a line break, a space or nothing; line breaks are kept wherever removing
+    one could change automatic semicolon insertion.
+    """
+    out: List[str] = []
+    length = len(source)
+    i = 0
+    last_word = ""  # last identifier or keyword, to tell regexes from divisions
+    templates: List[int] = []  # brace depth at each open "${" of a template literal
+    depth = 0
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ""
+
+    def copy_template(start: int) -> int:
+        """Copy template text from ``start`` up to the closing "`" or a "${"."""
+        j = start
+        while j < length:
+            char = source[j]
+            if char == "\\":
+                j += 2
+                continue
+            if char == "`":
+                out.append(source[start:j + 1])
+                return j + 1
+            if char == "$" and source.startswith("${", j):
+                out.append(source[start:j + 2])
+                templates.append(depth)
+                return j + 2
+            j += 1
+        raise ValueError("Unterminated template literal")
+
+    while i < length:
+        char = source[i]
+
+        # Whitespace and comments
+        if char.isspace() or source.startswith("//", i) or source.startswith("/*", i):
+            newline = False
+            while i < length:
+                if source[i].isspace():
+                    newline = newline or source[i] == "\n"
+                    i += 1
+                elif source.startswith("//", i):
+                    end = source.find("\n", i)
+                    i = length if end == -1 else end
+                elif source.startswith("/*", i):
+                    end = source.find("*/", i + 2)
+                    if end == -1:
+                        raise ValueError("Unterminated comment")
+                    newline = newline or "\n" in source[i:end]
+                    i = end + 2
+                else:
+                    break
+            prev = last_char()
+            following = source[i] if i < length else ""
+            if not prev or not following:
+                continue
+            if newline and prev not in _NO_BREAK_AFTER and following not in _NO_BREAK_BEFORE:
+                out.append("\n")
+            elif (_is_word(prev) and _is_word(following)) or (prev == following and prev in "+-/"):
+                out.append(" ")
+            continue
+
+        if char in "'\"":
+            j = i + 1
+            while j < length and source[j] != char:
+                j += 2 if source[j] == "\\" else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            last_word = ""
+            continue
+
+        if char == "`":
+            i = copy_template(i + 1)
+            out[-1] = "`" + out[-1]
+            last_word = ""
+            continue
+
+        if char == "/":
+            prev = last_char()
+            if not prev or prev in _REGEX_PREFIX_CHARS or prev == "}" or (last_word in _REGEX_PREFIX_WORDS and _is_word(prev)):
+                j = i + 1
+                in_class = False
+                while j < length:
+                    if source[j] == "\\":
+                        j += 2
+                        continue
+                    if source[j] == "\n":
+                        raise ValueError("Unterminated regular expression")
+                    if source[j] == "[":
+                        in_class = True
+                    elif source[j] == "]":
+                        in_class = False
+                    elif source[j] == "/" and not in_class:
+                        break
+                    j += 1
+                j += 1
+                while j < length and _is_word(source[j]):
+                    j += 1
+                out.append(source[i:j])
+                i = j
+                last_word = ""
+                continue
+
+        if _is_word(char):
+            j = i + 1
+            while j < length and _is_word(source[j]):
+                j += 1
+            last_word = source[i:j]
+            out.append(last_word)
+            i = j
+            continue
+
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if templates and templates[-1] == depth:
+                templates.pop()
+                i = copy_template(i + 1)
+                out[-1] = "}" + out[-1]
+                continue
+            depth -= 1
+        out.append(char)
+        last_word = ""
+        i += 1
+
+    return "".join(out) + "\n"
+
+
+def split_modules(source: str) -> Tuple[str, Dict[str, str]]:
+    """Return the source without its "@module" blocks, and the blocks by name."""
+    modules: Dict[str, List[str]] = {}
+
+    def extract(match: "re.Match[str]") -> str:
+        modules.setdefault(match.group("name"), []).append(match.group("body"))
+        return ""
+
+    core = _MODULE_RE.sub(extract, source)
+    return core, {name: "".join(bodies) for name, bodies in modules.items()}
+
+
+class Asset:
+    """One file of the bundle, with its gzip-compressed copy."""
+
+    __slots__ = ("name", "body", "gzipped")
+
+    def __init__(self, stem: str, content: str):
+        """Minify ``content`` and name it ``<stem>.<hash>.js``."""
+        self.body = minify_js(content).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:16]
+        self.name = f"{stem}.{digest}.js"
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+
+class FrontendBundle:
+    """The card's core script and lazily imported modules, built once."""
+
+    def __init__(self, directory: str):
+        """Initialize the bundle for the card found in ``directory``."""
+        self._path = os.path.join(directory, CARD_SOURCE)
+        self.output_dir = os.path.join(directory, FRONTEND_BUILD_DIR)
+        self.assets: Dict[str, Asset] = {}
+        self.entry: Optional[Asset] = None
+        self._building: Optional["asyncio.Future[None]"] = None
+
+    @staticmethod
+    def url(asset: Asset) -> str:
+        """Return the URL an asset is served at."""
+        return f"{FRONTEND_STATIC_URL}/{asset.name}"
+
+    async def async_get_entry(self, hass: HomeAssistant) -> Asset:
+        """Return the core script, building the bundle in the executor on first use."""
+        if self.entry is None:
+            if self._building is None:
+                self._building = hass.async_add_executor_job(self.build)
+            try:
+                await self._building
+            finally:
+                self._building = None
+        return self.entry
+
+    def build(self) -> None:
+        """Split, minify and compress the card and write the files (blocking)."""
+        with open(self._path, encoding="utf-8") as f:
+            source = f.read()
+        core, modules = split_modules(source)
+
+        assets = [Asset(f"entity-manager-{name}", _MODULE_TEMPLATE % body) for name, body in modules.items()]
+        module_urls = {name: self.url(asset) for name, asset in zip(modules, assets)}
+        core += "\nEntityManagerCard.moduleUrls = %s;\n" % _js_object(module_urls)
+        entry = Asset("entity-manager", core)
+        assets.append(entry)
+
+        self._write(assets)
+        self.assets = {asset.name: asset for asset in assets}
+        self.entry = entry
+        _LOGGER.debug(
+            "Built frontend bundle %s: %d bytes from %d (%d gzipped), modules %s",
+            entry.name, len(entry.body), len(source.encode("utf-8")), len(entry.gzipped), ", ".join(module_urls),
+        )
+
+    def _write(self, assets: List[Asset]) -> None:
+        """Write the assets and their gzip copies, and remove files of older builds."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        files = set()
+        for asset in assets:
+            for name, content in ((asset.name, asset.body), (f"{asset.name}.gz", asset.gzipped)):
+                files.add(name)
+                path = os.path.join(self.output_dir, name)
+                if not os.path.exists(path):
+                    with open(path, "wb") as f:
+                        f.write(content)
+        for name in os.listdir(self.output_dir):
+            if name not in files:
+                os.remove(os.path.join(self.output_dir, name))
+
+
+async def async_setup_frontend(hass: HomeAssistant) -> FrontendBundle:
+    """Register the bundle directory as a static path and return the bundle.
+
+    The files themselves are built by async_setup_panel.
+    """
+    bundle = FrontendBundle(os.path.dirname(__file__))
+    await hass.async_add_executor_job(partial(os.makedirs, bundle.output_dir, exist_ok=True))
+    if hasattr(hass.http, "async_register_static_paths"):
+        from homeassistant.components.http import StaticPathConfig
+
+        await hass.http.async_register_static_paths([StaticPathConfig(FRONTEND_STATIC_URL, bundle.output_dir, True)])
+    else:
+        hass.http.register_static_path(FRONTEND_STATIC_URL, bundle.output_dir, cache_headers=True)
+    return bundle
+
+
+async def async_setup_panel(hass: HomeAssistant, bundle: FrontendBundle) -> None:
+    """Build the bundle and register the sidebar panel that loads it.
+
+    Run once Home Assistant has started, so building does not delay the boot.
+    """
+    try:
+        entry = await bundle.async_get_entry(hass)
+    except Exception as e:
+        _LOGGER.error("Error building the frontend bundle: %s", e, exc_info=True)
+        return
+    await panel_custom.async_register_panel(
+        hass,
+        frontend_url_path=PANEL_URL_PATH,
+        webcomponent_name=PANEL_COMPONENT,
+        sidebar_title=PANEL_TITLE,
+        sidebar_icon=PANEL_ICON,
+        module_url=bundle.url(entry),
+        require_admin=True,
+    )
+
+
+@callback
+def async_remove_panel(hass: HomeAssistant) -> None:
+    """Remove the panel, if async_setup_panel registered it."""
+    if PANEL_URL_PATH in hass.data.get(frontend.DATA_PANELS, {}):
+        frontend.async_remove_panel(hass, PANEL_URL_PATH)
+
+
+def _js_object(values: Dict[str, str]) -> str:
+    """Return a flat dict of strings as a JavaScript object literal."""
+    return "{" + ", ".join(f"{name}: '{value}'" for name, value in values.items()) + "}"
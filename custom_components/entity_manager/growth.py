@@ -0,0 +1,146 @@
+"""Database growth tracking and forecasting for Entity Manager."""
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    CONF_DB_SIZE_LIMIT,
+    DEFAULT_DB_SIZE_LIMIT,
+    DB_SIZE_SAMPLE_INTERVAL,
+    DB_ROW_COUNT_INTERVAL,
+    DB_GROWTH_WINDOW,
+    DB_GROWTH_HISTORY,
+    SIGNAL_DB_GROWTH_UPDATED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+
+def growth_per_day(samples: List[Tuple[int, int]]) -> Optional[float]:
+    """Return the least-squares growth of (ts, bytes) samples in bytes per day."""
+    if len(samples) < 2:
+        return None
+    count = len(samples)
+    mean_ts = sum(ts for ts, _ in samples) / count
+    mean_size = sum(size for _, size in samples) / count
+    variance = sum((ts - mean_ts) ** 2 for ts, _ in samples)
+    if not variance:
+        return None
+    covariance = sum((ts - mean_ts) * (size - mean_size) for ts, size in samples)
+    return covariance / variance * SECONDS_PER_DAY
+
+
+class DatabaseGrowthTracker:
+    """Sample the recorder database size and forecast when it hits a limit.
+
+    Size samples are taken every DB_SIZE_SAMPLE_INTERVAL and per-domain row
+    counts every DB_ROW_COUNT_INTERVAL. Both are persisted in the history
+    store; the recent size series is also kept in memory so the growth rate
+    and projection never need to query the recorder again.
+    """
+
+    def __init__(self, hass: HomeAssistant, manager, options: Mapping[str, Any]):
+        """Initialize the tracker."""
+        self.hass = hass
+        self._manager = manager
+        self.size_limit_mb: int = options.get(CONF_DB_SIZE_LIMIT, DEFAULT_DB_SIZE_LIMIT)
+        self._samples: Deque[Tuple[int, int]] = deque()
+        self._last_row_count_ts = 0.0
+        self._unsub: Optional[Callable[[], None]] = None
+
+    async def async_start(self) -> None:
+        """Load stored samples and start sampling."""
+        store = self._manager.history_store
+        since = time.time() - DB_GROWTH_HISTORY.total_seconds()
+        self._samples.extend(await self.hass.async_add_executor_job(store.get_size_samples, since))
+        domain_rows = await self.hass.async_add_executor_job(store.get_domain_rows, since)
+        if domain_rows:
+            self._last_row_count_ts = max(domain_rows)
+
+        self._unsub = async_track_time_interval(self.hass, self._async_sample, DB_SIZE_SAMPLE_INTERVAL)
+        if not self._samples or time.time() - self._samples[-1][0] >= DB_SIZE_SAMPLE_INTERVAL.total_seconds():
+            self.hass.async_create_task(self._async_sample())
+        else:
+            async_dispatcher_send(self.hass, SIGNAL_DB_GROWTH_UPDATED)
+
+    def async_stop(self) -> None:
+        """Stop sampling."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def _async_sample(self, now: Optional[datetime] = None) -> None:
+        """Take a size sample, and a row count sample when due."""
+        from .recorder_queries import query_database_size, query_domain_row_counts
+
+        store = self._manager.history_store
+        ts = int(time.time())
+        try:
+            size = await self._manager._async_recorder_query(query_database_size)
+            await self.hass.async_add_executor_job(store.add_size_sample, ts, size)
+            self._samples.append((ts, size))
+            while self._samples and self._samples[0][0] < ts - DB_GROWTH_HISTORY.total_seconds():
+                self._samples.popleft()
+
+            if ts - self._last_row_count_ts >= DB_ROW_COUNT_INTERVAL.total_seconds():
+                counts: Dict[str, int] = {}
+                for partition in await self._manager._async_partitioned_recorder_query(query_domain_row_counts):
+                    for domain, rows in partition.items():
+                        counts[domain] = counts.get(domain, 0) + rows
+                await self.hass.async_add_executor_job(store.add_domain_rows, ts, counts)
+                self._last_row_count_ts = ts
+        except Exception as e:
+            _LOGGER.warning("Could not sample recorder database size: %s", e)
+            return
+
+        async_dispatcher_send(self.hass, SIGNAL_DB_GROWTH_UPDATED)
+
+    @property
+    def size_bytes(self) -> Optional[int]:
+        """Return the most recent database size."""
+        return self._samples[-1][1] if self._samples else None
+
+    @property
+    def growth_bytes_per_day(self) -> Optional[float]:
+        """Return the growth rate over DB_GROWTH_WINDOW."""
+        if not self._samples:
+            return None
+        since = self._samples[-1][0] - DB_GROWTH_WINDOW.total_seconds()
+        return growth_per_day([sample for sample in self._samples if sample[0] >= since])
+
+    @property
+    def days_until_limit(self) -> Optional[float]:
+        """Return the projected days until the configured size limit is reached."""
+        size = self.size_bytes
+        growth = self.growth_bytes_per_day
+        if not self.size_limit_mb or size is None or growth is None:
+            return None
+        remaining = self.size_limit_mb * 1024 * 1024 - size
+        if remaining <= 0:
+            return 0.0
+        if growth <= 0:
+            return None
+        return remaining / growth
+
+    async def async_get_report(self, days: int = 30) -> Dict[str, Any]:
+        """Return stored samples and the current forecast."""
+        store = self._manager.history_store
+        since = time.time() - days * SECONDS_PER_DAY
+        sizes = await self.hass.async_add_executor_job(store.get_size_samples, since)
+        domain_rows = await self.hass.async_add_executor_job(store.get_domain_rows, since)
+        return {
+            "size_bytes": self.size_bytes,
+            "growth_bytes_per_day": self.growth_bytes_per_day,
+            "size_limit_mb": self.size_limit_mb,
+            "days_until_limit": self.days_until_limit,
+            "size_samples": [{"ts": ts, "size_bytes": size} for ts, size in sizes],
+            "domain_rows": [{"ts": ts, "domains": counts} for ts, counts in sorted(domain_rows.items())],
+        }
@@ -0,0 +1,262 @@
+"""Compact local store for data Entity Manager keeps outside the recorder."""
+import logging
+import math
+import sqlite3
+import threading
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR = 3600
+
+# (entity_id, hour_ts) -> [min, max, sum, count]
+HourlyAccumulator = Dict[Tuple[str, int], List[float]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    entity_id TEXT NOT NULL UNIQUE,
+    downsampled_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS hourly_stats (
+    entity_ref INTEGER NOT NULL,
+    hour_ts INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    mean REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (entity_ref, hour_ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS maintenance_runs (
+    id INTEGER PRIMARY KEY,
+    started_ts REAL NOT NULL,
+    task TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    rows_deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS db_size_samples (
+    ts INTEGER PRIMARY KEY,
+    size_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_row_samples (
+    ts INTEGER NOT NULL,
+    domain TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (ts, domain)
+) WITHOUT ROWID;
+"""
+
+
+def _numeric(state: Any) -> Optional[float]:
+    """Return a state as a finite float, or None if it is not numeric."""
+    try:
+        value = float(state)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def accumulate_hourly(
+    acc: HourlyAccumulator,
+    rows: Iterable[Tuple[str, Any, float]],
+    watermarks: Dict[str, float],
+) -> int:
+    """Fold a batch of (entity_id, state, last_updated_ts) rows into ``acc``.
+
+    Non-numeric states and rows before the entity's watermark (aggregated by
+    an earlier run) are skipped. The batch is keyed by (entity_id, hour) and
+    sorted, which is nearly free as the recorder returns the rows of an
+    entity in time order, so each hour is reduced with min/max/sum over its
+    values at once. Returns the number of numeric values aggregated.
+    """
+    values = [
+        ((entity_id, int(ts) // SECONDS_PER_HOUR * SECONDS_PER_HOUR), value)
+        for entity_id, state, ts in rows
+        if ts >= watermarks.get(entity_id, 0) and (value := _numeric(state)) is not None
+    ]
+    values.sort(key=itemgetter(0))
+
+    for key, group in groupby(values, itemgetter(0)):
+        numbers = [value for _, value in group]
+        low, high, total = min(numbers), max(numbers), sum(numbers)
+        bucket = acc.get(key)
+        if bucket is None:
+            acc[key] = [low, high, total, len(numbers)]
+        else:
+            if low < bucket[0]:
+                bucket[0] = low
+            if high > bucket[1]:
+                bucket[1] = high
+            bucket[2] += total
+            bucket[3] += len(numbers)
+
+    return len(values)
+
+
+class HistoryStore:
+    """SQLite file holding hourly aggregates, maintenance history and DB size samples.
+
+    All methods are blocking and must be called from an executor.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the store."""
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _entity_refs(self, conn: sqlite3.Connection, entity_ids: Iterable[str]) -> Dict[str, int]:
+        """Return integer references for entity ids, creating missing ones."""
+        entity_ids = list(entity_ids)
+        conn.executemany(
+            "INSERT OR IGNORE INTO entities (entity_id) VALUES (?)",
+            [(entity_id,) for entity_id in entity_ids],
+        )
+        refs = {}
+        for entity_id, ref in conn.execute("SELECT entity_id, id FROM entities"):
+            refs[entity_id] = ref
+        return {entity_id: refs[entity_id] for entity_id in entity_ids}
+
+    def get_watermarks(self, entity_ids: Iterable[str]) -> Dict[str, float]:
+        """Return the timestamp up to which each entity was downsampled."""
+        wanted = set(entity_ids)
+        with self._lock:
+            conn = self._connection()
+            return {
+                entity_id: until
+                for entity_id, until in conn.execute("SELECT entity_id, downsampled_until FROM entities")
+                if entity_id in wanted
+            }
+
+    def merge_hourly(self, acc: HourlyAccumulator, entity_ids: Iterable[str], until_ts: float) -> int:
+        """Merge accumulated buckets and advance the watermark of ``entity_ids``."""
+        entity_ids = list(entity_ids)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                refs = self._entity_refs(conn, set(entity_ids) | {key[0] for key in acc})
+                conn.executemany(
+                    """
+                    INSERT INTO hourly_stats (entity_ref, hour_ts, min, max, mean, count)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (entity_ref, hour_ts) DO UPDATE SET
+                        mean = (mean * count + excluded.mean * excluded.count) / (count + excluded.count),
+                        min = MIN(min, excluded.min),
+                        max = MAX(max, excluded.max),
+                        count = count + excluded.count
+                    """,
+                    [
+                        (refs[entity_id], hour, bucket[0], bucket[1], bucket[2] / bucket[3], bucket[3])
+                        for (entity_id, hour), bucket in acc.items()
+                    ],
+                )
+                conn.executemany(
+                    "UPDATE entities SET downsampled_until = ? WHERE id = ? AND downsampled_until < ?",
+                    [(until_ts, refs[entity_id], until_ts) for entity_id in entity_ids],
+                )
+        return len(acc)
+
+    def get_hourly(self, entity_id: str, start_ts: float = 0, end_ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return hourly aggregates for an entity ordered by time."""
+        query = """
+        SELECT h.hour_ts, h.min, h.max, h.mean, h.count
+        FROM hourly_stats h JOIN entities e ON h.entity_ref = e.id
+        WHERE e.entity_id = ? AND h.hour_ts >= ?
+        """
+        params: List[Any] = [entity_id, int(start_ts)]
+        if end_ts is not None:
+            query += " AND h.hour_ts < ?"
+            params.append(int(end_ts))
+        query += " ORDER BY h.hour_ts"
+
+        with self._lock:
+            conn = self._connection()
+            return [
+                {"hour": hour, "min": min_, "max": max_, "mean": mean, "count": count}
+                for hour, min_, max_, mean, count in conn.execute(query, params)
+            ]
+
+    def add_maintenance_run(self, started_ts: float, task: str, status: str, duration: float, rows_deleted: int) -> None:
+        """Record the outcome of a maintenance task."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO maintenance_runs (started_ts, task, status, duration, rows_deleted) VALUES (?, ?, ?, ?, ?)",
+                    (started_ts, task, status, duration, rows_deleted),
+                )
+
+    def get_maintenance_runs(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent maintenance runs, newest first."""
+        with self._lock:
+            conn = self._connection()
+            return [
+                {"started": started, "task": task, "status": status, "duration": duration, "rows_deleted": rows_deleted}
+                for started, task, status, duration, rows_deleted in conn.execute(
+                    "SELECT started_ts, task, status, duration, rows_deleted FROM maintenance_runs ORDER BY started_ts DESC, id DESC LIMIT ?",
+                    (limit,),
+                )
+            ]
+
+    def get_last_maintenance_run(self, task: str, status: str = "success") -> Optional[float]:
+        """Return the start timestamp of the last run of a task with the given status."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT MAX(started_ts) FROM maintenance_runs WHERE task = ? AND status = ?",
+                (task, status),
+            ).fetchone()
+            return row[0] if row else None
+
+    def add_size_sample(self, ts: int, size_bytes: int) -> None:
+        """Record the database size at ``ts``."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO db_size_samples (ts, size_bytes) VALUES (?, ?)", (ts, size_bytes))
+
+    def get_size_samples(self, since_ts: float = 0) -> List[Tuple[int, int]]:
+        """Return (ts, size_bytes) samples taken since ``since_ts``, oldest first."""
+        with self._lock:
+            conn = self._connection()
+            return conn.execute(
+                "SELECT ts, size_bytes FROM db_size_samples WHERE ts >= ? ORDER BY ts", (int(since_ts),)
+            ).fetchall()
+
+    def add_domain_rows(self, ts: int, counts: Dict[str, int]) -> None:
+        """Record per-domain states row counts at ``ts``."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO domain_row_samples (ts, domain, row_count) VALUES (?, ?, ?)",
+                    [(ts, domain, rows) for domain, rows in counts.items()],
+                )
+
+    def get_domain_rows(self, since_ts: float = 0) -> Dict[int, Dict[str, int]]:
+        """Return {ts: {domain: rows}} for samples taken since ``since_ts``."""
+        samples: Dict[int, Dict[str, int]] = {}
+        with self._lock:
+            conn = self._connection()
+            for ts, domain, rows in conn.execute(
+                "SELECT ts, domain, row_count FROM domain_row_samples WHERE ts >= ? ORDER BY ts", (int(since_ts),)
+            ):
+                samples.setdefault(ts, {})[domain] = rows
+        return samples
@@ -0,0 +1,116 @@
+"""Memoized config entry, device and area lookups for entity enumeration."""
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.config_entries import SIGNAL_CONFIG_ENTRY_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.area_registry import (
+    EVENT_AREA_REGISTRY_UPDATED,
+    async_get as async_get_area_registry,
+)
+from homeassistant.helpers.device_registry import (
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    async_get as async_get_device_registry,
+)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_registry import RegistryEntry
+
+# device_id -> (device name, manufacturer, model, area_id)
+DeviceInfo = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+_NO_DEVICE: DeviceInfo = (None, None, None, None)
+
+
+class RegistryLookupCache:
+    """Cache the registry lookups shared by many entities.
+
+    Hundreds of entities usually share one config entry and several share a
+    device, so the integration domain, device details and area names are
+    resolved once and kept until the config entry, device or area changes.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the cache."""
+        self.hass = hass
+        self._integrations: Dict[str, str] = {}
+        self._devices: Dict[str, DeviceInfo] = {}
+        self._areas: Dict[str, Optional[str]] = {}
+        self._unsubs: List[CALLBACK_TYPE] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Subscribe to the changes that invalidate cached lookups."""
+        self._unsubs = [
+            async_dispatcher_connect(self.hass, SIGNAL_CONFIG_ENTRY_CHANGED, self._async_config_entry_changed),
+            self.hass.bus.async_listen(EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_registry_updated),
+            self.hass.bus.async_listen(EVENT_AREA_REGISTRY_UPDATED, self._async_area_registry_updated),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop the cached lookups."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all cached lookups."""
+        self._integrations.clear()
+        self._devices.clear()
+        self._areas.clear()
+
+    @callback
+    def _async_config_entry_changed(self, change: Any, entry: Any) -> None:
+        """Forget the integration of a changed config entry."""
+        self._integrations.pop(entry.entry_id, None)
+
+    @callback
+    def _async_device_registry_updated(self, event: Event) -> None:
+        """Forget a created, updated or removed device."""
+        self._devices.pop(event.data.get("device_id"), None)
+
+    @callback
+    def _async_area_registry_updated(self, event: Event) -> None:
+        """Forget the name of a changed area."""
+        self._areas.pop(event.data.get("area_id"), None)
+
+    def integration(self, config_entry_id: Optional[str]) -> Optional[str]:
+        """Return the integration domain of a config entry."""
+        if not config_entry_id:
+            return None
+        domain = self._integrations.get(config_entry_id)
+        if domain is None:
+            config_entry = self.hass.config_entries.async_get_entry(config_entry_id)
+            if config_entry is None:
+                return None
+            domain = self._integrations[config_entry_id] = config_entry.domain
+        return domain
+
+    def device(self, device_id: Optional[str]) -> DeviceInfo:
+        """Return (name, manufacturer, model, area_id) of a device."""
+        if not device_id:
+            return _NO_DEVICE
+        info = self._devices.get(device_id)
+        if info is None:
+            device = async_get_device_registry(self.hass).async_get(device_id)
+            if device is None:
+                return _NO_DEVICE
+            info = self._devices[device_id] = (
+                device.name_by_user or device.name,
+                device.manufacturer,
+                device.model,
+                device.area_id,
+            )
+        return info
+
+    def area_name(self, area_id: Optional[str]) -> Optional[str]:
+        """Return the name of an area."""
+        if not area_id:
+            return None
+        if area_id not in self._areas:
+            area = async_get_area_registry(self.hass).async_get_area(area_id)
+            self._areas[area_id] = area.name if area else None
+        return self._areas[area_id]
+
+    def entity_area(self, entry: RegistryEntry) -> Optional[str]:
+        """Return the area_id of an entity, falling back to its device's area."""
+        return entry.area_id or self.device(entry.device_id)[3]
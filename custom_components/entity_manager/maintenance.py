@@ -0,0 +1,182 @@
+"""Scheduled maintenance windows for Entity Manager."""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_MAINTENANCE_ENABLED,
+    CONF_MAINTENANCE_START,
+    CONF_MAINTENANCE_END,
+    CONF_MAINTENANCE_REPACK,
+    CONF_MAX_RECORDER_BACKLOG,
+    DEFAULT_MAINTENANCE_START,
+    DEFAULT_MAINTENANCE_END,
+    DEFAULT_MAX_RECORDER_BACKLOG,
+    MAINTENANCE_CHECK_INTERVAL,
+    MAINTENANCE_REPACK_INTERVAL,
+    MAINTENANCE_TASK_DOWNSAMPLE,
+    MAINTENANCE_TASK_RETENTION_PURGE,
+    MAINTENANCE_TASK_ORPHAN_CLEANUP,
+    MAINTENANCE_TASK_REPACK,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """Run purges, orphan cleanup and repacks inside a low-load window."""
+
+    def __init__(self, hass: HomeAssistant, manager, options: Mapping[str, Any]):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._manager = manager
+        self.enabled: bool = options.get(CONF_MAINTENANCE_ENABLED, False)
+        self.window_start: int = options.get(CONF_MAINTENANCE_START, DEFAULT_MAINTENANCE_START)
+        self.window_end: int = options.get(CONF_MAINTENANCE_END, DEFAULT_MAINTENANCE_END)
+        self.repack: bool = options.get(CONF_MAINTENANCE_REPACK, False)
+        self.max_backlog: int = options.get(CONF_MAX_RECORDER_BACKLOG, DEFAULT_MAX_RECORDER_BACKLOG)
+        self._unsub: Optional[Callable[[], None]] = None
+        self._running = False
+        self._last_window_run: Optional[str] = None
+        # Tasks already finished in the current window, so a deferred run resumes
+        self._done_window: Optional[str] = None
+        self._done_tasks: set = set()
+
+    def async_start(self) -> None:
+        """Start checking for the maintenance window."""
+        if self.enabled and self._unsub is None:
+            self._unsub = async_track_time_interval(self.hass, self._async_check, MAINTENANCE_CHECK_INTERVAL)
+            _LOGGER.info("Maintenance window scheduled between %02d:00 and %02d:00", self.window_start, self.window_end)
+
+    def async_stop(self) -> None:
+        """Stop the scheduler."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def in_window(self, now: datetime) -> bool:
+        """Return True if ``now`` is inside the window (which may wrap midnight)."""
+        if self.window_start == self.window_end:
+            return True
+        if self.window_start < self.window_end:
+            return self.window_start <= now.hour < self.window_end
+        return now.hour >= self.window_start or now.hour < self.window_end
+
+    def _window_key(self, now: datetime) -> str:
+        """Return an identifier of the window occurrence ``now`` belongs to."""
+        day = now.date()
+        if self.window_start > self.window_end and now.hour < self.window_end:
+            day = (now - timedelta(days=1)).date()
+        return day.isoformat()
+
+    def _backlog_too_high(self) -> bool:
+        """Return True if the recorder is too busy for maintenance."""
+        backlog = self._manager.get_recorder_backlog()
+        if backlog > self.max_backlog:
+            _LOGGER.info("Deferring maintenance: recorder backlog %d > %d", backlog, self.max_backlog)
+            return True
+        return False
+
+    @callback
+    def _async_check(self, now: datetime) -> None:
+        """Start a run if inside the window and not yet run for this window."""
+        now = dt_util.as_local(now)
+        if self._running or not self.in_window(now):
+            return
+        if self._last_window_run == self._window_key(now):
+            return
+        if self._backlog_too_high():
+            return
+        self.hass.async_create_task(self.async_run())
+
+    async def async_run(self, force: bool = False) -> Dict[str, Any]:
+        """Run all maintenance tasks, stopping early if the window closes."""
+        if self._running:
+            return {"status": "skipped", "message": "Maintenance already running", "tasks": []}
+
+        self._running = True
+        tasks: List[Dict[str, Any]] = []
+        status = "success"
+        window = self._window_key(dt_util.now())
+        if self._done_window != window:
+            self._done_window = window
+            self._done_tasks = set()
+        try:
+            for task in self._due_tasks():
+                if not force and task in self._done_tasks:
+                    continue
+                now = dt_util.now()
+                if not force and (not self.in_window(now) or self._backlog_too_high()):
+                    status = "deferred"
+                    break
+                tasks.append(await self._async_run_task(task))
+                self._done_tasks.add(task)
+            if status == "success":
+                self._last_window_run = window
+        finally:
+            self._running = False
+
+        return {"status": status, "tasks": tasks}
+
+    def _due_tasks(self) -> List[str]:
+        """Return the tasks to run, in order."""
+        tasks = [MAINTENANCE_TASK_DOWNSAMPLE, MAINTENANCE_TASK_RETENTION_PURGE, MAINTENANCE_TASK_ORPHAN_CLEANUP]
+        if self.repack:
+            tasks.append(MAINTENANCE_TASK_REPACK)
+        return tasks
+
+    async def _async_run_task(self, task: str) -> Dict[str, Any]:
+        """Run one task and record its duration and deleted rows."""
+        store = self._manager.history_store
+
+        if task == MAINTENANCE_TASK_REPACK:
+            last_repack = await self.hass.async_add_executor_job(store.get_last_maintenance_run, task)
+            if last_repack and time.time() - last_repack < MAINTENANCE_REPACK_INTERVAL.total_seconds():
+                return {"task": task, "status": "skipped"}
+
+        started = time.time()
+        start = time.monotonic()
+        rows_deleted = 0
+        details: Dict[str, Any] = {}
+        status = "success"
+        try:
+            if task == MAINTENANCE_TASK_DOWNSAMPLE:
+                details = await self._manager.downsample_history()
+                if details.get("status") == "error":
+                    status = "error"
+            else:
+                if task == MAINTENANCE_TASK_RETENTION_PURGE:
+                    details = await self._manager.purge_by_retention()
+                elif task == MAINTENANCE_TASK_ORPHAN_CLEANUP:
+                    details = await self._manager.purge_orphaned_entities()
+                elif task == MAINTENANCE_TASK_REPACK:
+                    details = await self._manager.repack_database()
+                rows_deleted = details.get("rows_deleted", 0)
+        except Exception as e:
+            _LOGGER.error("Maintenance task %s failed: %s", task, e, exc_info=True)
+            status = "error"
+            details = {"error": str(e)}
+
+        duration = time.monotonic() - start
+        await self.hass.async_add_executor_job(store.add_maintenance_run, started, task, status, duration, rows_deleted)
+        _LOGGER.info("Maintenance task %s: %s in %.1fs, %d rows deleted", task, status, duration, rows_deleted)
+
+        return {"task": task, "status": status, "duration": round(duration, 3), "rows_deleted": rows_deleted, "details": details}
+
+    async def async_get_status(self, limit: int = 100) -> Dict[str, Any]:
+        """Return the schedule and recent runs."""
+        runs = await self.hass.async_add_executor_job(self._manager.history_store.get_maintenance_runs, limit)
+        return {
+            "enabled": self.enabled,
+            "window_start": self.window_start,
+            "window_end": self.window_end,
+            "repack": self.repack,
+            "max_recorder_backlog": self.max_backlog,
+            "running": self._running,
+            "runs": runs,
+        }
@@ -0,0 +1,190 @@
+"""Lightweight timing spans for Entity Manager hot paths.
+
+Service handlers, API views, file loads/saves and recorder queries are
+wrapped in named spans. While the debug_mode option is off a span costs one
+attribute check; when it is on each duration is recorded into a per-span
+histogram (count, sum, max and the most recent METRICS_SAMPLE_SIZE samples
+for percentiles) served by GET /api/entity_manager/metrics.
+
+The registry is module level because views and service handlers are
+defined before the manager exists.
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterator, List, Optional, TypeVar
+
+from .const import METRICS_QUANTILES, METRICS_SAMPLE_SIZE
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_NULL_SPAN = nullcontext()
+
+
+class SpanHistogram:
+    """Durations recorded for one span."""
+
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=METRICS_SAMPLE_SIZE)
+
+    def add(self, duration: float) -> None:
+        """Record one duration in seconds."""
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.samples.append(duration)
+
+    def quantiles(self) -> Dict[float, float]:
+        """Return the METRICS_QUANTILES of the recent samples (nearest rank)."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {quantile: 0.0 for quantile in METRICS_QUANTILES}
+        return {
+            quantile: ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+            for quantile in METRICS_QUANTILES
+        }
+
+
+class MetricsRegistry:
+    """Per-span histograms, recorded only while enabled."""
+
+    def __init__(self):
+        """Initialize a disabled registry."""
+        self.enabled = False
+        self._spans: Dict[str, SpanHistogram] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Drop all recorded spans."""
+        with self._lock:
+            self._spans = {}
+
+    def record(self, name: str, duration: float) -> None:
+        """Add a duration to the histogram of ``name``."""
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = SpanHistogram()
+            histogram.add(duration)
+
+    def span(self, name: str) -> ContextManager[Any]:
+        """Return a context manager timing its block as ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed_block(name)
+
+    @contextmanager
+    def _timed_block(self, name: str) -> Iterator[None]:
+        """Time the block and record it, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the spans as JSON-serializable dicts, durations in milliseconds."""
+        with self._lock:
+            spans = list(self._spans.items())
+        result: Dict[str, Any] = {}
+        for name, histogram in sorted(spans):
+            quantiles = histogram.quantiles()
+            result[name] = {
+                "count": histogram.count,
+                "sum_ms": round(histogram.total * 1000, 3),
+                "max_ms": round(histogram.max * 1000, 3),
+                **{f"p{round(quantile * 100)}_ms": round(value * 1000, 3) for quantile, value in quantiles.items()},
+            }
+        return {"enabled": self.enabled, "spans": result}
+
+    def as_prometheus(self) -> str:
+        """Return the spans in the Prometheus text exposition format."""
+        with self._lock:
+            spans = list(self._spans.items())
+        lines: List[str] = [
+            "# HELP entity_manager_span_seconds Duration of Entity Manager operations.",
+            "# TYPE entity_manager_span_seconds summary",
+        ]
+        max_lines: List[str] = [
+            "# HELP entity_manager_span_seconds_max Longest duration of Entity Manager operations.",
+            "# TYPE entity_manager_span_seconds_max gauge",
+        ]
+        for name, histogram in sorted(spans):
+            label = _escape_label(name)
+            for quantile, value in histogram.quantiles().items():
+                lines.append(f'entity_manager_span_seconds{{span="{label}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'entity_manager_span_seconds_sum{{span="{label}"}} {histogram.total:.6f}')
+            lines.append(f'entity_manager_span_seconds_count{{span="{label}"}} {histogram.count}')
+            max_lines.append(f'entity_manager_span_seconds_max{{span="{label}"}} {histogram.max:.6f}')
+        return "\n".join(lines + max_lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
+
+
+def timed(name: Optional[str] = None) -> Callable[[_F], _F]:
+    """Decorate a sync or async function to record its duration.
+
+    Without ``name`` the span is named after the function.
+    """
+
+    def decorator(func: _F) -> _F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not metrics.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metrics.record(span_name, time.perf_counter() - start)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(span_name, time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def timed_view(func: _F) -> _F:
+    """Decorate a view method to record it as ``view.<url>.<method>``."""
+
+    @functools.wraps(func)
+    async def wrapper(self: Any, request: Any, *args: Any, **kwargs: Any) -> Any:
+        if not metrics.enabled:
+            return await func(self, request, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(self, request, *args, **kwargs)
+        finally:
+            metrics.record(f"view.{self.url}.{func.__name__}", time.perf_counter() - start)
+
+    return wrapper  # type: ignore[return-value]
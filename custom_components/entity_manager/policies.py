@@ -0,0 +1,66 @@
+"""Rule-based retention policies for Entity Manager."""
+import re
+from fnmatch import translate
+from typing import Any, Dict, List, Mapping, Optional
+
+from .const import POLICY_EXACT_TYPES
+
+
+def _rule_pattern(rule: Mapping[str, Any]) -> str:
+    """Return the full-match regex source of a glob or regex rule."""
+    if rule["match"] == "glob":
+        return translate(rule["value"])
+    return f"(?:{rule['value']})\\Z"
+
+
+class PolicyMatcher:
+    """Ordered retention rules compiled into an indexed matcher.
+
+    The first matching rule wins. Glob and regex rules are combined into a
+    single alternation with one named group per rule, so a match reports the
+    lowest matching rule index directly; exact rules are indexed by value.
+    Matching an entity therefore costs one regex match and four dict lookups
+    regardless of the number of rules.
+    """
+
+    def __init__(self, rules: List[Mapping[str, Any]]):
+        """Compile ``rules``; raises ValueError for an invalid regex."""
+        self.rules = list(rules)
+        self._exact: Dict[str, Dict[str, int]] = {match_type: {} for match_type in POLICY_EXACT_TYPES}
+        patterns = []
+        for index, rule in enumerate(self.rules):
+            if rule["match"] in POLICY_EXACT_TYPES:
+                self._exact[rule["match"]].setdefault(rule["value"], index)
+                continue
+            pattern = _rule_pattern(rule)
+            try:
+                compiled = re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid {rule['match']} in policy {index}: {e}") from e
+            if compiled.groupindex:
+                raise ValueError(f"Named groups are not allowed in policy {index}")
+            patterns.append(f"(?P<r{index}>{pattern})")
+        self._pattern = re.compile("|".join(patterns)) if patterns else None
+
+    def match(self, entity_id: str, attributes: Mapping[str, Optional[str]]) -> Optional[int]:
+        """Return the index of the first rule matching the entity, if any."""
+        best: Optional[int] = None
+        if self._pattern is not None and (match := self._pattern.match(entity_id)):
+            best = int(match.lastgroup[1:])
+        for match_type, index in self._exact.items():
+            value = attributes.get(match_type)
+            if value is None:
+                continue
+            rule_index = index.get(value)
+            if rule_index is not None and (best is None or rule_index < best):
+                best = rule_index
+        return best
+
+    def settings(self, index: int) -> Dict[str, Any]:
+        """Return the retention settings of rule ``index``."""
+        rule = self.rules[index]
+        settings: Dict[str, Any] = {"policy": index}
+        for key in ("recorder_days", "recorder_exclude"):
+            if rule.get(key) is not None:
+                settings[key] = rule[key]
+        return settings
@@ -0,0 +1,275 @@
+"""Build, hash and diff the recorder.yaml generated by Entity Manager."""
+import hashlib
+import heapq
+import json
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .const import DEFAULT_RECORDER_DAYS
+from .recorder_filter import RecorderFilter
+
+# Base settings written to recorder.yaml - the user should customize them
+RECORDER_BASE_CONFIG = {
+    "db_url": "sqlite:///home-assistant_v2.db",
+    "purge_keep_days": 10,
+    "commit_interval": 1,
+    "auto_purge": True,
+    "auto_repack": True,
+}
+
+# A glob must replace at least this many excluded entities to be worth it
+MIN_GLOB_COVERAGE = 2
+
+
+def _glob_candidates(entity_id: str) -> Iterable[str]:
+    """Yield the prefix and suffix globs of an entity id on ``_`` boundaries.
+
+    ``sensor.kitchen_door_battery`` yields ``sensor.kitchen_*``,
+    ``sensor.kitchen_door_*``, ``sensor.*_door_battery`` and
+    ``sensor.*_battery``. A glob of this shape matches an entity exactly
+    when the entity yields it too, which keeps the search index-based.
+    """
+    domain, _, object_id = entity_id.partition('.')
+    tokens = object_id.split('_')
+    for i in range(1, len(tokens)):
+        yield f"{domain}.{'_'.join(tokens[:i])}_*"
+        yield f"{domain}.*_{'_'.join(tokens[i:])}"
+
+
+def compress_entity_globs(excluded: Iterable[str], recorded: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Cover excluded entities with globs that match no recorded entity.
+
+    Returns (entity_globs, entities) where ``entities`` are the excluded
+    entities left uncovered. Globs are picked greedily by coverage and each
+    one is verified with fnmatch against ``recorded`` before it is used.
+    """
+    excluded_set = set(excluded)
+    recorded_set = set(recorded) - excluded_set
+
+    blocked: Set[str] = set()
+    for entity_id in recorded_set:
+        blocked.update(_glob_candidates(entity_id))
+
+    coverage: Dict[str, Set[str]] = {}
+    for entity_id in excluded_set:
+        for glob in _glob_candidates(entity_id):
+            if glob not in blocked:
+                coverage.setdefault(glob, set()).add(entity_id)
+
+    # Lazy greedy set cover: largest coverage first, then the most specific glob
+    heap = [(-len(covered), -len(glob), glob) for glob, covered in coverage.items() if len(covered) >= MIN_GLOB_COVERAGE]
+    heapq.heapify(heap)
+    uncovered = set(excluded_set)
+    globs: List[str] = []
+    while heap:
+        _, _, glob = heapq.heappop(heap)
+        covered = coverage[glob] & uncovered
+        if len(covered) < MIN_GLOB_COVERAGE:
+            continue
+        if len(covered) < len(coverage[glob]):
+            coverage[glob] = covered
+            heapq.heappush(heap, (-len(covered), -len(glob), glob))
+            continue
+        if any(fnmatchcase(entity_id, glob) for entity_id in recorded_set):
+            continue
+        globs.append(glob)
+        uncovered -= covered
+
+    return sorted(globs), sorted(uncovered)
+
+
+def build_recorder_config(
+    entity_config: Mapping[str, Any],
+    domain_config: Mapping[str, Any],
+    known_entities: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Return the recorder configuration for the entity and domain config maps.
+
+    Only the config maps are read, so this is cheap enough to run on every
+    regeneration request. When ``known_entities`` is given, excluded
+    entities are compressed into ``entity_globs`` that match none of the
+    known entities that are still recorded, as long as the filter stays
+    equivalent.
+    """
+    recorder_config: Dict[str, Any] = dict(RECORDER_BASE_CONFIG)
+
+    excluded_domains = []
+    domain_include_configs = {}
+    for domain, config in domain_config.items():
+        if config.get("recorder_exclude", False):
+            excluded_domains.append(domain)
+        else:
+            recorder_days = config.get("recorder_days")
+            if recorder_days is not None and recorder_days != DEFAULT_RECORDER_DAYS:
+                domain_include_configs[domain] = {"purge_keep_days": recorder_days}
+
+    # Entities in fully excluded domains are already covered
+    excluded_domain_set = set(excluded_domains)
+    excluded_entities = []
+    entity_include_configs = {}
+    for entity_id, config in entity_config.items():
+        domain = entity_id.split('.')[0]
+        if domain in excluded_domain_set:
+            continue
+        if config.get("recorder_exclude", False):
+            excluded_entities.append(entity_id)
+        else:
+            recorder_days = config.get("recorder_days")
+            if recorder_days is not None:
+                domain_default = domain_config.get(domain, {}).get("recorder_days", DEFAULT_RECORDER_DAYS)
+                if recorder_days != domain_default:
+                    entity_include_configs[entity_id] = {"purge_keep_days": recorder_days}
+
+    exclude_section = {}
+    if excluded_domains:
+        exclude_section["domains"] = sorted(excluded_domains)
+    if excluded_entities:
+        exclude_section["entities"] = sorted(excluded_entities)
+    if exclude_section:
+        recorder_config["exclude"] = exclude_section
+
+    include_section = {}
+    if domain_include_configs:
+        include_section["domains"] = domain_include_configs
+    if entity_include_configs:
+        include_section["entities"] = entity_include_configs
+    if include_section:
+        recorder_config["include"] = include_section
+
+    if excluded_entities and known_entities is not None:
+        recorder_config = _with_entity_globs(recorder_config, set(known_entities) | set(entity_config))
+
+    return recorder_config
+
+
+def _with_entity_globs(recorder_config: Dict[str, Any], entity_ids: Set[str]) -> Dict[str, Any]:
+    """Return ``recorder_config`` with its excluded entities compressed into globs.
+
+    Globs only match entities that are excluded, but adding an exclude glob
+    can still move the filter to another case of the entityfilter (entity
+    includes with entity excludes is case 6, with a glob exclude it is case
+    5, which records everything not excluded). The compressed configuration
+    is only used when it keeps the same case and records exactly the same
+    entities out of ``entity_ids``.
+    """
+    exclude_section = recorder_config["exclude"]
+    excluded_domains = set(exclude_section.get("domains", ()))
+    recorded = [entity_id for entity_id in entity_ids if entity_id.split('.')[0] not in excluded_domains]
+    entity_globs, excluded_entities = compress_entity_globs(exclude_section["entities"], recorded)
+    if not entity_globs:
+        return recorder_config
+
+    compressed_exclude = {key: value for key, value in exclude_section.items() if key != "entities"}
+    compressed_exclude["entity_globs"] = entity_globs
+    if excluded_entities:
+        compressed_exclude["entities"] = excluded_entities
+    compressed = dict(recorder_config, exclude=compressed_exclude)
+
+    original_filter = RecorderFilter(recorder_config)
+    compressed_filter = RecorderFilter(compressed)
+    if original_filter.case != compressed_filter.case:
+        return recorder_config
+    is_recorded, is_recorded_compressed = original_filter.is_recorded, compressed_filter.is_recorded
+    if any(is_recorded(entity_id) != is_recorded_compressed(entity_id) for entity_id in entity_ids):
+        return recorder_config
+    return compressed
+
+
+def recorder_config_hash(recorder_config: Optional[Mapping[str, Any]]) -> Optional[str]:
+    """Return a stable content hash of a recorder configuration."""
+    if recorder_config is None:
+        return None
+    canonical = json.dumps(recorder_config, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _section(recorder_config: Optional[Mapping[str, Any]], section: str, key: str) -> Any:
+    """Return recorder_config[section][key], tolerating missing or malformed sections."""
+    value = (recorder_config or {}).get(section)
+    if not isinstance(value, Mapping):
+        return None
+    return value.get(key)
+
+
+def _as_list(value: Any) -> List[str]:
+    """Return an exclude list entry as a list of strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+
+def _retention_map(value: Any) -> Dict[str, Any]:
+    """Return {id: purge_keep_days} for an include section entry."""
+    if not isinstance(value, Mapping):
+        return {}
+    return {
+        key: config.get("purge_keep_days") if isinstance(config, Mapping) else None
+        for key, config in value.items()
+    }
+
+
+def diff_recorder_config(old: Optional[Mapping[str, Any]], new: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the exclusion and retention changes between two configurations."""
+    diff: Dict[str, Any] = {}
+
+    for key in ("domains", "entities", "entity_globs"):
+        old_excluded = set(_as_list(_section(old, "exclude", key)))
+        new_excluded = set(_as_list(_section(new, "exclude", key)))
+        diff[f"excluded_{key}_added"] = sorted(new_excluded - old_excluded)
+        diff[f"excluded_{key}_removed"] = sorted(old_excluded - new_excluded)
+
+    for key in ("domains", "entities"):
+        old_retention = _retention_map(_section(old, "include", key))
+        new_retention = _retention_map(_section(new, "include", key))
+        diff[f"retention_{key}_changed"] = {
+            item: {"old": old_retention.get(item), "new": new_retention.get(item)}
+            for item in sorted(old_retention.keys() | new_retention.keys())
+            if old_retention.get(item) != new_retention.get(item)
+        }
+
+    settings = {}
+    for key in RECORDER_BASE_CONFIG:
+        old_value = (old or {}).get(key)
+        if old_value != new.get(key):
+            settings[key] = {"old": old_value, "new": new.get(key)}
+    diff["settings_changed"] = settings
+
+    return diff
+
+
+def _retention_days(value: Any) -> Dict[str, int]:
+    """Return {id: days} for include entries carrying purge_keep_days."""
+    return {key: days for key, days in _retention_map(value).items() if isinstance(days, int)}
+
+
+def recorder_config_to_settings(
+    recorder_config: Mapping[str, Any], known_entities: Iterable[str]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Expand a recorder configuration into (entity settings, domain settings).
+
+    Excluded domains and include entries with purge_keep_days map directly.
+    Every other effect of the filter (entity lists, globs, include-only
+    configurations) is resolved in one pass over ``known_entities``: an
+    entity gets its own recorder_exclude only where the filter disagrees with
+    its domain setting.
+    """
+    domain_settings: Dict[str, Dict[str, Any]] = {}
+    entity_settings: Dict[str, Dict[str, Any]] = {}
+
+    for domain in _as_list(_section(recorder_config, "exclude", "domains")):
+        domain_settings.setdefault(domain, {})["recorder_exclude"] = True
+    for domain, days in _retention_days(_section(recorder_config, "include", "domains")).items():
+        domain_settings.setdefault(domain, {})["recorder_days"] = days
+    for entity_id, days in _retention_days(_section(recorder_config, "include", "entities")).items():
+        entity_settings.setdefault(entity_id, {})["recorder_days"] = days
+
+    is_recorded = RecorderFilter(recorder_config).is_recorded
+    for entity_id in set(known_entities) | set(entity_settings):
+        domain_excluded = domain_settings.get(entity_id.split('.')[0], {}).get("recorder_exclude", False)
+        recorded = is_recorded(entity_id)
+        if recorded == domain_excluded:
+            entity_settings.setdefault(entity_id, {})["recorder_exclude"] = not recorded
+
+    return entity_settings, domain_settings
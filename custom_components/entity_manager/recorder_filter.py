@@ -0,0 +1,123 @@
+"""Simulate the recorder include/exclude filter of a recorder configuration."""
+import re
+from fnmatch import translate
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Pattern, Set
+
+
+def _ids(section: Any, key: str) -> Set[str]:
+    """Return the ids listed under section[key].
+
+    Accepts the list form of the recorder schema as well as the mapping form
+    Entity Manager writes for include sections with purge_keep_days.
+    """
+    if not isinstance(section, Mapping):
+        return set()
+    value = section.get(key)
+    if value is None:
+        return set()
+    if isinstance(value, str):
+        return {value}
+    return {str(item) for item in value}
+
+
+def _compile_globs(globs: Iterable[str]) -> Optional[Pattern[str]]:
+    """Combine globs into a single regex, like the recorder does."""
+    globs = sorted(globs)
+    if not globs:
+        return None
+    return re.compile("|".join(translate(glob) for glob in globs))
+
+
+class RecorderFilter:
+    """Compiled include/exclude filter with the recorder's entityfilter semantics.
+
+    The six cases mirror homeassistant.helpers.entityfilter. Globs are
+    compiled into one regex per section and the case is resolved once at
+    compile time (kept in ``case``), so evaluating an entity is a couple of
+    set lookups and at most two regex matches.
+    """
+
+    def __init__(self, recorder_config: Optional[Mapping[str, Any]]):
+        """Compile the include/exclude sections of ``recorder_config``."""
+        recorder_config = recorder_config or {}
+        include = recorder_config.get("include")
+        exclude = recorder_config.get("exclude")
+
+        self.include_domains = _ids(include, "domains")
+        self.include_entities = _ids(include, "entities")
+        self.include_globs = _ids(include, "entity_globs")
+        self.exclude_domains = _ids(exclude, "domains")
+        self.exclude_entities = _ids(exclude, "entities")
+        self.exclude_globs = _ids(exclude, "entity_globs")
+        self.case = 0
+        self.is_recorded: Callable[[str], bool] = self._compile()
+
+    def _compile(self) -> Callable[[str], bool]:
+        """Return the filter function for the configured case and record the case."""
+        include_d, include_e = self.include_domains, self.include_entities
+        exclude_d, exclude_e = self.exclude_domains, self.exclude_entities
+        include_eg = _compile_globs(self.include_globs)
+        exclude_eg = _compile_globs(self.exclude_globs)
+        have_include = bool(include_d or include_e or include_eg)
+        have_exclude = bool(exclude_d or exclude_e or exclude_eg)
+
+        # Case 1 - no filter
+        if not have_include and not have_exclude:
+            self.case = 1
+            return lambda entity_id: True
+
+        # Case 2 - includes only
+        if have_include and not have_exclude:
+            self.case = 2
+            def _case_2(entity_id: str) -> bool:
+                return (
+                    entity_id in include_e
+                    or entity_id.split('.', 1)[0] in include_d
+                    or bool(include_eg and include_eg.match(entity_id))
+                )
+            return _case_2
+
+        # Case 3 - excludes only
+        if not have_include and have_exclude:
+            self.case = 3
+            def _case_3(entity_id: str) -> bool:
+                return not (
+                    entity_id in exclude_e
+                    or entity_id.split('.', 1)[0] in exclude_d
+                    or bool(exclude_eg and exclude_eg.match(entity_id))
+                )
+            return _case_3
+
+        # Case 4 - domain and/or glob includes (may also have excludes)
+        if include_d or include_eg:
+            self.case = 4
+            def _case_4(entity_id: str) -> bool:
+                return entity_id in include_e or (
+                    entity_id not in exclude_e
+                    and (
+                        bool(include_eg and include_eg.match(entity_id))
+                        or (
+                            entity_id.split('.', 1)[0] in include_d
+                            and not (exclude_eg and exclude_eg.match(entity_id))
+                        )
+                    )
+                )
+            return _case_4
+
+        # Case 5 - domain and/or glob excludes (no domain and/or glob includes)
+        if exclude_d or exclude_eg:
+            self.case = 5
+            def _case_5(entity_id: str) -> bool:
+                if entity_id.split('.', 1)[0] in exclude_d or bool(exclude_eg and exclude_eg.match(entity_id)):
+                    return entity_id in include_e
+                return entity_id not in exclude_e
+            return _case_5
+
+        # Case 6 - entity includes and excludes only
+        self.case = 6
+        return include_e.__contains__
+
+    def evaluate(self, entity_ids: Iterable[str]) -> List[bool]:
+        """Return whether each entity would be recorded, in one pass."""
+        is_recorded = self.is_recorded
+        return [is_recorded(entity_id) for entity_id in entity_ids]
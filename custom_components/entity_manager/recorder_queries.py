@@ -0,0 +1,147 @@
+"""SQL helpers for reading the recorder database.
+
+These functions run inside the recorder executor with a session obtained from
+``recorder_instance.get_session()``. They are imported lazily because the
+recorder (and therefore SQLAlchemy) is optional for Entity Manager.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+
+# Rows are returned as (entity_id, state, last_updated_ts)
+StateRow = Tuple[str, Any, float]
+
+
+def query_metadata_id_bounds(session) -> Optional[Tuple[int, int]]:
+    """Return the lowest and highest metadata_id in states, or None if it is empty."""
+    # Separate subqueries: SQLite reads MIN or MAX from the index only when alone
+    low, high = session.execute(text(
+        "SELECT (SELECT MIN(metadata_id) FROM states), (SELECT MAX(metadata_id) FROM states)"
+    )).one()
+    return None if low is None else (low, high)
+
+
+def metadata_id_ranges(low: int, high: int, partitions: int, min_ids: int) -> List[Tuple[int, int]]:
+    """Split low..high into up to ``partitions`` inclusive ranges of at least ``min_ids`` ids.
+
+    metadata_ids are handed out in sequence as entities are first recorded,
+    so equal ranges hold about as many entities each.
+    """
+    count = high - low + 1
+    partitions = max(1, min(partitions, count // min_ids))
+    step = -(-count // partitions)
+    return [(first, min(first + step - 1, high)) for first in range(low, high + 1, step)]
+
+
+def query_record_counts(session, first_id: int, last_id: int, start_ts: float, limit: int) -> List[Tuple[str, int]]:
+    """Return (entity_id, record_count) for the entities with most states since start_ts in a metadata_id range."""
+    # Checking last_updated_ts costs about a fifth more per row; it is left out
+    # when no state is older than start_ts (an index lookup), as is usual with
+    # the recorder keeping fewer days than the report covers
+    oldest_ts = session.execute(text("SELECT MIN(last_updated_ts) FROM states")).scalar()
+    since = "AND last_updated_ts >= :start_ts" if oldest_ts is not None and oldest_ts < start_ts else ""
+    sql_query = text(f"""
+    SELECT sm.entity_id as entity_id, counts.record_count as record_count
+    FROM (
+        SELECT metadata_id, COUNT(*) as record_count FROM states
+        WHERE metadata_id BETWEEN :first_id AND :last_id {since}
+        GROUP BY metadata_id
+    ) counts JOIN states_meta sm ON counts.metadata_id = sm.metadata_id
+    WHERE sm.entity_id IS NOT NULL
+    ORDER BY record_count DESC LIMIT :limit_param
+    """)
+    params = {"first_id": first_id, "last_id": last_id, "start_ts": start_ts, "limit_param": limit}
+    return [tuple(row) for row in session.execute(sql_query, params).fetchall()]
+
+
+def iter_state_batches(
+    session,
+    entity_ids: Sequence[str],
+    start_ts: float,
+    end_ts: float,
+    batch_size: int,
+) -> Iterator[List[StateRow]]:
+    """Yield state rows for the given entities in batches of ``batch_size``."""
+    if not entity_ids:
+        return
+
+    sql_query = text("""
+    SELECT sm.entity_id, s.state, s.last_updated_ts
+    FROM states s JOIN states_meta sm ON s.metadata_id = sm.metadata_id
+    WHERE sm.entity_id IN :entity_ids
+      AND s.last_updated_ts >= :start_ts AND s.last_updated_ts < :end_ts
+    """).bindparams(bindparam("entity_ids", expanding=True))
+
+    result = session.execute(
+        sql_query,
+        {"entity_ids": list(entity_ids), "start_ts": start_ts, "end_ts": end_ts},
+    )
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+
+
+def count_purgeable_states(session, entity_ids: Sequence[str], before_ts: float) -> Dict[str, int]:
+    """Return {entity_id: rows older than before_ts} for the given entities."""
+    if not entity_ids:
+        return {}
+
+    sql_query = text("""
+    SELECT sm.entity_id, COUNT(*)
+    FROM states s JOIN states_meta sm ON s.metadata_id = sm.metadata_id
+    WHERE sm.entity_id IN :entity_ids AND s.last_updated_ts < :before_ts
+    GROUP BY sm.entity_id
+    """).bindparams(bindparam("entity_ids", expanding=True))
+
+    return dict(session.execute(sql_query, {"entity_ids": list(entity_ids), "before_ts": before_ts}).fetchall())
+
+
+def count_states_before(session, before_ts: float) -> int:
+    """Return the number of states older than before_ts (an index range scan)."""
+    sql_query = text("SELECT COUNT(*) FROM states WHERE last_updated_ts < :before_ts")
+    return session.execute(sql_query, {"before_ts": before_ts}).scalar() or 0
+
+
+def get_recorded_entity_ids(session) -> List[str]:
+    """Return every entity_id known to states_meta."""
+    rows = session.execute(text("SELECT entity_id FROM states_meta WHERE entity_id IS NOT NULL")).fetchall()
+    return [row[0] for row in rows]
+
+
+def query_database_size(session) -> int:
+    """Return the size of the recorder database in bytes.
+
+    Uses page_count * page_size on SQLite and the engine's own size
+    functions on MySQL/MariaDB and PostgreSQL.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        page_count = session.execute(text("PRAGMA page_count")).scalar() or 0
+        page_size = session.execute(text("PRAGMA page_size")).scalar() or 0
+        return page_count * page_size
+    if dialect in ("mysql", "mariadb"):
+        return int(session.execute(text(
+            "SELECT COALESCE(SUM(data_length + index_length), 0) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE()"
+        )).scalar() or 0)
+    if dialect == "postgresql":
+        return int(session.execute(text("SELECT pg_database_size(current_database())")).scalar() or 0)
+    raise ValueError(f"Unsupported database dialect: {dialect}")
+
+
+def query_domain_row_counts(session, first_id: int, last_id: int) -> Dict[str, int]:
+    """Return the number of states rows per entity domain in a metadata_id range."""
+    params = {"first_id": first_id, "last_id": last_id}
+    entity_ids = dict(session.execute(text(
+        "SELECT metadata_id, entity_id FROM states_meta WHERE metadata_id BETWEEN :first_id AND :last_id"
+    ), params).fetchall())
+    counts: Dict[str, int] = {}
+    for metadata_id, rows in session.execute(text(
+        "SELECT metadata_id, COUNT(*) FROM states WHERE metadata_id BETWEEN :first_id AND :last_id GROUP BY metadata_id"
+    ), params):
+        entity_id = entity_ids.get(metadata_id)
+        domain = entity_id.split(".", 1)[0] if entity_id else "unknown"
+        counts[domain] = counts.get(domain, 0) + rows
+    return counts
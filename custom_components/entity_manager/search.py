@@ -0,0 +1,287 @@
+"""Incrementally maintained full-text search index over entities."""
+import heapq
+import logging
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.entity_registry import (
+    EVENT_ENTITY_REGISTRY_UPDATED,
+    RegistryEntry,
+    async_get as async_get_entity_registry,
+)
+
+from .const import (
+    DEFAULT_SEARCH_LIMIT,
+    SEARCH_FUZZY_MIN_SIMILARITY,
+    SEARCH_SCORE_EXACT,
+    SEARCH_SCORE_FUZZY,
+    SEARCH_SCORE_PREFIX,
+    SEARCH_SCORE_SUBSTRING,
+)
+from .lookups import RegistryLookupCache
+
+_LOGGER = logging.getLogger(__name__)
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+# Token weight per indexed field: entity_id and name rank above platform/integration
+_PRIMARY_WEIGHT = 1.0
+_SECONDARY_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the lowercase alphanumeric tokens of ``text``."""
+    return [token for token in _TOKEN_SPLIT.split(text.casefold()) if token]
+
+
+def trigrams(token: str) -> Set[str]:
+    """Return the trigrams of a token, padded at the start.
+
+    The leading pad makes token prefixes score higher than the same
+    characters in the middle of a token.
+    """
+    padded = f" {token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Document:
+    """Indexed terms of one entity."""
+
+    __slots__ = ("key", "tokens", "trigrams", "text")
+
+    def __init__(self, key: Tuple[str, str, str, str], tokens: Dict[str, float], grams: Set[str]):
+        """Initialize the document."""
+        self.key = key
+        self.tokens = tokens
+        self.trigrams = grams
+        self.text = " ".join(tokens)
+
+
+class EntitySearchIndex:
+    """Token and trigram index over entity id, name, platform and integration.
+
+    The registry and the state machine are walked once on start; afterwards
+    registry events and friendly name changes only re-index the affected
+    entity. A query term matches an entity through an exact token, a token
+    prefix, a substring or, for typos, a share of at least
+    SEARCH_FUZZY_MIN_SIMILARITY of its trigrams. All terms must match and
+    results are ranked by the summed term scores.
+    """
+
+    def __init__(self, hass: HomeAssistant, lookups: RegistryLookupCache):
+        """Initialize the index."""
+        self.hass = hass
+        self._lookups = lookups
+        self._doc_ids: Dict[str, int] = {}
+        self._entity_ids: List[Optional[str]] = []
+        self._docs: List[Optional[_Document]] = []
+        self._free: List[int] = []
+        # token -> {doc id: field weight}
+        self._tokens: Dict[str, Dict[int, float]] = {}
+        # trigram -> doc ids
+        self._trigrams: Dict[str, Set[int]] = {}
+        # Sorted token list for prefix lookups; None when stale
+        self._sorted_tokens: Optional[List[str]] = None
+        self._unsubs: List[CALLBACK_TYPE] = []
+
+    def __len__(self) -> int:
+        """Return the number of indexed entities."""
+        return len(self._doc_ids)
+
+    @callback
+    def async_start(self) -> None:
+        """Build the index and subscribe to changes."""
+        entity_registry = async_get_entity_registry(self.hass)
+        for entry in entity_registry.entities.values():
+            self._index_entry(entry)
+        for state in self.hass.states.async_all():
+            if state.entity_id not in self._doc_ids:
+                self._index(state.entity_id, state.name, "unknown", "homeassistant")
+        _LOGGER.debug("Search index built with %d entities and %d tokens", len(self), len(self._tokens))
+
+        self._unsubs = [
+            self.hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated),
+            self.hass.bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from all changes."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    def _index_entry(self, entry: RegistryEntry) -> None:
+        """Index a registry entity."""
+        state_obj = self.hass.states.get(entry.entity_id)
+        if state_obj:
+            name = state_obj.name
+        else:
+            name = entry.name or entry.original_name
+        integration = self._lookups.integration(entry.config_entry_id) or "homeassistant"
+        self._index(entry.entity_id, name, entry.platform or "unknown", integration)
+
+    def _index(self, entity_id: str, name: Optional[str], platform: str, integration: str) -> None:
+        """Add or replace the document of an entity."""
+        key = (entity_id, name or "", platform, integration)
+        doc_id = self._doc_ids.get(entity_id)
+        if doc_id is not None:
+            if self._docs[doc_id].key == key:
+                return
+            self._unindex(entity_id)
+
+        tokens: Dict[str, float] = {}
+        for text, weight in ((entity_id, _PRIMARY_WEIGHT), (name or "", _PRIMARY_WEIGHT),
+                             (platform, _SECONDARY_WEIGHT), (integration, _SECONDARY_WEIGHT)):
+            for token in tokenize(text):
+                if tokens.get(token, 0) < weight:
+                    tokens[token] = weight
+        grams: Set[str] = set()
+        for token in tokens:
+            grams |= trigrams(token)
+
+        if self._free:
+            doc_id = self._free.pop()
+            self._entity_ids[doc_id] = entity_id
+            self._docs[doc_id] = _Document(key, tokens, grams)
+        else:
+            doc_id = len(self._docs)
+            self._entity_ids.append(entity_id)
+            self._docs.append(_Document(key, tokens, grams))
+        self._doc_ids[entity_id] = doc_id
+
+        for token, weight in tokens.items():
+            postings = self._tokens.get(token)
+            if postings is None:
+                postings = self._tokens[token] = {}
+                self._sorted_tokens = None
+            postings[doc_id] = weight
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(doc_id)
+
+    def _unindex(self, entity_id: str) -> None:
+        """Remove the document of an entity."""
+        if (doc_id := self._doc_ids.pop(entity_id, None)) is None:
+            return
+        doc = self._docs[doc_id]
+        for token in doc.tokens:
+            postings = self._tokens[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._tokens[token]
+                self._sorted_tokens = None
+        for gram in doc.trigrams:
+            postings = self._trigrams[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._trigrams[gram]
+        self._entity_ids[doc_id] = None
+        self._docs[doc_id] = None
+        self._free.append(doc_id)
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        """Re-index an entity created, renamed or removed in the registry."""
+        action = event.data.get("action")
+        entity_id = event.data.get("entity_id")
+
+        if action not in ("create", "update", "remove"):
+            return
+        self._unindex(event.data.get("old_entity_id") or entity_id)
+        if action == "remove":
+            # Keep entities that are still provided as plain states
+            if (state_obj := self.hass.states.get(entity_id)) is not None:
+                self._index(entity_id, state_obj.name, "unknown", "homeassistant")
+            return
+        entry = async_get_entity_registry(self.hass).async_get(entity_id)
+        if entry is not None:
+            self._index_entry(entry)
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Re-index an entity whose friendly name changed or that appeared/disappeared."""
+        entity_id = event.data.get("entity_id")
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+
+        if new_state is None:
+            if async_get_entity_registry(self.hass).async_get(entity_id) is None:
+                self._unindex(entity_id)
+            return
+        if old_state is not None and old_state.name == new_state.name and entity_id in self._doc_ids:
+            return
+        entry = async_get_entity_registry(self.hass).async_get(entity_id)
+        if entry is not None:
+            self._index_entry(entry)
+        else:
+            self._index(entity_id, new_state.name, "unknown", "homeassistant")
+
+    def _prefix_tokens(self, term: str) -> List[str]:
+        """Return the indexed tokens starting with ``term`` (``term`` excluded)."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._tokens)
+        sorted_tokens = self._sorted_tokens
+        matches = []
+        for i in range(bisect_left(sorted_tokens, term), len(sorted_tokens)):
+            token = sorted_tokens[i]
+            if not token.startswith(term):
+                break
+            if token != term:
+                matches.append(token)
+        return matches
+
+    def _score_term(self, term: str) -> Dict[int, float]:
+        """Return {doc id: score} of the documents matching one query term."""
+        scores: Dict[int, float] = {}
+
+        for doc_id, weight in self._tokens.get(term, {}).items():
+            scores[doc_id] = SEARCH_SCORE_EXACT * weight
+
+        for token in self._prefix_tokens(term):
+            for doc_id, weight in self._tokens[token].items():
+                score = SEARCH_SCORE_PREFIX * weight
+                if scores.get(doc_id, 0) < score:
+                    scores[doc_id] = score
+
+        if len(term) >= 3:
+            grams = trigrams(term)
+            hits: Counter = Counter()
+            for gram in grams:
+                hits.update(self._trigrams.get(gram, ()))
+            needed = math.ceil(len(grams) * SEARCH_FUZZY_MIN_SIMILARITY)
+            docs = self._docs
+            for doc_id, count in hits.items():
+                if count < needed or doc_id in scores:
+                    continue
+                if term in docs[doc_id].text:
+                    scores[doc_id] = SEARCH_SCORE_SUBSTRING
+                else:
+                    scores[doc_id] = SEARCH_SCORE_FUZZY * count / len(grams)
+
+        return scores
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` (entity_id, score) pairs, best match first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Optional[Dict[int, float]] = None
+        # Rare (long) terms first, so the intersection shrinks early
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_scores = self._score_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+
+        entity_ids = self._entity_ids
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], entity_ids[item[0]]))
+        return [(entity_ids[doc_id], round(score, 3)) for doc_id, score in best]
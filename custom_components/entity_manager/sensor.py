@@ -1,22 +1,33 @@
 """Sensor platform for Entity Manager."""
 import logging
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
 
-from .const import DOMAIN
+from .const import DOMAIN, RETENTION_BUCKETS, SIGNAL_DB_GROWTH_UPDATED, SIGNAL_STATS_UPDATED
 
 _LOGGER = logging.getLogger(__name__)
 
-# Definir DEFAULT_RECORDER_DAYS aqui se não existir em const.py
-try:
-    from .const import DEFAULT_RECORDER_DAYS
-except ImportError:
-    DEFAULT_RECORDER_DAYS = 10
+# (tracker attribute, name, icon)
+COUNT_SENSORS = [
+    ("total_entities", "Entity Manager Total Entities", "mdi:format-list-numbered"),
+    ("enabled_entities", "Entity Manager Enabled Entities", "mdi:check-circle-outline"),
+    ("disabled_entities", "Entity Manager Disabled Entities", "mdi:cancel"),
+    ("excluded_entities", "Entity Manager Excluded Entities", "mdi:database-off"),
+]
+
+# Names for RETENTION_BUCKETS, in the same order
+RETENTION_SENSOR_NAMES = [
+    "Entity Manager Retention Up To 1 Day",
+    "Entity Manager Retention 2 To 7 Days",
+    "Entity Manager Retention 8 To 30 Days",
+    "Entity Manager Retention Over 30 Days",
+]
 
 
 async def async_setup_entry(
@@ -27,14 +38,34 @@ async def async_setup_entry(
     """Set up Entity Manager sensor."""
     manager = hass.data[DOMAIN]
     
+    count_sensors = [
+        EntityManagerCountSensor(manager, key, name, icon, lambda stats, attr=key: getattr(stats, attr))
+        for key, name, icon in COUNT_SENSORS
+    ]
+    count_sensors.extend(
+        EntityManagerCountSensor(manager, key, name, "mdi:calendar-clock", lambda stats, bucket=key: stats.retention_count(bucket))
+        for (_, key), name in zip(RETENTION_BUCKETS, RETENTION_SENSOR_NAMES)
+    )
+    
     async_add_entities([
         EntityManagerSensor(hass, manager),
+        *count_sensors,
+        EntityManagerDatabaseSizeSensor(manager),
+        EntityManagerDatabaseGrowthSensor(manager),
+        EntityManagerDatabaseDaysUntilLimitSensor(manager),
     ])
 
 
 class EntityManagerSensor(SensorEntity):
-    """Entity Manager sensor."""
-    
+    """Entity Manager sensor, updated from the stats tracker.
+
+    Histograms by domain, state and retention are served by
+    /api/entity_manager/statistics instead of being stored as attributes.
+    """
+
+    _attr_should_poll = False
+    _unrecorded_attributes = frozenset({"config_file"})
+
     def __init__(self, hass: HomeAssistant, manager):
         """Initialize the sensor."""
         self.hass = hass
@@ -42,67 +73,141 @@ class EntityManagerSensor(SensorEntity):
         self._attr_name = "Entity Manager Stats"
         self._attr_unique_id = f"{DOMAIN}_stats"
         self._attr_icon = "mdi:view-grid"
-        self._attributes: Dict[str, Any] = {}
-        
+
+    @property
+    def available(self) -> bool:
+        """Return False until the stats tracker has built its counters."""
+        return self._manager.stats.started
+
     @property
     def state(self) -> int:
         """Return the number of managed entities."""
-        return len(self._manager._config)
-    
+        return self._manager.stats.managed_entities
+
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
         """Return sensor attributes."""
-        return self._attributes
-    
-    async def async_update(self) -> None:
-        """Update the sensor."""
-        await self._manager.load_config()
-        
-        entity_registry = async_get_entity_registry(self.hass)
-        
-        total_entities = len(entity_registry.entities)
-        managed_entities = len(self._manager._config)
-        
-        enabled_entities_count = 0
-        excluded_entities_count = 0
-        domains: Dict[str, int] = {}
-        states: Dict[str, int] = {}
-
-        for entity in entity_registry.entities.values():
-            if not entity.disabled_by:
-                enabled_entities_count += 1
-            
-            domain = entity.entity_id.split('.')[0]
-            domains[domain] = domains.get(domain, 0) + 1
-
-            state_obj = self.hass.states.get(entity.entity_id)
-            state_val = "disabled" if entity.disabled_by else "not_provided"
-            if state_obj:
-                state_val = state_obj.state
-            
-            states[state_val] = states.get(state_val, 0) + 1
-            
-        disabled_entities_count = total_entities - enabled_entities_count
-        
-        # Contar entidades excluídas do recorder
-        for entity_id, config in self._manager._config.items():
-            if config.get('recorder_exclude', False):
-                excluded_entities_count += 1
-        
-        recorder_config: Dict[str, int] = {}
-        for entity_id, config in self._manager._config.items():
-            days = config.get('recorder_days', DEFAULT_RECORDER_DAYS)
-            key = f"entities_with_{days}_days"
-            recorder_config[key] = recorder_config.get(key, 0) + 1
-        
-        self._attributes = {
-            "total_entities": total_entities,
-            "managed_entities": managed_entities,
-            "enabled_entities": enabled_entities_count,
-            "disabled_entities": disabled_entities_count,
-            "excluded_recorder_entities": excluded_entities_count,
-            "domains": domains,
-            "states": states,
-            "recorder_config": recorder_config,
-            "config_file": self._manager._config_path,
-        }
\ No newline at end of file
+        attributes: Dict[str, Any] = self._manager.stats.summary()
+        attributes["config_file"] = self._manager._config_path
+        return attributes
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to stats changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_STATS_UPDATED, self._async_stats_updated)
+        )
+
+    @callback
+    def _async_stats_updated(self) -> None:
+        """Write the new counters."""
+        self.async_write_ha_state()
+
+
+class EntityManagerCountSensor(SensorEntity):
+    """Single counter from the stats tracker."""
+
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "entities"
+
+    def __init__(self, manager, key: str, name: str, icon: str, value_fn: Callable[[Any], int]):
+        """Initialize the sensor."""
+        self._manager = manager
+        self._value_fn = value_fn
+        self._attr_name = name
+        self._attr_unique_id = f"{DOMAIN}_{key}"
+        self._attr_icon = icon
+
+    @property
+    def available(self) -> bool:
+        """Return False until the stats tracker has built its counters."""
+        return self._manager.stats.started
+
+    @property
+    def native_value(self) -> int:
+        """Return the current count."""
+        return self._value_fn(self._manager.stats)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to stats changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_STATS_UPDATED, self._async_stats_updated)
+        )
+
+    @callback
+    def _async_stats_updated(self) -> None:
+        """Write the new count."""
+        self.async_write_ha_state()
+
+
+class EntityManagerDatabaseSensor(SensorEntity):
+    """Base class for sensors fed by the database growth tracker."""
+
+    _attr_should_poll = False
+
+    def __init__(self, manager):
+        """Initialize the sensor."""
+        self._manager = manager
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to new database samples."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_DB_GROWTH_UPDATED, self._async_growth_updated)
+        )
+
+    @callback
+    def _async_growth_updated(self) -> None:
+        """Write the new value after a sample was taken."""
+        self.async_write_ha_state()
+
+
+class EntityManagerDatabaseSizeSensor(EntityManagerDatabaseSensor):
+    """Current recorder database size."""
+
+    _attr_name = "Entity Manager Database Size"
+    _attr_unique_id = f"{DOMAIN}_database_size"
+    _attr_icon = "mdi:database"
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfInformation.MEGABYTES
+    _attr_suggested_display_precision = 1
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the database size in MB."""
+        size = self._manager.growth.size_bytes
+        return None if size is None else round(size / 1024 / 1024, 2)
+
+
+class EntityManagerDatabaseGrowthSensor(EntityManagerDatabaseSensor):
+    """Daily growth rate of the recorder database."""
+
+    _attr_name = "Entity Manager Database Growth"
+    _attr_unique_id = f"{DOMAIN}_database_growth"
+    _attr_icon = "mdi:database-arrow-up"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "MB/d"
+    _attr_suggested_display_precision = 2
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the growth rate in MB per day."""
+        growth = self._manager.growth.growth_bytes_per_day
+        return None if growth is None else round(growth / 1024 / 1024, 3)
+
+
+class EntityManagerDatabaseDaysUntilLimitSensor(EntityManagerDatabaseSensor):
+    """Projected days until the database reaches the configured size limit."""
+
+    _attr_name = "Entity Manager Database Days Until Limit"
+    _attr_unique_id = f"{DOMAIN}_database_days_until_limit"
+    _attr_icon = "mdi:database-clock"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.DAYS
+    _attr_suggested_display_precision = 0
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the projected days until the limit."""
+        days = self._manager.growth.days_until_limit
+        return None if days is None else round(days, 1)
@@ -0,0 +1,74 @@
+"""JSON serialization for API responses and the files Entity Manager persists.
+
+orjson (shipped with Home Assistant) is used when it can be imported and the
+standard library otherwise. Both paths produce UTF-8 bytes, so responses and
+files are written without an intermediate str.
+"""
+import json
+from typing import Any, Union
+
+from aiohttp import web
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+def _default(value: Any) -> str:
+    """Serialize values JSON has no type for (datetimes, sets, ...) as strings."""
+    return str(value)
+
+
+if HAS_ORJSON:
+    # Datetimes go through _default too, so both paths write str(datetime)
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def json_dumps(data: Any, pretty: bool = False) -> bytes:
+        """Serialize ``data`` to UTF-8 JSON, indented by two spaces if ``pretty``."""
+        options = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if pretty else _ORJSON_OPTIONS
+        return orjson.dumps(data, default=_default, option=options)
+
+    def json_loads(data: Union[bytes, str]) -> Any:
+        """Parse JSON bytes or text."""
+        return orjson.loads(data)
+
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    def json_dumps(data: Any, pretty: bool = False) -> bytes:
+        """Serialize ``data`` to UTF-8 JSON, indented by two spaces if ``pretty``."""
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False, default=_default).encode("utf-8")
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+    def json_loads(data: Union[bytes, str]) -> Any:
+        """Parse JSON bytes or text."""
+        return json.loads(data)
+
+    JSONDecodeError = json.JSONDecodeError
+
+
+def json_response(data: Any, status: int = 200) -> web.Response:
+    """Return a JSON response serialized straight to bytes."""
+    return json_bytes_response(json_dumps(data), status)
+
+
+def json_bytes_response(body: bytes, status: int = 200) -> web.Response:
+    """Return a response for an already serialized JSON body."""
+    return web.Response(body=body, status=status, content_type=JSON_CONTENT_TYPE)
+
+
+def read_json_file(path: str) -> Any:
+    """Read and parse a JSON file."""
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
+
+def write_json_file(path: str, data: Any, pretty: bool = False) -> None:
+    """Serialize ``data`` and write it to ``path`` in one call."""
+    content = json_dumps(data, pretty)
+    with open(path, "wb") as f:
+        f.write(content)
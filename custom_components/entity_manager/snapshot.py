@@ -0,0 +1,292 @@
+"""Compact rows of the entity snapshot served by the entity list."""
+import secrets
+import sys
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional
+
+from homeassistant.config_entries import SIGNAL_CONFIG_ENTRY_CHANGED
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.area_registry import EVENT_AREA_REGISTRY_UPDATED
+from homeassistant.helpers.device_registry import EVENT_DEVICE_REGISTRY_UPDATED
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_registry import (
+    EVENT_ENTITY_REGISTRY_UPDATED,
+    async_get as async_get_entity_registry,
+)
+
+from .const import SIGNAL_CONFIG_UPDATED
+from .serialization import json_dumps
+
+ENTITY_ROW_FIELDS = (
+    "entity_id",
+    "name",
+    "state",
+    "domain",
+    "platform",
+    "integration_domain",
+    "area_id",
+    "area_name",
+    "device_id",
+    "device_name",
+    "manufacturer",
+    "model",
+    "enabled",
+    "recorder_days",
+    "recorder_exclude",
+    "retention_policy",
+)
+
+_ROW_VALUES = attrgetter(*ENTITY_ROW_FIELDS)
+
+# Recorded changes allowed beyond twice the entity count before they are dropped
+MAX_FORGOTTEN_CHANGES = 1000
+
+
+def intern_value(value: Optional[str]) -> Optional[str]:
+    """Intern a categorical string shared by many rows."""
+    return None if value is None else sys.intern(value)
+
+
+class EntityRow:
+    """One entity of the snapshot.
+
+    Rows use __slots__ instead of a per-entity dict, and the categorical
+    fields (domain, platform, integration, area, manufacturer, model) are
+    interned so thousands of rows share one copy of each value. Rows are
+    converted to dicts only when serialized at the API boundary.
+    """
+
+    __slots__ = ENTITY_ROW_FIELDS
+
+    def __init__(
+        self,
+        entity_id: str,
+        name: str,
+        state: Optional[str],
+        domain: str,
+        platform: str,
+        integration_domain: str,
+        area_id: Optional[str],
+        area_name: Optional[str],
+        device_id: Optional[str],
+        device_name: Optional[str],
+        manufacturer: Optional[str],
+        model: Optional[str],
+        enabled: bool,
+        recorder_days: int,
+        recorder_exclude: bool,
+        retention_policy: Optional[int],
+    ):
+        """Initialize the row, interning the categorical fields."""
+        self.entity_id = entity_id
+        self.name = name
+        self.state = state
+        self.domain = sys.intern(domain)
+        self.platform = sys.intern(platform)
+        self.integration_domain = sys.intern(integration_domain)
+        self.area_id = intern_value(area_id)
+        self.area_name = intern_value(area_name)
+        self.device_id = device_id
+        self.device_name = device_name
+        self.manufacturer = intern_value(manufacturer)
+        self.model = intern_value(model)
+        self.enabled = enabled
+        self.recorder_days = recorder_days
+        self.recorder_exclude = recorder_exclude
+        self.retention_policy = retention_policy
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the row as the dict served by the entities API."""
+        return dict(zip(ENTITY_ROW_FIELDS, _ROW_VALUES(self)))
+
+
+class SerializedSnapshot:
+    """JSON bytes of the entity list, kept between changes.
+
+    Each row is serialized once and reused until the entity's state or
+    registry entry changes; configuration, policy, device, area and config
+    entry changes drop every row. The sorted entity_id list is kept until an
+    entity appears, disappears or is renamed, so after a state change the
+    body is only re-joined from cached rows. Until async_start is called
+    nothing is cached, because nothing would invalidate it.
+
+    While started, every change of an entity's row bumps a revision and
+    records it for that entity, so clients holding the list of one revision
+    can ask for the rows changed since. Rows dropped together by a shared
+    change are compared with their previous JSON when rebuilt and only the
+    ones that differ are recorded. Revisions are prefixed with a random
+    epoch, so those issued before a restart are never taken as current.
+    """
+
+    def __init__(self, hass: HomeAssistant, get_row: Callable[[str], Optional[EntityRow]]):
+        """Initialize the cache with the function building one entity's row."""
+        self.hass = hass
+        self._get_row = get_row
+        self._rows: Dict[str, bytes] = {}
+        self._stale: Dict[str, bytes] = {}
+        self._entity_ids: Optional[List[str]] = None
+        self._body: Optional[bytes] = None
+        self._unsubs: List[CALLBACK_TYPE] = []
+        self._epoch = ""
+        self._revision = 0
+        self._floor = 0
+        self._changed: Dict[str, int] = {}
+
+    @property
+    def revision(self) -> Optional[str]:
+        """Return the current revision, or None when changes are not tracked."""
+        return f"{self._epoch}-{self._revision}" if self._unsubs else None
+
+    @callback
+    def async_start(self) -> None:
+        """Subscribe to the changes that invalidate serialized rows."""
+        self._epoch = secrets.token_hex(4)
+        self._unsubs = [
+            self.hass.bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed),
+            self.hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated),
+            self.hass.bus.async_listen(EVENT_DEVICE_REGISTRY_UPDATED, self._async_clear),
+            self.hass.bus.async_listen(EVENT_AREA_REGISTRY_UPDATED, self._async_clear),
+            async_dispatcher_connect(self.hass, SIGNAL_CONFIG_UPDATED, self._async_clear),
+            async_dispatcher_connect(self.hass, SIGNAL_CONFIG_ENTRY_CHANGED, self._async_clear),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop the serialized rows."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every serialized row and the recorded changes."""
+        self._rows.clear()
+        self._stale.clear()
+        self._changed.clear()
+        self._floor = self._revision
+        self._entity_ids = None
+        self._body = None
+
+    def _mark_changed(self, entity_id: str) -> None:
+        """Record that an entity's row changed in a new revision."""
+        self._revision += 1
+        self._changed[entity_id] = self._revision
+
+    def _drop_row(self, entity_id: str) -> None:
+        """Drop the row of one changed entity."""
+        self._rows.pop(entity_id, None)
+        self._stale.pop(entity_id, None)
+        self._mark_changed(entity_id)
+
+    @callback
+    def _async_clear(self, *args: Any) -> None:
+        """Drop every serialized row after a change shared by many entities.
+
+        The rows are kept aside to find, when rebuilt, which ones changed.
+        """
+        self._stale.update(self._rows)
+        self._rows = {}
+        self._entity_ids = None
+        self._body = None
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Drop the row of an entity whose state changed."""
+        self._body = None
+        self._drop_row(event.data["entity_id"])
+        if event.data.get("old_state") is None or event.data.get("new_state") is None:
+            self._entity_ids = None
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        """Drop the row of a created, updated, renamed or removed entity."""
+        self._body = None
+        self._drop_row(event.data["entity_id"])
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._drop_row(old_entity_id)
+            self._entity_ids = None
+        elif event.data["action"] != "update":
+            self._entity_ids = None
+
+    def body(self) -> bytes:
+        """Return the entity list as JSON, sorted by entity_id."""
+        if self._body is not None:
+            return self._body
+
+        entity_ids = self._entity_ids
+        if entity_ids is None:
+            known = set(async_get_entity_registry(self.hass).entities)
+            known.update(self.hass.states.async_entity_ids())
+            entity_ids = sorted(known)
+            if self._unsubs:
+                self._entity_ids = entity_ids
+
+        tracked = bool(self._unsubs)
+        rows = self._rows if tracked else {}
+        stale = self._stale if tracked else {}
+        parts = []
+        for entity_id in entity_ids:
+            row = rows.get(entity_id)
+            if row is None:
+                entity_row = self._get_row(entity_id)
+                if entity_row is None:
+                    continue
+                row = rows[entity_id] = json_dumps(entity_row.as_dict())
+                if entity_id in stale and stale.pop(entity_id) != row:
+                    self._mark_changed(entity_id)
+            parts.append(row)
+
+        body = b"[" + b",".join(parts) + b"]"
+        if tracked:
+            # Rows set aside that were not rebuilt belong to entities gone since
+            for entity_id in stale:
+                self._mark_changed(entity_id)
+            stale.clear()
+            # Ids of removed and renamed entities pile up; past a bound they
+            # are forgotten and older revisions get the full list instead
+            if len(self._changed) > 2 * len(rows) + MAX_FORGOTTEN_CHANGES:
+                self._changed.clear()
+                self._floor = self._revision
+            self._body = body
+        return body
+
+    def changes(self, since: Optional[str]) -> bytes:
+        """Return the entities changed after revision ``since`` as JSON.
+
+        The answer is ``{"revision", "full": false, "changed": [rows],
+        "removed": [entity_ids]}``, or ``{"revision", "full": true,
+        "entities": [rows]}`` when ``since`` is empty, unknown or older than
+        the changes still recorded.
+        """
+        body = self.body()
+        revision = json_dumps(self.revision)
+        base = self._parse_revision(since)
+        if base is None:
+            return b'{"revision":' + revision + b',"full":true,"entities":' + body + b"}"
+
+        changed = []
+        removed = []
+        for entity_id, changed_at in self._changed.items():
+            if changed_at > base:
+                row = self._rows.get(entity_id)
+                if row is None:
+                    removed.append(entity_id)
+                else:
+                    changed.append(row)
+        return (
+            b'{"revision":' + revision + b',"full":false,"changed":['
+            + b",".join(changed) + b'],"removed":' + json_dumps(removed) + b"}"
+        )
+
+    def _parse_revision(self, since: Optional[str]) -> Optional[int]:
+        """Return the revision number of ``since`` if changes since it are known."""
+        if not since or not self._unsubs:
+            return None
+        epoch, _, number = since.partition("-")
+        if epoch != self._epoch or not number.isdigit():
+            return None
+        base = int(number)
+        if base < self._floor or base > self._revision:
+            return None
+        return base
@@ -0,0 +1,238 @@
+"""Incrementally maintained entity statistics for Entity Manager."""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+from homeassistant.helpers.entity_registry import (
+    EVENT_ENTITY_REGISTRY_UPDATED,
+    async_get as async_get_entity_registry,
+)
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DEFAULT_RECORDER_DAYS,
+    RETENTION_BUCKETS,
+    RETENTION_EXCLUDED,
+    SIGNAL_CONFIG_UPDATED,
+    SIGNAL_STATS_UPDATED,
+    STATS_UPDATE_THROTTLE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _increment(counts: Dict[str, int], key: str, amount: int) -> None:
+    """Add ``amount`` to ``counts[key]``, dropping keys that reach zero."""
+    value = counts.get(key, 0) + amount
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def retention_bucket(recorder_days: int, recorder_exclude: bool) -> str:
+    """Return the RETENTION_BUCKETS key for effective recorder settings."""
+    if recorder_exclude:
+        return RETENTION_EXCLUDED
+    for max_days, key in RETENTION_BUCKETS:
+        if max_days is None or recorder_days <= max_days:
+            return key
+    return RETENTION_BUCKETS[-1][1]
+
+
+class EntityStatsTracker:
+    """Keep entity counters up to date from registry, state and config changes.
+
+    The full registry is walked once on start; afterwards every change only
+    touches the counters of the affected entity. Listeners are notified
+    through SIGNAL_STATS_UPDATED at most once every STATS_UPDATE_THROTTLE
+    seconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, manager):
+        """Initialize the tracker."""
+        self.hass = hass
+        self._manager = manager
+        # entity_id -> (domain, disabled, state bucket, retention bucket)
+        self._entries: Dict[str, Tuple[str, bool, str, str]] = {}
+        self.enabled_entities = 0
+        self.domains: Dict[str, int] = {}
+        self.states: Dict[str, int] = {}
+        self.retention: Dict[str, int] = {}
+        self.managed_entities = 0
+        self.recorder_config: Dict[str, int] = {}
+        self._unsubs: List[CALLBACK_TYPE] = []
+        self._cancel_update: Optional[CALLBACK_TYPE] = None
+        # False until the counters have been built from the registry
+        self.started = False
+
+    @property
+    def total_entities(self) -> int:
+        """Return the number of registry entities."""
+        return len(self._entries)
+
+    @property
+    def disabled_entities(self) -> int:
+        """Return the number of disabled registry entities."""
+        return len(self._entries) - self.enabled_entities
+
+    @property
+    def excluded_entities(self) -> int:
+        """Return the number of registry entities excluded from the recorder."""
+        return self.retention.get(RETENTION_EXCLUDED, 0)
+
+    @callback
+    def async_start(self) -> None:
+        """Build the counters and subscribe to changes."""
+        entity_registry = async_get_entity_registry(self.hass)
+        self._update_config_counts()
+        for entry in entity_registry.entities.values():
+            self._add(entry.entity_id, bool(entry.disabled_by))
+
+        self._unsubs = [
+            self.hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated),
+            self.hass.bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed),
+            async_dispatcher_connect(self.hass, SIGNAL_CONFIG_UPDATED, self._async_config_updated),
+        ]
+        self.started = True
+        # Sensors may have been added before the counters were built
+        self._async_schedule_update()
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from all changes."""
+        self.started = False
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        if self._cancel_update is not None:
+            self._cancel_update()
+            self._cancel_update = None
+
+    def _state_bucket(self, entity_id: str, disabled: bool) -> str:
+        """Return the histogram key for an entity's current state."""
+        state_obj = self.hass.states.get(entity_id)
+        if state_obj:
+            return state_obj.state
+        return "disabled" if disabled else "not_provided"
+
+    def _add(self, entity_id: str, disabled: bool) -> None:
+        """Count a registry entity."""
+        domain = entity_id.split('.')[0]
+        bucket = self._state_bucket(entity_id, disabled)
+        retention = retention_bucket(*self._manager._resolve_recorder_settings(entity_id, domain))
+        self._entries[entity_id] = (domain, disabled, bucket, retention)
+        if not disabled:
+            self.enabled_entities += 1
+        _increment(self.domains, domain, 1)
+        _increment(self.states, bucket, 1)
+        _increment(self.retention, retention, 1)
+
+    def _remove(self, entity_id: str) -> None:
+        """Stop counting a registry entity."""
+        if (entry := self._entries.pop(entity_id, None)) is None:
+            return
+        domain, disabled, bucket, retention = entry
+        if not disabled:
+            self.enabled_entities -= 1
+        _increment(self.domains, domain, -1)
+        _increment(self.states, bucket, -1)
+        _increment(self.retention, retention, -1)
+
+    def _update_config_counts(self) -> None:
+        """Recount the managed entity configuration."""
+        config = self._manager._config
+        recorder_config: Dict[str, int] = {}
+        for entity_config in config.values():
+            key = f"entities_with_{entity_config.get('recorder_days', DEFAULT_RECORDER_DAYS)}_days"
+            recorder_config[key] = recorder_config.get(key, 0) + 1
+        self.managed_entities = len(config)
+        self.recorder_config = recorder_config
+
+    def _update_retention(self) -> None:
+        """Re-resolve the retention bucket of every registry entity."""
+        retention: Dict[str, int] = {}
+        resolve = self._manager._resolve_recorder_settings
+        for entity_id, (domain, disabled, bucket, _) in self._entries.items():
+            key = retention_bucket(*resolve(entity_id, domain))
+            self._entries[entity_id] = (domain, disabled, bucket, key)
+            retention[key] = retention.get(key, 0) + 1
+        self.retention = retention
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        """Apply a registry create/remove/update to the counters."""
+        action = event.data.get("action")
+        entity_id = event.data.get("entity_id")
+
+        if action == "remove":
+            self._remove(entity_id)
+        elif action in ("create", "update"):
+            self._remove(event.data.get("old_entity_id") or entity_id)
+            entry = async_get_entity_registry(self.hass).async_get(entity_id)
+            if entry is not None:
+                self._add(entity_id, bool(entry.disabled_by))
+        else:
+            return
+        self._async_schedule_update()
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Move a registry entity to its new state bucket."""
+        entity_id = event.data.get("entity_id")
+        if (entry := self._entries.get(entity_id)) is None:
+            return
+        domain, disabled, old_bucket, retention = entry
+        new_bucket = self._state_bucket(entity_id, disabled)
+        if new_bucket == old_bucket:
+            return
+        self._entries[entity_id] = (domain, disabled, new_bucket, retention)
+        _increment(self.states, old_bucket, -1)
+        _increment(self.states, new_bucket, 1)
+        self._async_schedule_update()
+
+    @callback
+    def _async_config_updated(self) -> None:
+        """Recount configuration after it was saved or reloaded."""
+        self._update_config_counts()
+        self._update_retention()
+        self._async_schedule_update()
+
+    @callback
+    def _async_schedule_update(self) -> None:
+        """Notify listeners, coalescing bursts of changes."""
+        if self._cancel_update is not None:
+            return
+
+        @callback
+        def _async_notify(_now: Any) -> None:
+            self._cancel_update = None
+            async_dispatcher_send(self.hass, SIGNAL_STATS_UPDATED)
+
+        self._cancel_update = async_call_later(self.hass, STATS_UPDATE_THROTTLE, _async_notify)
+
+    def retention_count(self, key: str) -> int:
+        """Return the number of registry entities in a retention bucket."""
+        return self.retention.get(key, 0)
+
+    def summary(self) -> Dict[str, int]:
+        """Return the scalar counters."""
+        return {
+            "total_entities": self.total_entities,
+            "managed_entities": self.managed_entities,
+            "enabled_entities": self.enabled_entities,
+            "disabled_entities": self.disabled_entities,
+            "excluded_recorder_entities": self.excluded_entities,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a copy of all counters, including the histograms."""
+        return {
+            **self.summary(),
+            "retention": {key: self.retention_count(key) for _, key in RETENTION_BUCKETS},
+            "domains": dict(self.domains),
+            "states": dict(self.states),
+            "recorder_config": dict(self.recorder_config),
+        }
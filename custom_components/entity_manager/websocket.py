@@ -0,0 +1,34 @@
+"""Websocket commands for Entity Manager."""
+import logging
+from typing import Any, Dict
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DEFAULT_SEARCH_LIMIT, DOMAIN, MAX_SEARCH_LIMIT, WS_TYPE_SEARCH
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_search)
+    _LOGGER.debug("Registered websocket command %s", WS_TYPE_SEARCH)
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): WS_TYPE_SEARCH,
+    vol.Required("query"): str,
+    vol.Optional("limit", default=DEFAULT_SEARCH_LIMIT): vol.All(int, vol.Range(min=1, max=MAX_SEARCH_LIMIT)),
+})
+@websocket_api.async_response
+async def websocket_search(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]) -> None:
+    """Return the entities best matching a search query, once the search index is built."""
+    manager = hass.data.get(DOMAIN)
+    if not manager:
+        connection.send_error(msg["id"], "not_initialized", "Entity Manager not initialized")
+        return
+    await manager.async_ensure_started()
+    connection.send_result(msg["id"], {"entities": manager.search_entities(msg["query"], msg["limit"])})
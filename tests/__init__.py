@@ -0,0 +1 @@
+"""Tests for the Entity Manager integration."""
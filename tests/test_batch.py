@@ -0,0 +1,110 @@
+"""Tests for transactional configuration batches."""
+import asyncio
+import json
+import os
+
+from custom_components.entity_manager import EntityManager
+from custom_components.entity_manager.batch import REMOVE, ConfigBatch, validate_operations
+
+
+def _batch(config, domain_config=None, domain_entities=None):
+    domain_entities = domain_entities or {}
+    return ConfigBatch(config, domain_config or {}, lambda domain: domain_entities.get(domain, []))
+
+
+def test_validate_operations_reports_every_invalid_operation():
+    validated, errors = validate_operations([
+        {"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5},
+        {"action": "reboot"},
+        {"action": "update_entity_state", "entity_id": "sensor.a"},
+    ])
+
+    assert validated == [{"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5}]
+    assert [(error["index"], error["action"]) for error in errors] == [(1, "reboot"), (2, "update_entity_state")]
+
+
+def test_batch_leaves_the_live_configuration_untouched():
+    config = {"sensor.a": {"recorder_days": 3}, "sensor.b": {"enabled": True}}
+    domain_config = {"light": {"recorder_days": 10}}
+    batch = _batch(config, domain_config)
+
+    batch.apply({"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5})
+    batch.apply({"action": "bulk_delete", "entity_ids": ["sensor.b"]})
+    batch.apply({"action": "update_domain_recorder_days", "domain": "light", "domain_recorder_days": 2})
+
+    assert config == {"sensor.a": {"recorder_days": 3}, "sensor.b": {"enabled": True}}
+    assert domain_config == {"light": {"recorder_days": 10}}
+    assert batch.config == {"sensor.a": {"recorder_days": 5}}
+    assert batch.domain_config == {"light": {"recorder_days": 2}}
+    assert batch.config_changed and batch.domain_config_changed
+
+
+def test_batch_coalesces_registry_changes_per_entity():
+    batch = _batch({})
+
+    batch.apply({"action": "update_entity_state", "entity_id": "sensor.a", "enabled": False})
+    batch.apply({"action": "bulk_update", "entity_ids": ["sensor.a", "sensor.b"], "enabled": True})
+    batch.apply({"action": "delete_entity", "entity_id": "sensor.b"})
+
+    assert batch.registry_changes == {"sensor.a": True, "sensor.b": REMOVE}
+
+
+def test_excluding_a_domain_clears_entity_overrides():
+    config = {"light.a": {"recorder_exclude": False, "enabled": True}, "light.b": {"recorder_exclude": True}}
+    batch = _batch(config, domain_entities={"light": ["light.a", "light.b", "light.c"]})
+
+    result = batch.apply({"action": "exclude_domain", "domain": "light", "recorder_exclude": True})
+
+    assert result["cleared_overrides"] == 2
+    assert batch.config == {"light.a": {"enabled": True}}
+    assert batch.domain_config == {"light": {"recorder_exclude": True}}
+
+
+async def test_apply_batch_is_all_or_nothing(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    os.makedirs(hass.config.path("custom_components", "entity_manager"))
+    manager = EntityManager(hass)
+    manager._config = {"sensor.a": {"recorder_days": 3}}
+
+    result = await manager.apply_batch([
+        {"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5},
+        {"action": "update_recorder_days", "entity_id": "sensor.b", "recorder_days": -1},
+    ])
+
+    assert result["status"] == "error"
+    assert result["applied"] == 0
+    assert [error["index"] for error in result["errors"]] == [1]
+    assert manager._config == {"sensor.a": {"recorder_days": 3}}
+    assert not os.path.exists(manager._config_path)
+
+    result = await manager.apply_batch([
+        {"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5},
+        {"action": "update_recorder_exclude", "entity_id": "sensor.b", "recorder_exclude": True},
+    ])
+
+    assert result["status"] == "success"
+    assert result["applied"] == 2
+    assert manager._config == {"sensor.a": {"recorder_days": 5}, "sensor.b": {"recorder_exclude": True}}
+    assert os.path.exists(manager._config_path)
+
+
+async def test_concurrent_saves_and_batches_are_all_kept(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    os.makedirs(hass.config.path("custom_components", "entity_manager"))
+    manager = EntityManager(hass)
+
+    await asyncio.gather(
+        manager.apply_batch([{"action": "update_recorder_days", "entity_id": "sensor.a", "recorder_days": 5}]),
+        manager.apply_batch([{"action": "update_recorder_days", "entity_id": "sensor.d", "recorder_days": 2}]),
+        manager.bulk_update_recorder_exclude(["sensor.b", "sensor.c"], True),
+    )
+
+    expected = {
+        "sensor.a": {"recorder_days": 5},
+        "sensor.b": {"recorder_exclude": True},
+        "sensor.c": {"recorder_exclude": True},
+        "sensor.d": {"recorder_days": 2},
+    }
+    assert manager._config == expected
+    with open(manager._config_path, encoding="utf-8") as f:
+        assert json.load(f) == expected
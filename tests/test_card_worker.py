@@ -0,0 +1,86 @@
+"""Tests for the entity index that runs in the card's Web Worker."""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+CARD_PATH = os.path.join(os.path.dirname(__file__), "..", "custom_components", "entity_manager", "entity-manager-card-v45.js")
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def _node(script: str, *args: str) -> str:
+    result = subprocess.run(["node", "-e", script, *args], capture_output=True, text=True, timeout=60, check=True)
+    return result.stdout
+
+
+# Runs the card's entity index (the Web Worker's query engine) against a
+# plain filter over the entity objects, for every combination of filters.
+_INDEX_SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+const ctx = vm.createContext({
+    console, Map, Set, Intl, Object, Array, JSON, Math,
+    HTMLElement: class {}, customElements: { get: () => undefined, define: () => {} },
+});
+vm.runInContext(fs.readFileSync(process.argv[1], 'utf8'), ctx);
+const index = vm.runInContext('createEntityIndex()', ctx);
+const states = ['on', 'unavailable', 'unknown', 'disabled', '', null];
+const entities = Array.from({ length: 240 }, (_, i) => ({
+    entity_id: `${['sensor', 'light'][i % 2]}.room_${i}`, name: i % 7 ? `Room ${i} Lamp` : null,
+    state: states[i % 6], domain: ['sensor', 'light'][i % 2], integration_domain: ['zha', 'hue', null][i % 3],
+    area_id: ['kitchen', null][i % 2 ? 0 : 1], enabled: i % 4 !== 0, recorder_exclude: i % 5 === 0, recorder_days: i % 11,
+}));
+function matches(entity, filters) {
+    const search = filters.search.toLowerCase();
+    if (filters.state) {
+        const state = entity.state;
+        const ok = {
+            normal: !['unavailable', 'unknown', 'disabled', null, ''].includes(state),
+            unavailable: state === 'unavailable', unknown: state === 'unknown', disabled: state === 'disabled',
+            not_provided: state === null || state === '',
+        }[filters.state];
+        if (!ok) return false;
+    }
+    if (filters.enabled && (filters.enabled === 'enabled' ? !entity.enabled : entity.enabled)) return false;
+    if (filters.recorder && (filters.recorder === 'excluded' ? !entity.recorder_exclude : entity.recorder_exclude)) return false;
+    if (filters.integration && entity.integration_domain !== filters.integration) return false;
+    if (filters.area && entity.area_id !== filters.area) return false;
+    if (filters.domain && entity.domain !== filters.domain) return false;
+    if (search && !entity.entity_id.includes(search) && !(entity.name || '').toLowerCase().includes(search)) return false;
+    return true;
+}
+const stats = index.load(entities);
+const mismatches = [];
+let checked = 0;
+for (const search of ['', 'room_1', 'LAMP', 'nothing'])
+for (const state of ['', 'normal', 'unavailable', 'unknown', 'disabled', 'not_provided'])
+for (const enabled of ['', 'enabled', 'disabled'])
+for (const recorder of ['', 'excluded', 'included'])
+for (const integration of ['', 'zha', 'missing'])
+for (const domain of ['', 'light']) {
+    const filters = { search, state, enabled, recorder, integration, domain, area: search ? 'kitchen' : '' };
+    const got = Array.from(index.query({ filters }).indices);
+    const expected = entities.flatMap((entity, i) => (matches(entity, filters) ? [i] : []));
+    checked++;
+    if (JSON.stringify(got) !== JSON.stringify(expected)) mismatches.push(filters);
+}
+index.update({ index: 0, enabled: true, recorder_exclude: false, recorder_days: 30 });
+const byDays = Array.from(index.query({ filters: { search: '', state: '', enabled: 'enabled', recorder: 'included' }, sort: 'recorder_days' }).indices);
+console.log(JSON.stringify({
+    checked, mismatches, total: stats.total, enabled: stats.enabled, excluded: stats.excluded, first: byDays[0],
+}));
+"""
+
+
+@requires_node
+def test_entity_index_queries_match_plain_filters():
+    result = json.loads(_node(_INDEX_SCRIPT, CARD_PATH))
+
+    assert result["checked"] == 1296
+    assert result["mismatches"] == []
+    assert (result["total"], result["enabled"], result["excluded"]) == (240, 180, 48)
+    # Updated in place: entity 0 is now enabled, included and kept longest
+    assert result["first"] == 0
@@ -0,0 +1,192 @@
+"""Tests for the frontend bundle and its JavaScript minifier."""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from homeassistant.components import frontend
+from homeassistant.setup import async_setup_component
+
+from custom_components.entity_manager.const import CARD_SOURCE, PANEL_URL_PATH
+from custom_components.entity_manager.frontend import (
+    FrontendBundle,
+    async_remove_panel,
+    async_setup_frontend,
+    async_setup_panel,
+    minify_js,
+    split_modules,
+)
+
+CARD_PATH = os.path.join(os.path.dirname(__file__), "..", "custom_components", "entity_manager", CARD_SOURCE)
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def _node(script: str, *args: str) -> str:
+    result = subprocess.run(["node", "-e", script, *args], capture_output=True, text=True, timeout=60, check=True)
+    return result.stdout
+
+
+@pytest.fixture(name="bundle")
+def bundle_fixture(tmp_path):
+    shutil.copy(CARD_PATH, tmp_path / CARD_SOURCE)
+    bundle = FrontendBundle(str(tmp_path))
+    bundle.build()
+    return bundle
+
+
+def test_minify_drops_comments_but_not_strings():
+    source = "const a = 'x // y'; // comment\n/* block */ let b = \"/* s */\";"
+
+    assert minify_js(source) == "const a='x // y';let b=\"/* s */\";\n"
+
+
+def test_minify_keeps_line_breaks_that_affect_semicolon_insertion():
+    assert minify_js("let x = a\n++b\nreturn\nvalue") == "let x=a\n++b\nreturn\nvalue\n"
+
+
+def test_minify_copies_nested_template_literals():
+    source = "const t = `a ${ {k: `b ${c}`}.k } // not a comment`;"
+
+    assert minify_js(source) == "const t=`a ${{k:`b ${c}`}.k} // not a comment`;\n"
+
+
+def test_minify_tells_regular_expressions_from_divisions():
+    assert minify_js("const r = x.replace(/\\/+$/g, '') / 2 / y;") == "const r=x.replace(/\\/+$/g,'')/2/y;\n"
+    assert minify_js("if (a) { return /[/]x/.test(s) }") == "if(a){return/[/]x/.test(s)}\n"
+
+
+def test_minify_keeps_unary_operators_apart():
+    assert minify_js("const s = a + +b - -c;") == "const s=a+ +b- -c;\n"
+
+
+def test_minify_rejects_unterminated_input():
+    with pytest.raises(ValueError):
+        minify_js("const t = `open")
+    with pytest.raises(ValueError):
+        minify_js("/* open")
+
+
+def test_split_modules():
+    source = "class A {\n    a() {}\n    // @module extra\n    b() {}\n    // @end module\n}\n"
+
+    assert split_modules(source) == ("class A {\n    a() {}\n}\n", {"extra": "    b() {}\n"})
+
+
+def test_build_writes_hashed_files_and_gzip_copies(bundle, tmp_path):
+    names = set(bundle.assets)
+
+    assert bundle.entry.name in names
+    assert {name.split(".")[0] for name in names} == {"entity-manager", "entity-manager-domains", "entity-manager-reports"}
+    assert set(os.listdir(bundle.output_dir)) == names | {f"{name}.gz" for name in names}
+    # Rebuilding removes the files of older builds
+    (tmp_path / "frontend" / "entity-manager.old.js").write_text("")
+    bundle.build()
+    assert set(os.listdir(bundle.output_dir)) == names | {f"{name}.gz" for name in names}
+
+
+async def test_panel_loads_the_bundle_without_a_token(hass, hass_client_no_auth):
+    assert await async_setup_component(hass, "frontend", {})
+    bundle = await async_setup_frontend(hass)
+    await async_setup_panel(hass, bundle)
+    panel = hass.data[frontend.DATA_PANELS][PANEL_URL_PATH]
+    module_url = panel.config["_panel_custom"]["module_url"]
+    client = await hass_client_no_auth()
+
+    # Like a browser: the page, then the module it names, both without a token
+    response = await client.get(f"/{PANEL_URL_PATH}")
+    assert response.status == 200
+    assert "text/html" in response.headers["Content-Type"]
+    assert panel.require_admin
+    assert module_url == bundle.url(bundle.entry)
+    response = await client.get(module_url)
+    assert response.status == 200
+    assert await response.read() == bundle.entry.body
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    async_remove_panel(hass)
+    assert PANEL_URL_PATH not in hass.data[frontend.DATA_PANELS]
+    assert (await client.get(f"/{PANEL_URL_PATH}")).status == 404
+
+
+@requires_node
+def test_minified_snippets_behave_the_same():
+    source = """
+const out = [];
+let a = 1
+let b = 2
+a
+++b
+out.push(a, b);
+out.push(`x ${ {k: `y ${a + +b}`}.k } // kept`);
+out.push('a/b//c'.replace(/\\/+/g, '-'), 10 / 2 / 5);
+function f() {
+    return /* comment */ a
+}
+out.push(f());
+console.log(JSON.stringify(out));
+"""
+    script = "const vm = require('vm'); vm.runInNewContext(process.argv[1], {console});"
+
+    assert _node(script, minify_js(source)) == _node(script, source)
+
+
+@requires_node
+def test_minified_card_parses(bundle):
+    for name in bundle.assets:
+        subprocess.run(["node", "--check", os.path.join(bundle.output_dir, name)], check=True, timeout=60)
+
+
+# Loads the card and the bundle (core script, then its modules) into two
+# contexts with a minimal DOM, and compares what they define and render.
+_COMPARE_SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [cardPath, outputDir, entry] = process.argv.slice(1);
+function context() {
+    const registry = {};
+    return vm.createContext({
+        console, Map, Set, Promise, setTimeout, clearTimeout, Intl, URL, Object, Array, JSON, Math,
+        HTMLElement: class { attachShadow() { this.shadowRoot = { getElementById: () => null, querySelector: () => null, querySelectorAll: () => [] }; } },
+        customElements: { get: (name) => registry[name], define: (name, cls) => { registry[name] = cls; } },
+    });
+}
+const card = context();
+vm.runInContext(fs.readFileSync(cardPath, 'utf8'), card);
+const bundle = context();
+vm.runInContext(fs.readFileSync(`${outputDir}/${entry}`, 'utf8'), bundle);
+for (const url of Object.values(vm.runInContext('EntityManagerCard.moduleUrls', bundle))) {
+    vm.runInContext(`(() => {${fs.readFileSync(`${outputDir}/${url.split('/').pop()}`, 'utf8')}})()`, bundle);
+}
+const entities = Array.from({ length: 200 }, (_, i) => ({
+    entity_id: `sensor.x_${i}`, name: `X ${i}`, state: ['on', 'unavailable', ''][i % 3], domain: 'sensor',
+    integration_domain: ['a', 'b'][i % 2], area_id: null, enabled: i % 4 !== 0, recorder_exclude: i % 5 === 0, recorder_days: i % 9,
+}));
+const domains = [{ domain: 'light', status: 'partially_excluded', total_entities: 3, excluded_entities: 1, enabled_entities: 2, exclusion_percentage: 33, recorder_days: 5 }];
+function describe(ctx) {
+    const Card = ctx.customElements.get('entity-manager-card');
+    const element = new Card();
+    element.domains = domains;
+    element.entities = entities;
+    element.filteredEntities = entities;
+    const index = vm.runInContext('createEntityIndex()', ctx);
+    index.load(entities);
+    const filters = { search: 'x_1', state: '', integration: '', area: '', domain: '', enabled: 'enabled', recorder: '' };
+    return {
+        methods: Object.getOwnPropertyNames(Card.prototype).sort(),
+        query: Array.from(index.query({ filters, sort: 'name' }).indices),
+        domainsView: element.renderDomainsView(),
+        entitiesView: element.renderEntitiesView(['a'], ['sensor'], [['k', 'Kitchen']]),
+    };
+}
+console.log(JSON.stringify([describe(card), describe(bundle)]));
+"""
+
+
+@requires_node
+def test_minified_card_behaves_the_same(bundle):
+    card, bundled = json.loads(_node(_COMPARE_SCRIPT, CARD_PATH, bundle.output_dir, bundle.entry.name))
+
+    assert card["query"]
+    assert bundled == card
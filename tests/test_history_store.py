@@ -0,0 +1,98 @@
+"""Tests for the hourly aggregation of recorder states."""
+import custom_components.entity_manager as entity_manager
+from custom_components.entity_manager import EntityManager, recorder_queries
+from custom_components.entity_manager.history_store import SECONDS_PER_HOUR, accumulate_hourly
+
+HOUR = 100 * SECONDS_PER_HOUR
+
+
+def test_accumulate_hourly_aggregates_numeric_states_per_hour():
+    acc = {}
+    rows = [
+        ("sensor.a", "1.5", HOUR + 10),
+        ("sensor.a", "unavailable", HOUR + 20),
+        ("sensor.b", "7", HOUR + 30),
+        ("sensor.a", "4.5", HOUR + 40),
+        ("sensor.a", "nan", HOUR + 50),
+        ("sensor.a", "2", HOUR + SECONDS_PER_HOUR),
+    ]
+
+    assert accumulate_hourly(acc, rows, {}) == 4
+    assert acc == {
+        ("sensor.a", HOUR): [1.5, 4.5, 6.0, 2],
+        ("sensor.b", HOUR): [7.0, 7.0, 7.0, 1],
+        ("sensor.a", HOUR + SECONDS_PER_HOUR): [2.0, 2.0, 2.0, 1],
+    }
+
+
+def test_accumulate_hourly_merges_batches():
+    acc = {}
+    accumulate_hourly(acc, [("sensor.a", "3", HOUR)], {})
+    accumulate_hourly(acc, [("sensor.a", "1", HOUR + 1), ("sensor.a", "5", HOUR + 2)], {})
+
+    assert acc == {("sensor.a", HOUR): [1.0, 5.0, 9.0, 3]}
+
+
+def test_accumulate_hourly_skips_rows_before_the_watermark():
+    acc = {}
+    rows = [("sensor.a", "1", HOUR - 1), ("sensor.a", "2", HOUR), ("sensor.b", "3", HOUR - 1)]
+
+    assert accumulate_hourly(acc, rows, {"sensor.a": HOUR}) == 2
+    assert acc == {("sensor.a", HOUR): [2.0, 2.0, 2.0, 1], ("sensor.b", HOUR - SECONDS_PER_HOUR): [3.0, 3.0, 3.0, 1]}
+
+
+async def test_downsample_history_reads_each_chunk_from_its_watermark(hass, tmp_path, monkeypatch):
+    hass.config.config_dir = str(tmp_path)
+    manager = EntityManager(hass)
+    await hass.async_add_executor_job(manager.history_store.merge_hourly, {}, ["sensor.old_1", "sensor.old_2"], HOUR)
+    queries = []
+
+    def iter_state_batches(session, entity_ids, start_ts, end_ts, batch_size):
+        queries.append((list(entity_ids), start_ts))
+        yield [(entity_id, "1", HOUR + SECONDS_PER_HOUR) for entity_id in entity_ids]
+
+    async def recorder_query(query, *args):
+        return query(None, *args)
+
+    monkeypatch.setattr(recorder_queries, "iter_state_batches", iter_state_batches)
+    monkeypatch.setattr(entity_manager, "DOWNSAMPLE_CHUNK_SIZE", 2)
+    manager._async_recorder_query = recorder_query
+
+    result = await manager.downsample_history(["sensor.old_1", "sensor.new_1", "sensor.old_2", "sensor.new_2"])
+
+    assert queries == [(["sensor.new_1", "sensor.new_2"], 0), (["sensor.old_1", "sensor.old_2"], HOUR)]
+    assert (result["status"], result["rows_processed"], result["hours_written"]) == ("success", 4, 4)
+    # Every chunk was merged and moved its watermarks to the same end
+    watermarks = await hass.async_add_executor_job(manager.history_store.get_watermarks, ["sensor.new_1", "sensor.old_2"])
+    assert watermarks["sensor.new_1"] == watermarks["sensor.old_2"] > HOUR
+    await hass.async_add_executor_job(manager.history_store.close)
+
+
+async def test_purge_all_entities_downsamples_the_purged_entities_first(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    manager = EntityManager(hass)
+    manager._config = {"sensor.a": {"recorder_exclude": True}, "sensor.b": {"recorder_days": 1}}
+    calls = []
+
+    async def downsample_history(entity_ids=None):
+        calls.append(("downsample", entity_ids))
+        return downsample_result
+
+    async def recorder_service(service, data):
+        calls.append((service, data["entity_id"]))
+        return 0.0
+
+    manager.downsample_history = downsample_history
+    manager._async_recorder_service = recorder_service
+
+    downsample_result = {"status": "error", "error": "database is locked"}
+    result = await manager.purge_all_entities()
+    assert result["status"] == "error"
+    assert calls == [("downsample", ["sensor.a"])]
+
+    calls.clear()
+    downsample_result = {"status": "success"}
+    result = await manager.purge_all_entities()
+    assert result["status"] == "success"
+    assert calls == [("downsample", ["sensor.a"]), ("purge_entities", ["sensor.a"])]
+    await hass.async_add_executor_job(manager.history_store.close)
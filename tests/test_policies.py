@@ -0,0 +1,46 @@
+"""Tests for the rule-based retention policy matcher."""
+import pytest
+
+from custom_components.entity_manager.policies import PolicyMatcher
+
+RULES = [
+    {"match": "glob", "value": "sensor.*_linkquality", "recorder_days": 2},
+    {"match": "integration", "value": "template", "recorder_exclude": True},
+    {"match": "regex", "value": r"sensor\.(kitchen|hall)_.*", "recorder_days": 7},
+    {"match": "area", "value": "garden", "recorder_days": 30},
+    {"match": "glob", "value": "sensor.*", "recorder_days": 10},
+]
+
+
+@pytest.fixture(name="matcher")
+def matcher_fixture():
+    return PolicyMatcher(RULES)
+
+
+def test_first_matching_rule_wins(matcher):
+    assert matcher.match("sensor.kitchen_linkquality", {"integration": "template"}) == 0
+    assert matcher.match("sensor.kitchen_temp", {"integration": "template"}) == 1
+    assert matcher.match("sensor.kitchen_temp", {"area": "garden"}) == 2
+    assert matcher.match("sensor.pool_temp", {"area": "garden"}) == 3
+    assert matcher.match("sensor.pool_temp", {}) == 4
+
+
+def test_no_matching_rule(matcher):
+    assert matcher.match("light.kitchen", {"integration": "hue", "area": None}) is None
+
+
+def test_patterns_match_the_whole_entity_id(matcher):
+    # The regex is anchored at both ends, like the globs
+    assert matcher.match("sensor.kitchen", {}) == 4
+    assert PolicyMatcher([{"match": "regex", "value": "light"}]).match("light.kitchen", {}) is None
+
+
+def test_settings(matcher):
+    assert matcher.settings(0) == {"policy": 0, "recorder_days": 2}
+    assert matcher.settings(1) == {"policy": 1, "recorder_exclude": True}
+
+
+@pytest.mark.parametrize("value", ["sensor.(", "(?P<name>sensor)"])
+def test_invalid_regex_is_rejected(value):
+    with pytest.raises(ValueError):
+        PolicyMatcher([{"match": "regex", "value": value}])
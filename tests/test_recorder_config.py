@@ -0,0 +1,190 @@
+"""Tests for the recorder.yaml builder and its glob compression."""
+import os
+
+from custom_components.entity_manager import EntityManager
+from custom_components.entity_manager.recorder_config import (
+    build_recorder_config,
+    compress_entity_globs,
+    diff_recorder_config,
+    recorder_config_hash,
+    recorder_config_to_settings,
+)
+from custom_components.entity_manager.recorder_filter import RecorderFilter
+
+
+def _excluded(*entity_ids):
+    return {entity_id: {"recorder_exclude": True} for entity_id in entity_ids}
+
+
+def test_compress_entity_globs_covers_excluded_entities():
+    excluded = ["sensor.a_rssi", "sensor.b_rssi", "sensor.c_rssi", "sensor.d_power"]
+    recorded = ["sensor.d_voltage", "light.x"]
+
+    globs, entities = compress_entity_globs(excluded, recorded)
+
+    assert globs == ["sensor.*_rssi"]
+    assert entities == ["sensor.d_power"]
+
+
+def test_compress_entity_globs_never_matches_recorded_entities():
+    excluded = ["sensor.a_rssi", "sensor.b_rssi"]
+    recorded = ["sensor.c_rssi"]
+
+    globs, entities = compress_entity_globs(excluded, recorded)
+
+    assert globs == []
+    assert entities == excluded
+
+
+def test_build_recorder_config_compresses_excluded_entities():
+    entity_config = _excluded("sensor.a_rssi", "sensor.b_rssi", "sensor.c_rssi")
+    known = [*entity_config, "sensor.temp", "light.x"]
+
+    config = build_recorder_config(entity_config, {}, known)
+
+    assert config["exclude"] == {"entity_globs": ["sensor.*_rssi"]}
+    is_recorded = RecorderFilter(config).is_recorded
+    assert [is_recorded(entity_id) for entity_id in known] == [False, False, False, True, True]
+
+
+def test_build_recorder_config_keeps_entities_when_globs_change_the_filter_case():
+    # Entity includes with entity excludes only (case 6) records just the
+    # included entities; an exclude glob would make it case 5 and start
+    # recording sensor.temp and light.x.
+    entity_config = {
+        **_excluded("sensor.a_rssi", "sensor.b_rssi", "sensor.c_rssi"),
+        "sensor.d_power": {"recorder_days": 3},
+    }
+    known = [*entity_config, "sensor.temp", "light.x"]
+
+    config = build_recorder_config(entity_config, {}, known)
+
+    assert config["include"] == {"entities": {"sensor.d_power": {"purge_keep_days": 3}}}
+    assert config["exclude"] == {"entities": ["sensor.a_rssi", "sensor.b_rssi", "sensor.c_rssi"]}
+    recorder_filter = RecorderFilter(config)
+    assert recorder_filter.case == 6
+    assert not recorder_filter.is_recorded("sensor.temp")
+    assert not recorder_filter.is_recorded("light.x")
+    assert recorder_filter.is_recorded("sensor.d_power")
+
+
+def test_build_recorder_config_without_known_entities_lists_entities():
+    entity_config = _excluded("sensor.a_rssi", "sensor.b_rssi")
+
+    config = build_recorder_config(entity_config, {})
+
+    assert config["exclude"] == {"entities": ["sensor.a_rssi", "sensor.b_rssi"]}
+
+
+def test_build_recorder_config_skips_entities_of_excluded_domains():
+    entity_config = _excluded("sensor.a_rssi", "light.kitchen")
+    domain_config = {"light": {"recorder_exclude": True}, "climate": {"recorder_days": 30}}
+
+    config = build_recorder_config(entity_config, domain_config, entity_config)
+
+    assert config["exclude"] == {"domains": ["light"], "entities": ["sensor.a_rssi"]}
+    assert config["include"] == {"domains": {"climate": {"purge_keep_days": 30}}}
+
+
+def test_recorder_config_hash_ignores_key_order():
+    config = build_recorder_config(_excluded("sensor.a_rssi"), {"climate": {"recorder_days": 30}})
+    reordered = dict(reversed(list(config.items())))
+
+    assert recorder_config_hash(reordered) == recorder_config_hash(config)
+    assert recorder_config_hash({**config, "purge_keep_days": 11}) != recorder_config_hash(config)
+    assert recorder_config_hash(None) is None
+
+
+def test_diff_recorder_config_lists_exclusion_and_retention_changes():
+    old = build_recorder_config(
+        {**_excluded("sensor.a_rssi", "sensor.b_rssi"), "sensor.d_power": {"recorder_days": 3}},
+        {"light": {"recorder_exclude": True}},
+    )
+    new = build_recorder_config(
+        {**_excluded("sensor.b_rssi", "sensor.c_rssi"), "sensor.d_power": {"recorder_days": 5}},
+        {"climate": {"recorder_days": 30}},
+    )
+
+    diff = diff_recorder_config(old, {**new, "commit_interval": 5})
+
+    assert diff["excluded_entities_added"] == ["sensor.c_rssi"]
+    assert diff["excluded_entities_removed"] == ["sensor.a_rssi"]
+    assert diff["excluded_domains_removed"] == ["light"]
+    assert diff["retention_entities_changed"] == {"sensor.d_power": {"old": 3, "new": 5}}
+    assert diff["retention_domains_changed"] == {"climate": {"old": None, "new": 30}}
+    assert diff["settings_changed"] == {"commit_interval": {"old": 1, "new": 5}}
+
+
+def test_diff_recorder_config_without_previous_config():
+    new = build_recorder_config(_excluded("sensor.a_rssi"), {})
+
+    diff = diff_recorder_config(None, new)
+
+    assert diff["excluded_entities_added"] == ["sensor.a_rssi"]
+    assert diff["settings_changed"]["purge_keep_days"] == {"old": None, "new": 10}
+
+
+def test_recorder_config_to_settings_maps_domains_and_retention():
+    recorder_config = {
+        "exclude": {"domains": ["light"], "entities": ["sensor.a_rssi"]},
+        "include": {"domains": {"climate": {"purge_keep_days": 30}}, "entities": {"sensor.d_power": {"purge_keep_days": 3}}},
+    }
+
+    entity_settings, domain_settings = recorder_config_to_settings(recorder_config, ["sensor.a_rssi", "sensor.temp", "light.x"])
+
+    assert domain_settings == {"light": {"recorder_exclude": True}, "climate": {"recorder_days": 30}}
+    # The domain include makes this filter case 4, which does not record sensor.temp
+    assert entity_settings == {
+        "sensor.a_rssi": {"recorder_exclude": True},
+        "sensor.d_power": {"recorder_days": 3},
+        "sensor.temp": {"recorder_exclude": True},
+    }
+
+
+def test_recorder_config_to_settings_resolves_globs_and_include_only_configs():
+    known = ["sensor.a_rssi", "sensor.b_rssi", "sensor.temp", "light.x"]
+
+    entity_settings, _ = recorder_config_to_settings({"exclude": {"entity_globs": ["sensor.*_rssi"]}}, known)
+    assert entity_settings == {"sensor.a_rssi": {"recorder_exclude": True}, "sensor.b_rssi": {"recorder_exclude": True}}
+
+    # With includes only, everything not included is excluded
+    entity_settings, _ = recorder_config_to_settings({"include": {"domains": ["sensor"]}}, known)
+    assert entity_settings == {"light.x": {"recorder_exclude": True}}
+
+
+def test_recorder_config_to_settings_round_trips_generated_config():
+    entity_config = {
+        **_excluded("sensor.a_rssi", "sensor.b_rssi", "sensor.c_rssi"),
+        "sensor.d_power": {"recorder_days": 3},
+    }
+    domain_config = {"light": {"recorder_exclude": True}}
+    known = [*entity_config, "sensor.temp", "light.x", "switch.pump"]
+    recorder_config = build_recorder_config(entity_config, domain_config, known)
+
+    entity_settings, domain_settings = recorder_config_to_settings(recorder_config, known)
+
+    rebuilt = build_recorder_config(entity_settings, domain_settings, known)
+    original_filter, rebuilt_filter = RecorderFilter(recorder_config), RecorderFilter(rebuilt)
+    assert rebuilt_filter.evaluate(known) == original_filter.evaluate(known)
+    assert rebuilt.get("include") == recorder_config.get("include")
+
+
+async def test_update_recorder_config_rewrites_a_deleted_or_edited_file(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    manager = EntityManager(hass)
+    manager._config = _excluded("sensor.a_rssi")
+    recorder_yaml = tmp_path / "recorder.yaml"
+
+    assert (await manager.update_recorder_config(backup_config=False))["changed"] is True
+    assert "recorder.yaml" in (tmp_path / "configuration.yaml").read_text()
+    assert (await manager.update_recorder_config(backup_config=False))["changed"] is False
+
+    os.remove(recorder_yaml)
+    assert (await manager.update_recorder_config(backup_config=False))["changed"] is True
+    assert recorder_yaml.exists()
+
+    recorder_yaml.write_text("purge_keep_days: 3\n")
+    result = await manager.update_recorder_config(backup_config=False)
+    assert result["changed"] is True
+    assert result["diff"]["excluded_entities_added"] == ["sensor.a_rssi"]
+    assert "sensor.a_rssi" in recorder_yaml.read_text()
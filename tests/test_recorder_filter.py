@@ -0,0 +1,62 @@
+"""Tests for the recorder filter simulator."""
+import pytest
+from homeassistant.helpers.entityfilter import convert_include_exclude_filter
+
+from custom_components.entity_manager.recorder_filter import RecorderFilter
+
+ENTITY_IDS = [
+    "sensor.a_rssi",
+    "sensor.b_rssi",
+    "sensor.temp",
+    "sensor.d_power",
+    "light.kitchen",
+    "light.hall",
+    "switch.pump",
+    "binary_sensor.door",
+]
+
+# One configuration per entityfilter case, plus the mapping form Entity
+# Manager writes for include sections with purge_keep_days
+CONFIGS = [
+    (1, {}),
+    (2, {"include": {"domains": ["light"], "entities": ["sensor.temp"]}}),
+    (2, {"include": {"entity_globs": ["sensor.*_rssi"]}}),
+    (3, {"exclude": {"domains": ["light"], "entity_globs": ["sensor.*_rssi"], "entities": ["switch.pump"]}}),
+    (4, {"include": {"domains": ["light", "sensor"]}, "exclude": {"entities": ["light.hall"], "entity_globs": ["sensor.*_rssi"]}}),
+    (4, {"include": {"entity_globs": ["sensor.*"], "entities": ["switch.pump"]}, "exclude": {"entities": ["sensor.temp"]}}),
+    (5, {"include": {"entities": ["light.hall"]}, "exclude": {"domains": ["light"], "entities": ["sensor.temp"]}}),
+    (5, {"include": {"entities": {"sensor.a_rssi": {"purge_keep_days": 3}}}, "exclude": {"entity_globs": ["sensor.*_rssi"]}}),
+    (6, {"include": {"entities": ["sensor.d_power"]}, "exclude": {"entities": ["sensor.a_rssi"]}}),
+]
+
+
+def _ha_filter(recorder_config):
+    """Build Home Assistant's own entityfilter for ``recorder_config``."""
+    sections = {}
+    for section in ("include", "exclude"):
+        values = recorder_config.get(section, {})
+        sections[section] = {key: list(values.get(key, [])) for key in ("domains", "entities", "entity_globs")}
+    return convert_include_exclude_filter(sections)
+
+
+@pytest.mark.parametrize(("case", "recorder_config"), CONFIGS)
+def test_recorder_filter_matches_home_assistant(case, recorder_config):
+    recorder_filter = RecorderFilter(recorder_config)
+    ha_filter = _ha_filter(recorder_config)
+
+    assert recorder_filter.case == case
+    assert recorder_filter.evaluate(ENTITY_IDS) == [ha_filter(entity_id) for entity_id in ENTITY_IDS]
+
+
+def test_recorder_filter_without_config_records_everything():
+    recorder_filter = RecorderFilter(None)
+
+    assert recorder_filter.case == 1
+    assert all(recorder_filter.evaluate(ENTITY_IDS))
+
+
+def test_recorder_filter_accepts_a_single_string():
+    recorder_filter = RecorderFilter({"exclude": {"domains": "light"}})
+
+    assert not recorder_filter.is_recorded("light.kitchen")
+    assert recorder_filter.is_recorded("sensor.temp")
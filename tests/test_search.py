@@ -0,0 +1,65 @@
+"""Tests for the full-text entity search index."""
+import pytest
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.entity_manager.lookups import RegistryLookupCache
+from custom_components.entity_manager.search import EntitySearchIndex, tokenize
+
+
+@pytest.fixture(name="index")
+async def index_fixture(hass):
+    registry = er.async_get(hass)
+    registry.async_get_or_create("sensor", "zha", "kitchen_temp", suggested_object_id="kitchen_temperature")
+    registry.async_get_or_create("sensor", "zha", "hall_temp", suggested_object_id="hall_temperature")
+    registry.async_get_or_create("light", "hue", "kitchen", suggested_object_id="kitchen_ceiling")
+    hass.states.async_set("sensor.kitchen_temperature", "21", {"friendly_name": "Kitchen Temperature"})
+    hass.states.async_set("input_boolean.guest_mode", "off", {"friendly_name": "Guest Mode"})
+    await hass.async_block_till_done()
+
+    lookups = RegistryLookupCache(hass)
+    lookups.async_start()
+    index = EntitySearchIndex(hass, lookups)
+    index.async_start()
+    yield index
+    index.async_stop()
+    lookups.async_stop()
+
+
+def _ids(results):
+    return [entity_id for entity_id, _ in results]
+
+
+def test_tokenize():
+    assert tokenize("Sensor.Kitchen_Temp (2)") == ["sensor", "kitchen", "temp", "2"]
+
+
+async def test_all_terms_must_match(index):
+    assert len(index) == 4
+    assert _ids(index.search("kitchen")) == ["light.kitchen_ceiling", "sensor.kitchen_temperature"]
+    assert _ids(index.search("kitchen temp")) == ["sensor.kitchen_temperature"]
+    assert index.search("kitchen garage") == []
+    assert index.search("  ") == []
+
+
+async def test_exact_tokens_rank_above_prefixes_and_typos(index):
+    results = index.search("temperature")
+    assert _ids(results) == ["sensor.hall_temperature", "sensor.kitchen_temperature"]
+
+    assert _ids(index.search("temp")) == ["sensor.hall_temperature", "sensor.kitchen_temperature"]
+    assert index.search("temp")[0][1] < results[0][1]
+    assert _ids(index.search("temprature")) == ["sensor.hall_temperature", "sensor.kitchen_temperature"]
+    assert _ids(index.search("guest", limit=1)) == ["input_boolean.guest_mode"]
+
+
+async def test_registry_and_name_changes_are_reindexed(hass, index):
+    registry = er.async_get(hass)
+    registry.async_update_entity("sensor.hall_temperature", new_entity_id="sensor.attic_temperature")
+    registry.async_remove("light.kitchen_ceiling")
+    hass.states.async_set("input_boolean.guest_mode", "off", {"friendly_name": "Visitor Mode"})
+    await hass.async_block_till_done()
+
+    assert index.search("hall") == []
+    assert _ids(index.search("attic")) == ["sensor.attic_temperature"]
+    assert _ids(index.search("kitchen")) == ["sensor.kitchen_temperature"]
+    assert _ids(index.search("visitor")) == ["input_boolean.guest_mode"]
+    assert len(index) == 3
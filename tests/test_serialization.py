@@ -0,0 +1,60 @@
+"""Tests for the JSON serialization layer."""
+import importlib
+import json
+import sys
+from datetime import datetime
+
+import pytest
+
+from custom_components.entity_manager import serialization
+
+DATA = {"sensor.á": {"recorder_days": 3, "recorder_exclude": False}, 10: [1.5, None, True]}
+EXPECTED = {"sensor.á": {"recorder_days": 3, "recorder_exclude": False}, "10": [1.5, None, True]}
+
+
+@pytest.fixture(name="backend", params=["orjson", "json"])
+def backend_fixture(request, monkeypatch):
+    """Yield the module with orjson, and reloaded without it."""
+    if request.param == "json":
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    module = importlib.reload(serialization)
+    assert module.HAS_ORJSON == (request.param == "orjson")
+    yield module
+    monkeypatch.undo()
+    importlib.reload(serialization)
+
+
+def test_json_dumps_is_compact_utf8(backend):
+    body = backend.json_dumps(DATA)
+
+    assert body == json.dumps(EXPECTED, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert backend.json_loads(body) == EXPECTED
+
+
+def test_json_dumps_pretty_matches_the_standard_library(backend):
+    assert backend.json_dumps(DATA, pretty=True) == json.dumps(EXPECTED, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def test_json_dumps_serializes_unknown_types_as_strings(backend):
+    assert backend.json_loads(backend.json_dumps({"at": datetime(2024, 1, 2, 3, 4, 5), "ids": {"a"}})) == {
+        "at": "2024-01-02 03:04:05",
+        "ids": "{'a'}",
+    }
+
+
+def test_json_files_round_trip(backend, tmp_path):
+    path = str(tmp_path / "config.json")
+
+    backend.write_json_file(path, DATA, pretty=True)
+
+    assert backend.read_json_file(path) == EXPECTED
+    with pytest.raises(backend.JSONDecodeError):
+        backend.json_loads(b"{")
+
+
+def test_json_response():
+    response = serialization.json_response({"status": "ok"}, status=201)
+
+    assert response.status == 201
+    assert response.content_type == "application/json"
+    assert response.body == b'{"status":"ok"}'
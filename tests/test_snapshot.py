@@ -0,0 +1,78 @@
+"""Tests for the serialized entity snapshot and its revisions."""
+import json
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from custom_components.entity_manager.const import SIGNAL_CONFIG_UPDATED
+from custom_components.entity_manager.snapshot import SerializedSnapshot
+
+
+@pytest.fixture(name="snapshot")
+async def snapshot_fixture(hass):
+    settings = {}
+
+    def get_row(entity_id):
+        state = hass.states.get(entity_id)
+        if state is None:
+            return None
+        row = {"entity_id": entity_id, "state": state.state, "recorder_days": settings.get(entity_id, 10)}
+        return SimpleNamespace(as_dict=lambda: row)
+
+    for entity_id in ("sensor.a", "sensor.b", "sensor.c"):
+        hass.states.async_set(entity_id, "1")
+    snapshot = SerializedSnapshot(hass, get_row)
+    snapshot.settings = settings
+    snapshot.async_start()
+    yield snapshot
+    snapshot.async_stop()
+
+
+def _changes(snapshot, since):
+    return json.loads(snapshot.changes(since))
+
+
+async def test_full_list_without_a_known_revision(snapshot):
+    changes = _changes(snapshot, None)
+
+    assert changes["full"] is True
+    assert [row["entity_id"] for row in changes["entities"]] == ["sensor.a", "sensor.b", "sensor.c"]
+    assert _changes(snapshot, "other-0")["full"] is True
+    epoch = changes["revision"].split("-")[0]
+    assert _changes(snapshot, f"{epoch}-99")["full"] is True
+
+
+async def test_changes_since_a_revision(hass, snapshot):
+    revision = _changes(snapshot, None)["revision"]
+    assert _changes(snapshot, revision) == {"revision": revision, "full": False, "changed": [], "removed": []}
+
+    hass.states.async_set("sensor.b", "2")
+    hass.states.async_remove("sensor.c")
+    await hass.async_block_till_done()
+    changes = _changes(snapshot, revision)
+
+    assert changes["full"] is False
+    assert changes["changed"] == [{"entity_id": "sensor.b", "state": "2", "recorder_days": 10}]
+    assert changes["removed"] == ["sensor.c"]
+    assert changes["revision"] != revision
+    assert _changes(snapshot, changes["revision"])["changed"] == []
+
+
+async def test_shared_changes_report_only_rows_that_differ(hass, snapshot):
+    revision = _changes(snapshot, None)["revision"]
+
+    snapshot.settings["sensor.a"] = 3
+    async_dispatcher_send(hass, SIGNAL_CONFIG_UPDATED)
+    await hass.async_block_till_done()
+    changes = _changes(snapshot, revision)
+
+    assert changes["changed"] == [{"entity_id": "sensor.a", "state": "1", "recorder_days": 3}]
+    assert changes["removed"] == []
+
+
+async def test_no_revision_before_start(hass):
+    snapshot = SerializedSnapshot(hass, lambda entity_id: None)
+
+    assert snapshot.revision is None
+    assert _changes(snapshot, "anything-1") == {"revision": None, "full": True, "entities": []}
@@ -0,0 +1,79 @@
+"""Tests for the incrementally maintained entity statistics."""
+import pytest
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from custom_components.entity_manager import EntityManager
+from custom_components.entity_manager.const import SIGNAL_CONFIG_UPDATED
+from custom_components.entity_manager.stats import EntityStatsTracker, retention_bucket
+
+
+@pytest.fixture(name="manager")
+async def manager_fixture(hass):
+    registry = er.async_get(hass)
+    for index in range(4):
+        registry.async_get_or_create("sensor", "demo", f"s{index}", suggested_object_id=f"s{index}")
+    registry.async_get_or_create("light", "demo", "l0", suggested_object_id="l0", disabled_by=er.RegistryEntryDisabler.USER)
+    hass.states.async_set("sensor.s0", "on")
+    hass.states.async_set("sensor.s1", "unavailable")
+    await hass.async_block_till_done()
+
+    manager = EntityManager(hass)
+    manager._config = {"sensor.s0": {"recorder_days": 1}, "sensor.s1": {"recorder_exclude": True}}
+    manager._domain_config = {"light": {"recorder_days": 60}}
+    manager.stats = EntityStatsTracker(hass, manager)
+    manager.stats.async_start()
+    yield manager
+    manager.stats.async_stop()
+
+
+def _rebuilt(manager):
+    """Return the counters of a tracker built from scratch."""
+    tracker = EntityStatsTracker(manager.hass, manager)
+    tracker.async_start()
+    tracker.async_stop()
+    return tracker.as_dict()
+
+
+@pytest.mark.parametrize(
+    ("recorder_days", "recorder_exclude", "bucket"),
+    [(1, False, "retention_1_day"), (7, False, "retention_2_7_days"), (31, False, "retention_over_30_days"), (1, True, "excluded")],
+)
+def test_retention_bucket(recorder_days, recorder_exclude, bucket):
+    assert retention_bucket(recorder_days, recorder_exclude) == bucket
+
+
+async def test_counters_after_start(manager):
+    stats = manager.stats.as_dict()
+
+    assert stats["total_entities"] == 5
+    assert stats["enabled_entities"] == 4
+    assert stats["disabled_entities"] == 1
+    assert stats["managed_entities"] == 2
+    assert stats["excluded_recorder_entities"] == 1
+    assert stats["domains"] == {"sensor": 4, "light": 1}
+    assert stats["states"] == {"on": 1, "unavailable": 1, "not_provided": 2, "disabled": 1}
+    assert stats["retention"] == {
+        "retention_1_day": 1,
+        "retention_2_7_days": 0,
+        "retention_8_30_days": 2,
+        "retention_over_30_days": 1,
+    }
+
+
+async def test_incremental_updates_match_a_rebuild(hass, manager):
+    registry = er.async_get(hass)
+    registry.async_get_or_create("switch", "demo", "w0", suggested_object_id="w0")
+    registry.async_remove("sensor.s3")
+    registry.async_update_entity("sensor.s2", disabled_by=er.RegistryEntryDisabler.USER)
+    registry.async_update_entity("sensor.s0", new_entity_id="sensor.renamed")
+    hass.states.async_set("sensor.s1", "off")
+    manager._config["sensor.s1"] = {"recorder_days": 5}
+    async_dispatcher_send(hass, SIGNAL_CONFIG_UPDATED)
+    await hass.async_block_till_done()
+
+    stats = manager.stats.as_dict()
+    assert stats == _rebuilt(manager)
+    assert stats["total_entities"] == 5
+    assert stats["states"]["off"] == 1
+    assert stats["excluded_recorder_entities"] == 0